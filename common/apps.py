@@ -30,24 +30,17 @@ class CommonConfig(AppConfig):
         import sys
 
         autodiscover_modules('protected_paths')
+        autodiscover_modules('firewall_rules')
         self.config_static()
         logger = logging.getLogger('django.server')
         for key, value in common_settings.items():
             logger.info('%s %s %s', self.name, key, value)
 
-        # Open RTP ports.
+        # Sync after rule model changes in any process, and at ASGI
+        # startup, in the background, so that the server can start serving
+        # while the firewall syncs. Workers starting together sync once.
+        from common import firewall
+
+        firewall.connect()
         if sys.argv[-1] == 'project.asgi:application':
-            from common import firewall
-            from django.conf import settings
-
-            firewall.accept(
-                'udp',
-                settings.PORTS['rtp_start'],
-                settings.PORTS['rtp_end']
-            )
-            logger.info(
-                '%s opened udp %s-%s',
-                self.name,
-                settings.PORTS['rtp_start'],
-                settings.PORTS['rtp_end']
-            )
+            firewall.start_sync(startup=True)
@@ -0,0 +1,132 @@
+""" Fake firewall service module.
+
+A local stand-in for the firewall service, for tests and benchmarks. It
+accepts the firewall API's POSTs, records them, keeps the accept rule set
+and counts connections. """
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class FakeFirewallRequestHandler(BaseHTTPRequestHandler):
+    """ Record firewall API requests. """
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        """ Count the connection. """
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def send_body(self, status, body=b''):
+        """ Send the response. """
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """ Send the accept rules, if the server lists them. """
+        if self.path != '/iptables/input/accept' or not self.server.listing:
+            self.send_body(404)
+            return
+        with self.server.lock:
+            rules = sorted(self.server.rules)
+        self.send_body(200, json.dumps([
+            {'transport': transport, 'start': start, 'end': end, 'src': src}
+            for transport, start, end, src in rules
+        ]).encode())
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """ Record the path and form data, update accept rules and
+        respond. """
+        length = int(self.headers.get('Content-Length', 0))
+        data = dict(parse_qsl(
+            self.rfile.read(length).decode(), keep_blank_values=True
+        ))
+        if self.path not in self.server.paths:
+            self.send_body(404)
+            return
+        with self.server.lock:
+            self.server.requests.append((self.path, data))
+            if self.path == '/iptables/input/accept':
+                rule = (
+                    data['transport'], int(data['start']),
+                    int(data['end']), data.get('src', '')
+                )
+                if data['action'] == 'delete':
+                    self.server.rules.discard(rule)
+                else:
+                    self.server.rules.add(rule)
+        self.send_body(200)
+
+    def log_message(self, format, *args):
+        """ Don't log requests. """
+        # pylint: disable=redefined-builtin
+
+
+class FakeFirewall:
+    """ Run a fake firewall service in a daemon thread. Port 0 binds a
+    free port. Set server.listing to False to answer rule listings with
+    404. """
+
+    paths = ('/iptables/input/accept', '/ipset/admin')
+
+    def __init__(self, port=0):
+        """ Bind the server. """
+        self.server = ThreadingHTTPServer(
+            ('localhost', port), FakeFirewallRequestHandler
+        )
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.paths = self.paths
+        self.server.listing = True
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.rules = set()
+        self.thread = None
+
+    @property
+    def port(self):
+        """ Return the bound port. """
+        return self.server.server_address[1]
+
+    @property
+    def connections(self):
+        """ Return the number of accepted connections. """
+        return self.server.connections
+
+    @property
+    def rules(self):
+        """ Return the set of (transport, start, end, src) accept
+        rules. """
+        with self.server.lock:
+            return set(self.server.rules)
+
+    @property
+    def requests(self):
+        """ Return a list of received (path, data) tuples. """
+        with self.server.lock:
+            return list(self.server.requests)
+
+    def start(self):
+        """ Serve in a daemon thread. """
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """ Stop serving and close the socket. """
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -1,31 +1,433 @@
-""" Firewall API module. """
+""" Firewall API module.
+
+Requests go through persistent pooled clients, so that batches of rules
+share connections instead of paying a TCP handshake per rule.
+
+Apps register rule providers, functions that return lists of
+(transport, start, end[, src]) accept rules, in firewall_rules modules,
+along with the models the rules come from. The sync reconciles the
+firewall service's accept rules with the providers' rules, adding missing
+rules and deleting stale ones, concurrently and in a background thread.
+It runs at ASGI startup and after provider model changes commit. If the
+service can't list its rules, the sync adds every provider rule and
+deletes none.
+
+Only rules that this project added are ever deleted. Syncs record the
+provider rules in the firewall state file in var, and rules that other
+tools or operators added, and that aren't in the file, are left alone.
+Syncs hold the state file's lock, so that processes sync one at a time.
+Run syncfirewall --dry-run to review a first sync.
+
+The state file also records the cache generation, which rule model
+changes bump, and the time of the last sync. Workers that start together
+skip the startup sync while another one syncs, or when one has synced at
+the current generation within FIREWALL_STARTUP_SECONDS. """
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
 import httpx
+from prometheus_client import Gauge
+
+
+sync_time = Gauge(
+    'pbx_firewall_sync_seconds',
+    'Duration of the last firewall rule sync.'
+)
+
+
+ACCEPT_PATH = '/iptables/input/accept'
+
+ADMIN_PATH = '/ipset/admin'
+
+_client = None
+
+_async_clients = weakref.WeakKeyDictionary()
+
+_lock = threading.Lock()
+
+rule_providers = {}
+
+rule_senders = []
+
+sync_done = threading.Event()
+
+_sync_lock = threading.Lock()
+
+_sync_thread = None
+
+_sync_pending = False
+
+_sync_startup = False
+
+
+def get_client_options():
+    """ Return client kwargs from firewall settings. """
+    return {
+        'base_url': 'http://localhost:%s' % settings.PORTS['firewall'],
+        'timeout': httpx.Timeout(settings.FIREWALL_TIMEOUT),
+    }
+
+
+def get_limits():
+    """ Return connection pool limits from firewall settings. """
+    return httpx.Limits(
+        max_connections=settings.FIREWALL_CONNECTIONS,
+        max_keepalive_connections=settings.FIREWALL_CONNECTIONS,
+    )
+
+
+def get_client():
+    """ Return the pooled client, creating it if needed. """
+    global _client  # pylint: disable=global-statement,invalid-name
+    with _lock:
+        if _client is None:
+            _client = httpx.Client(
+                transport=httpx.HTTPTransport(
+                    limits=get_limits(),
+                    retries=settings.FIREWALL_RETRIES,
+                ),
+                **get_client_options()
+            )
+        return _client
+
+
+def get_async_client():
+    """ Return the running event loop's pooled client, creating it if
+    needed. """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                limits=get_limits(),
+                retries=settings.FIREWALL_RETRIES,
+            ),
+            **get_client_options()
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def close():
+    """ Close the pooled client. Clients created afterwards use current
+    settings. """
+    global _client  # pylint: disable=global-statement,invalid-name
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def aclose():
+    """ Close the running event loop's pooled client. """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def get_accept_data(action, transport, start, end, src=''):
+    """ Return accept rule POST data. """
+    return {
+        'action': action,
+        'transport': transport,
+        'start': start,
+        'end': end,
+        'src': src
+    }
 
 
 def accept(transport, start, end, src=None):
     """ Allow IPv4 and IPv6 traffic to the transport/port-range. """
-    response = httpx.post(
-        'http://localhost:%s/iptables/input/accept' % (
-            settings.PORTS['firewall'],
-        ),
-        data={
-            'action': 'add',
-            'transport': transport,
-            'start': start,
-            'end': end,
-            'src': src
+    accept_many([(transport, start, end, src)])
+
+
+def accept_many(rules, action='add'):
+    """ Allow traffic for each (transport, start, end, src) rule over the
+    pooled client's connections, or delete the rules. """
+    client = get_client()
+    for rule in rules:
+        response = client.post(
+            ACCEPT_PATH, data=get_accept_data(action, *rule)
+        )
+        response.raise_for_status()
+
+
+async def aaccept_many(rules, action='add'):
+    """ Allow traffic for each (transport, start, end, src) rule, or delete
+    the rules, concurrently over the event loop's pooled client's
+    connections. """
+    client = get_async_client()
+
+    async def post(rule):
+        response = await client.post(
+            ACCEPT_PATH, data=get_accept_data(action, *rule)
+        )
+        response.raise_for_status()
+
+    await asyncio.gather(*(post(rule) for rule in rules))
+
+
+def get_accepted():
+    """ Return the set of the firewall service's accept rules, or None if
+    the service can't list them. """
+    try:
+        response = get_client().get(ACCEPT_PATH)
+        response.raise_for_status()
+        return {
+            normalize((
+                data['transport'], data['start'], data['end'],
+                data.get('src')
+            ))
+            for data in response.json()
         }
-    )
-    response.raise_for_status()
+    except (httpx.HTTPError, ValueError, KeyError, TypeError) as err:
+        logging.getLogger('django.server').warning(
+            'firewall rules listing failed, adding without deleting: %s', err
+        )
+        return None
 
 
 def add_admin(address):
     """ Add an address to the admin set. """
 
     # Set the entry address.
-    response = httpx.post(
-        'http://localhost:%s/ipset/admin' % settings.PORTS['firewall'],
-        data={'address': address}
-    )
+    response = get_client().post(ADMIN_PATH, data={'address': address})
     response.raise_for_status()
+
+
+def register_rule_provider(name, provider, senders=()):
+    """ Add a rule provider function to the registry, with the models
+    whose changes change its rules. """
+    rule_providers[name] = provider
+    rule_senders.extend(senders)
+
+
+def normalize(rule):
+    """ Return the rule as a comparable (transport, start, end, src)
+    tuple. """
+    transport, start, end, *src = rule
+    return (transport, int(start), int(end), (src and src[0]) or '')
+
+
+def get_rules():
+    """ Return a dict of normalized rules to provider names. """
+    rules = {}
+    for name, provider in rule_providers.items():
+        for rule in provider():
+            rules.setdefault(normalize(rule), name)
+    return rules
+
+
+@contextmanager
+def locked(blocking=True):
+    """ Hold the firewall state file's lock, and yield True, or yield
+    False if not blocking and another process holds it. """
+    lock_fd = os.open(
+        '%s.lock' % settings.FIREWALL_STATE_FILE, os.O_RDWR | os.O_CREAT,
+        0o640
+    )
+    try:
+        try:
+            fcntl.flock(
+                lock_fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB)
+            )
+        except BlockingIOError:
+            yield False
+        else:
+            yield True
+    finally:
+        os.close(lock_fd)
+
+
+def get_generation():
+    """ Return the shared cache generation. """
+    # pylint: disable=import-outside-toplevel
+    from fsapi import generation
+
+    return generation.get_generation().read()
+
+
+def read_state():
+    """ Return a dict of the set of rules that syncs have added, and the
+    generation and time of the last sync. """
+    try:
+        with open(settings.FIREWALL_STATE_FILE) as state_file:
+            state = json.load(state_file)
+    except (FileNotFoundError, ValueError):
+        state = {}
+    return {
+        'rules': {normalize(rule) for rule in state.get('rules', [])},
+        'generation': state.get('generation'),
+        'time': state.get('time', 0),
+    }
+
+
+def write_state(rules, generation):
+    """ Persist the rules that syncs have added, and the generation that
+    the sync saw. """
+    path = settings.FIREWALL_STATE_FILE
+    temp_path = '%s.%s' % (path, os.getpid())
+    with open(temp_path, 'w') as state_file:
+        json.dump({
+            'rules': sorted(rules),
+            'generation': generation,
+            'time': time.time(),
+        }, state_file)
+    os.replace(temp_path, path)
+
+
+def is_synced(state, generation):
+    """ Return True if the state records a recent sync at the
+    generation. """
+    return (
+        state['generation'] == generation
+        and time.time() - state['time'] < settings.FIREWALL_STARTUP_SECONDS
+    )
+
+
+def get_diff():
+    """ Return the provider rules dict, lists of rules to add and delete,
+    and the set of rules that syncs manage after applying them. Only stale
+    rules that syncs added are deleted. When the service can't list its
+    rules, every provider rule is added and none are deleted. """
+    rules = get_rules()
+    accepted = get_accepted()
+    managed = read_state()['rules']
+    if accepted is None:
+        return rules, sorted(rules), [], set(rules) | managed
+    added = sorted(rule for rule in rules if rule not in accepted)
+    deleted = sorted(
+        rule for rule in accepted if rule not in rules and rule in managed
+    )
+    # Keep deleted rules managed until they're gone, in case deleting
+    # them fails.
+    return rules, added, deleted, set(rules) | set(deleted)
+
+
+def describe(rule):
+    """ Return a log description of the rule. """
+    transport, start, end, *src = rule
+    description = '%s %s' % (transport, start)
+    if end != start:
+        description = '%s-%s' % (description, end)
+    if src and src[0]:
+        description = '%s to %s' % (description, src[0])
+    return description
+
+
+async def apply(added, deleted):
+    """ Add and delete rules concurrently and close the loop's client. """
+    try:
+        await asyncio.gather(
+            aaccept_many(added), aaccept_many(deleted, 'delete')
+        )
+    finally:
+        await aclose()
+
+
+def sync(startup=False):
+    """ Reconcile the firewall service's accept rules with the provider
+    rules. Return the lists of added and deleted rules, or None when a
+    startup sync is skipped. """
+    logger = logging.getLogger('django.server')
+    start = time.monotonic()
+    with locked(blocking=not startup) as acquired:
+        if not acquired:
+            logger.info('firewall startup sync skipped, another is running')
+            return None
+        generation = get_generation()
+        if startup and is_synced(read_state(), generation):
+            logger.info('firewall startup sync skipped, already synced')
+            return None
+        rules, added, deleted, managed = get_diff()
+        write_state(managed, generation)
+        if added or deleted:
+            asyncio.run(apply(added, deleted))
+    duration = time.monotonic() - start
+    sync_time.set(duration)
+    for rule in added:
+        logger.info('%s opened %s', rules[rule], describe(rule))
+    for rule in deleted:
+        logger.info('firewall closed %s', describe(rule))
+    logger.info(
+        'firewall synced %s rules, %s added, %s deleted in %.3fs',
+        len(rules), len(added), len(deleted), duration
+    )
+    return added, deleted
+
+
+def _run_syncs():
+    """ Sync until no sync is pending, log failures and close the
+    thread's database connections. """
+    global _sync_thread, _sync_pending  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    try:
+        while True:
+            with _sync_lock:
+                if not _sync_pending:
+                    _sync_thread = None
+                    sync_done.set()
+                    return
+                _sync_pending = False
+                startup = _sync_startup
+            try:
+                sync(startup)
+            except Exception:  # pylint: disable=broad-except
+                logging.getLogger('django.server').exception(
+                    'firewall sync failed'
+                )
+    finally:
+        connections.close_all()
+
+
+def start_sync(startup=False):
+    """ Start syncing in a daemon thread and return the thread. Syncs
+    requested while one runs are coalesced into one more sync, which is a
+    startup sync only if every request was. """
+    global _sync_thread, _sync_pending  # pylint: disable=global-statement
+    global _sync_startup  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    with _sync_lock:
+        if _sync_pending:
+            _sync_startup = _sync_startup and startup
+        else:
+            _sync_startup = startup
+        _sync_pending = True
+        if _sync_thread is None:
+            sync_done.clear()
+            _sync_thread = threading.Thread(
+                target=_run_syncs, name='firewall-sync', daemon=True
+            )
+            _sync_thread.start()
+        return _sync_thread
+
+
+def sync_on_commit(sender, **kwargs):
+    """ Sync after rule model changes commit. Syncs requested while one
+    runs are coalesced. """
+    # pylint: disable=unused-argument
+    transaction.on_commit(start_sync)
+
+
+def connect():
+    """ Connect sync receivers to rule provider model signals. """
+    for sender in rule_senders:
+        post_save.connect(
+            sync_on_commit,
+            sender=sender,
+            dispatch_uid='firewall-save-%s' % sender._meta.label_lower,
+        )
+        post_delete.connect(
+            sync_on_commit,
+            sender=sender,
+            dispatch_uid='firewall-delete-%s' % sender._meta.label_lower,
+        )
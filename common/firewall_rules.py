@@ -0,0 +1,11 @@
+""" Common firewall rules registration module. """
+from django.conf import settings
+from common.firewall import register_rule_provider
+
+
+def get_rtp_rules():
+    """ Return the RTP port range rule. """
+    return [('udp', settings.PORTS['rtp_start'], settings.PORTS['rtp_end'])]
+
+
+register_rule_provider('common', get_rtp_rules)
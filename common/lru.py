@@ -0,0 +1,72 @@
+""" Bounded LRU cache module. """
+import threading
+from collections import OrderedDict
+from prometheus_client import Counter
+
+
+cache_hits = Counter(
+    'pbx_cache_hits_total',
+    'Total LRU cache hits.',
+    ['cache']
+)
+
+cache_misses = Counter(
+    'pbx_cache_misses_total',
+    'Total LRU cache misses.',
+    ['cache']
+)
+
+
+class LruCache:
+    """ A thread-safe, bounded, least recently used cache with hit/miss
+    counters labeled with the cache name.
+
+    Every clear bumps the cache's version. Callers that build values from
+    state that a clear invalidates read the version before building, and
+    pass it to set, which drops values built across a clear. """
+
+    def __init__(self, name, maxsize):
+        """ Init an empty cache. """
+        self.name = name
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.version = 0
+        self.lock = threading.Lock()
+        self.hits = cache_hits.labels(cache=name)
+        self.misses = cache_misses.labels(cache=name)
+
+    def get(self, key):
+        """ Return the cached value or None. """
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses.inc()
+                return None
+            self.entries.move_to_end(key)
+        self.hits.inc()
+        return value
+
+    def set(self, key, value, version=None):
+        """ Cache the value and evict the least recently used entry, unless
+        the version is given and the cache was cleared since. Return True
+        if the value was cached. """
+        with self.lock:
+            if version is not None and version != self.version:
+                return False
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return True
+
+    def clear(self):
+        """ Drop all entries and bump the version. """
+        with self.lock:
+            self.entries.clear()
+            self.version += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return '%s %s/%s' % (self.name, len(self.entries), self.maxsize)
@@ -0,0 +1,33 @@
+""" Management utility to run a fake firewall service. """
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from common.fake_firewall import FakeFirewall
+
+
+class Command(BaseCommand):
+    """ A command to run the fake firewall service. """
+
+    help = 'Used to run a fake firewall service for benchmarks.'
+
+    def add_arguments(self, parser):
+        """ Add fake firewall args. """
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=settings.PORTS['firewall'],
+            help='Specifies the port to listen on.',
+        )
+
+    def handle(self, *args, **options):
+        """ Serve until interrupted. """
+        firewall = FakeFirewall(options['port'])
+        self.stdout.write('Fake firewall on port %s' % firewall.port)
+        try:
+            firewall.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            firewall.server.server_close()
+            self.stdout.write('%s requests %s connections' % (
+                len(firewall.requests), firewall.connections
+            ))
@@ -0,0 +1,32 @@
+""" Management utility to sync firewall rules. """
+from django.core.management.base import BaseCommand
+from common import firewall
+
+
+class Command(BaseCommand):
+    """ A command to reconcile the firewall service's accept rules. """
+
+    help = (
+        'Used to add missing and delete stale firewall accept rules. '
+        'Review the first sync with --dry-run.'
+    )
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        """ Add sync args. """
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show changes without applying them.',
+        )
+
+    def handle(self, *args, **options):
+        """ Sync firewall rules. """
+        if options['dry_run']:
+            _, added, deleted, _ = firewall.get_diff()
+        else:
+            added, deleted = firewall.sync()
+        for rule in added:
+            self.stdout.write('Add %s' % firewall.describe(rule))
+        for rule in deleted:
+            self.stdout.write('Delete %s' % firewall.describe(rule))
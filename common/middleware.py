@@ -1,25 +1,61 @@
 """ Common middleware module. """
+import asyncio
+from asgiref.sync import sync_to_async
 from django.http import Http404
 from common import firewall
 from common.views import protected_paths
 
 
-class AdminKnockMiddleware:
-    """ Allow SSH access to request IP on admin login. Place after
-    AuthenticationMiddleware. """
-    # pylint: disable=too-few-public-methods
+class Middleware:
+    """ Sync and async capable middleware that passes responses to
+    process_response, or to aprocess_response in async mode, so that
+    async views aren't adapted to run in the sync thread. """
+
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         """ One time config and init. """
         self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, the way Django's
+            # MiddlewareMixin does, so that the handler awaits it.
+            # pylint: disable=protected-access
+            self._is_coroutine = asyncio.coroutines._is_coroutine
 
     def __call__(self, request):
+        """ Return the processed response. """
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        """ Return the processed response in async mode. """
+        response = await self.get_response(request)
+        return await self.aprocess_response(request, response)
+
+    def process_response(self, request, response):
+        """ Return the response. """
+        # pylint: disable=no-self-use,unused-argument
+        return response
+
+    async def aprocess_response(self, request, response):
+        """ Return the response processed in async mode. """
+        return self.process_response(request, response)
+
+
+class AdminKnockMiddleware(Middleware):
+    """ Allow SSH access to request IP on admin login. Place after
+    AuthenticationMiddleware. """
+
+    @staticmethod
+    def is_admin(request, response):
+        """ Return True for successful admin index responses. """
+        return request.path == '/admin/' and response.status_code == 200
+
+    def process_response(self, request, response):
         """ Update admin group members' firewall address. """
-        response = self.get_response(request)
-        if (
-                request.user.is_staff
-                and request.path == '/admin/'
-                and response.status_code == 200):
+        if request.user.is_staff and self.is_admin(request, response):
             admin_addr = request.session.get('admin_addr', None)
             request_addr = request.META['HTTP_X_REAL_IP']
             if (
@@ -29,19 +65,20 @@ class AdminKnockMiddleware:
                 firewall.add_admin(request.session['admin_addr'])
         return response
 
+    async def aprocess_response(self, request, response):
+        """ Update the firewall address from the sync thread, since the
+        user, session and firewall client are sync-only. """
+        if not self.is_admin(request, response):
+            return response
+        return await sync_to_async(self.process_response)(request, response)
+
 
-class ProtectedPathsMiddleware:
+class ProtectedPathsMiddleware(Middleware):
     """ Drop non-local requests for protected paths. Place first in the
     middleware stack. """
-    # pylint: disable=too-few-public-methods
 
-    def __init__(self, get_response):
-        """ One time config and init. """
-        self.get_response = get_response
-
-    def __call__(self, request):
+    def process_response(self, request, response):
         """ Return 404 for non-local requests to protected paths. """
-        response = self.get_response(request)
         if (
                 request.resolver_match
                 and hasattr(request.resolver_match, 'url_name')):
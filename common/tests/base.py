@@ -1,6 +1,12 @@
 """ Test case base module. """
 import logging
-from django.test import TestCase
+import os
+import tempfile
+from django.conf import settings
+from django.test import TestCase, override_settings
+from common import firewall
+from fsapi import generation
+from common.fake_firewall import FakeFirewall
 
 
 class BaseTestCase(TestCase):
@@ -16,3 +22,27 @@ class BaseTestCase(TestCase):
     def _log(data):
         """ Log data to the django.server info logger. """
         logging.getLogger('django.server').info(data)
+
+
+class FakeFirewallMixin:
+    """ Run a fake firewall service, point the firewall client at it and
+    keep the firewall state and generation files out of var. """
+
+    def setUp(self):
+        """ Start the fake firewall and drop the client on cleanup. """
+        super().setUp()
+        self.firewall = FakeFirewall().start()
+        self.addCleanup(self.firewall.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        firewall_settings = override_settings(
+            PORTS=dict(settings.PORTS, firewall=self.firewall.port),
+            FIREWALL_STATE_FILE=os.path.join(directory.name, 'firewall.json'),
+            GENERATION_FILE=os.path.join(directory.name, 'generation'),
+        )
+        firewall_settings.enable()
+        self.addCleanup(firewall_settings.disable)
+        generation.close()
+        self.addCleanup(generation.close)
+        firewall.close()
+        self.addCleanup(firewall.close)
@@ -0,0 +1,166 @@
+""" Firewall client test module. """
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+import httpx
+from common import firewall
+from common.firewall_rules import get_rtp_rules
+from common.tests.base import BaseTestCase, FakeFirewallMixin
+from fsapi import generation
+from intercom.models import Intercom
+from sofia.models import AclAddress, Gateway
+
+
+class FirewallTestCase(FakeFirewallMixin, BaseTestCase):
+    """ Verify the pooled firewall client against the fake service. """
+
+    def test_accept_many(self):
+        """ Assert a batch of rules shares one connection. """
+        rules = [('tcp', 5061 + index, 5061 + index) for index in range(10)]
+        firewall.accept_many(rules)
+        firewall.accept('udp', 16384, 32768, '10.0.0.1')
+        firewall.add_admin('10.0.0.2')
+        requests = self.firewall.requests
+        self.assertEqual(len(requests), 12)
+        self.assertEqual(self.firewall.connections, 1)
+        self.assertEqual(requests[0], (firewall.ACCEPT_PATH, {
+            'action': 'add', 'transport': 'tcp',
+            'start': '5061', 'end': '5061', 'src': '',
+        }))
+        self.assertEqual(requests[10][1]['src'], '10.0.0.1')
+        self.assertEqual(
+            requests[11], (firewall.ADMIN_PATH, {'address': '10.0.0.2'})
+        )
+
+    def test_aaccept_many(self):
+        """ Assert async batches use the pool's connections. """
+
+        async def accept():
+            await firewall.aaccept_many(
+                ('tcp', 5061 + index, 5061 + index) for index in range(20)
+            )
+            await firewall.aclose()
+
+        async_to_sync(accept)()
+        self.assertEqual(len(self.firewall.requests), 20)
+        self.assertLessEqual(
+            self.firewall.connections, settings.FIREWALL_CONNECTIONS
+        )
+
+    def test_errors(self):
+        """ Assert service errors raise. """
+        self.firewall.server.paths = ()
+        with self.assertRaises(httpx.HTTPStatusError):
+            firewall.accept('tcp', 5061, 5061)
+
+    def create_profiles(self):
+        """ Create an Intercom and a Gateway with ACL addresses. """
+        Intercom.objects.create(domain='intercom', port=5061)
+        gateway = Gateway.objects.create(
+            domain='gateway', port=5071, username='gwuser',
+            password='gwpass', proxy='sip.example.com',
+            realm='sip.example.com', priority=1
+        )
+        for address in ('10.0.0.1', '10.0.0.2'):
+            AclAddress.objects.create(address=address, gateway=gateway)
+        return gateway
+
+    def test_sync(self):
+        """ Assert rules are collected with one query per app and only
+        the differences are applied. """
+        self.create_profiles()
+        with self.assertNumQueries(2):
+            rules = firewall.get_rules()
+        self.assertEqual(rules[('tcp', 5061, 5061, '')], 'intercom')
+        self.assertEqual(rules[('tcp', 5071, 5071, '10.0.0.2')], 'sofia')
+        self.assertEqual(
+            firewall.describe(('tcp', 5071, 5071, '10.0.0.2')),
+            'tcp 5071 to 10.0.0.2'
+        )
+        firewall.accept_many([
+            ('tcp', 5061, 5061), ('tcp', 5099, 5099, '10.9.9.9'),
+            ('tcp', 22, 22),
+        ])
+        firewall.write_state({('tcp', 5099, 5099, '10.9.9.9')}, 0)
+        added, deleted = firewall.sync()
+        self.assertEqual(len(added), len(rules) - 1)
+        self.assertEqual(deleted, [('tcp', 5099, 5099, '10.9.9.9')])
+        self.assertEqual(
+            self.firewall.rules, set(rules) | {('tcp', 22, 22, '')}
+        )
+        self.assertEqual(
+            firewall.read_state()['rules'], set(rules) | set(deleted)
+        )
+        requests = len(self.firewall.requests)
+        self.assertEqual(firewall.sync(), ([], []))
+        self.assertEqual(len(self.firewall.requests), requests)
+
+    def test_unmanaged(self):
+        """ Assert syncs only delete rules that syncs added. """
+        firewall.accept_many([('tcp', 22, 22), ('tcp', 5061, 5061)])
+        with mock.patch.dict(firewall.rule_providers, clear=True):
+            firewall.register_rule_provider(
+                'test', lambda: [('tcp', 5061, 5061)]
+            )
+            self.assertEqual(firewall.sync(), ([], []))
+            firewall.register_rule_provider('test', lambda: [])
+            self.assertEqual(firewall.sync(), ([], [('tcp', 5061, 5061, '')]))
+        self.assertEqual(self.firewall.rules, {('tcp', 22, 22, '')})
+
+    def test_unlisted(self):
+        """ Assert syncs add every rule and delete none when the service
+        can't list its rules. """
+        firewall.accept_many([('tcp', 5099, 5099), ('tcp', 5061, 5061)])
+        firewall.write_state({('tcp', 5099, 5099, '')}, 0)
+        self.firewall.server.listing = False
+        with mock.patch.dict(firewall.rule_providers, clear=True):
+            firewall.register_rule_provider(
+                'test', lambda: [('tcp', 5061, 5061), ('tcp', 5062, 5062)]
+            )
+            self.assertEqual(firewall.sync(), ([
+                ('tcp', 5061, 5061, ''), ('tcp', 5062, 5062, '')
+            ], []))
+        self.assertIn(('tcp', 5099, 5099, ''), self.firewall.rules)
+        self.assertIn(('tcp', 5062, 5062, ''), self.firewall.rules)
+        self.assertIn(('tcp', 5099, 5099, ''), firewall.read_state()['rules'])
+
+    def test_startup(self):
+        """ Assert startup syncs are skipped while another process syncs,
+        and after a recent sync at the same generation. """
+        with mock.patch.dict(firewall.rule_providers, clear=True):
+            firewall.register_rule_provider('common', get_rtp_rules)
+            with firewall.locked():
+                self.assertIsNone(firewall.sync(startup=True))
+            self.assertEqual(len(firewall.sync(startup=True)[0]), 1)
+            self.assertIsNone(firewall.sync(startup=True))
+            generation.get_generation().bump()
+            self.assertEqual(firewall.sync(startup=True), ([], []))
+            with override_settings(FIREWALL_STARTUP_SECONDS=0):
+                self.assertEqual(firewall.sync(startup=True), ([], []))
+
+    def test_signals(self):
+        """ Assert rule model changes sync after commit. """
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_profiles().delete()
+        self.assertIn(firewall.start_sync, callbacks)
+
+    def test_command(self):
+        """ Assert the sync command reports and applies changes. """
+        self.create_profiles()
+        out = StringIO()
+        call_command('syncfirewall', '--dry-run', stdout=out)
+        self.assertIn('Add tcp 5071 to 10.0.0.1', out.getvalue())
+        self.assertEqual(self.firewall.rules, set())
+        call_command('syncfirewall', stdout=StringIO())
+        self.assertIn(('tcp', 5061, 5061, ''), self.firewall.rules)
+
+    def test_start_sync(self):
+        """ Assert syncs run in the background. """
+        with mock.patch.dict(firewall.rule_providers, clear=True):
+            firewall.register_rule_provider('common', get_rtp_rules)
+            firewall.start_sync().join()
+        self.assertTrue(firewall.sync_done.is_set())
+        self.assertEqual(self.firewall.requests[0][1]['transport'], 'udp')
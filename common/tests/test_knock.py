@@ -2,10 +2,11 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.test import Client
-from common.tests.base import BaseTestCase
+from common import firewall
+from common.tests.base import BaseTestCase, FakeFirewallMixin
 
 
-class PortKnockTestCase(BaseTestCase):
+class PortKnockTestCase(FakeFirewallMixin, BaseTestCase):
     """ Verify port knocking. """
 
     @staticmethod
@@ -38,3 +39,7 @@ class PortKnockTestCase(BaseTestCase):
         actual_addr = client.session['admin_addr']
         PortKnockTestCase._logout(client)
         self.assertEqual(expected_addr, actual_addr)
+        self.assertIn(
+            (firewall.ADMIN_PATH, {'address': expected_addr}),
+            self.firewall.requests
+        )
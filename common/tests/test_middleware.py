@@ -0,0 +1,73 @@
+""" Middleware ASGI test module. """
+import asyncio
+import time
+from asgiref.sync import async_to_sync
+from django.core.asgi import get_asgi_application
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.urls import path
+
+
+async def slow(request):
+    """ Respond after a pause. """
+    # pylint: disable=unused-argument
+    await asyncio.sleep(0.25)
+    return HttpResponse('slow')
+
+
+urlpatterns = [
+    path('slow', slow, name='slow'),
+    path('protected', slow, name='pbx-fsapi'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsgiMiddlewareTestCase(SimpleTestCase):
+    """ Verify middleware through the ASGI application. """
+
+    def setUp(self):
+        """ Create the ASGI application. """
+        self.application = get_asgi_application()
+
+    async def get(self, url, host='localhost'):
+        """ Return the response status of a GET through the application. """
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.application({
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url,
+            'raw_path': url.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', host.encode())],
+            'client': ('127.0.0.1', 40000),
+            'server': ('localhost', 80),
+        }, receive, send)
+        return messages[0]['status']
+
+    def test_concurrent(self):
+        """ Assert async views run concurrently through the middleware. """
+
+        async def get_many():
+            return await asyncio.gather(*(self.get('/slow') for _ in range(4)))
+
+        start = time.monotonic()
+        self.assertEqual(async_to_sync(get_many)(), [200] * 4)
+        self.assertLess(time.monotonic() - start, 0.75)
+
+    def test_protected(self):
+        """ Assert protected paths are dropped in async mode. """
+        self.assertEqual(async_to_sync(self.get)('/protected'), 200)
+        self.assertEqual(
+            async_to_sync(self.get)('/protected', 'pbx.example.com'), 404
+        )
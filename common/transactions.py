@@ -0,0 +1,29 @@
+""" Transaction hook module. """
+from django.db import transaction
+
+
+class CommitHook:
+    """ A commit callback that records whether it ran. """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, func):
+        """ Wrap the function. """
+        self.func = func
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.func()
+
+
+def on_commit_once(func, using=None):
+    """ Run func when the current transaction commits, unless it's already
+    pending in the transaction, so that receivers of many model changes
+    run it once per commit. Outside transactions, run func now. """
+    connection = transaction.get_connection(using)
+    for entry in connection.run_on_commit:
+        hook = entry[1]
+        if isinstance(hook, CommitHook) and hook.func is func:
+            if not hook.done:
+                return
+    transaction.on_commit(CommitHook(func), using)
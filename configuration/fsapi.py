@@ -19,10 +19,16 @@ def register_config_handler(module, handler):
 class ModuleConfigHandler(Handler):
     """ Module configuration handler abstract class. """
 
+    pool = 'configuration'
+
     def get_config(self, request):
         """ Return rendered config. """
         raise NotImplementedError
 
+    async def aget_config(self, request):
+        """ Return get_config from a worker thread. """
+        return await self.run_sync(self.get_config, request)
+
 
 class ConfigSectionHandler(FsapiHandler):
     """ Handler for all configuration requests. """
@@ -32,8 +38,8 @@ class ConfigSectionHandler(FsapiHandler):
             section='configuration',
         )
 
-    def get_document(self, request):
-        """ Return config document. """
+    def get_handler(self, request):
+        """ Return the module config handler. """
         key_value = request.POST.get('key_value')
         if not key_value:
             raise Http404
@@ -42,7 +48,15 @@ class ConfigSectionHandler(FsapiHandler):
         if not handler:
             self.logger.info('No configuration handler for %s', module)
             raise Http404
-        return handler.get_config(request)
+        return handler
+
+    def get_document(self, request):
+        """ Return config document. """
+        return self.get_handler(request).get_config(request)
+
+    async def aget_document(self, request):
+        """ Return config document. """
+        return await self.get_handler(request).aget_config(request)
 
 
 register_fsapi_handler(ConfigSectionHandler())
@@ -1,15 +1,31 @@
 """ Dialplan request handler module. """
 import logging
+import threading
 from django.http import Http404
 from fsapi.views import Handler, FsapiHandler, register_fsapi_handler
 
 
 dialplan_handlers = {}
 
+_lock = threading.Lock()
+
+
+def update_dialplan_handlers(handlers, replaced=()):
+    """ Swap in a copy of the registry without handlers that are instances
+    of the replaced classes and with the context/handler dict added. """
+    global dialplan_handlers  # pylint: disable=global-statement,invalid-name
+    with _lock:
+        updated = {
+            key: handler for key, handler in dialplan_handlers.items()
+            if not isinstance(handler, replaced)
+        }
+        updated.update(handlers)
+        dialplan_handlers = updated
+
 
 def register_dialplan_handler(context, handler):
     """ Add a dialplan handler to the registry."""
-    dialplan_handlers[context] = handler
+    update_dialplan_handlers({context: handler})
     logging.getLogger('django.server').info(
         'dialplan %s %s',
         context, handler
@@ -19,10 +35,16 @@ def register_dialplan_handler(context, handler):
 class DialplanHandler(Handler):
     """ Abstract dialplan handler. """
 
+    pool = 'dialplan'
+
     def get_dialplan(self, request, context):
         """ Return rendered dialplan. """
         raise NotImplementedError
 
+    async def aget_dialplan(self, request, context):
+        """ Return get_dialplan from a worker thread. """
+        return await self.run_sync(self.get_dialplan, request, context)
+
 
 class DialplanSectionHandler(FsapiHandler):
     """ Handler for all dialplan requests. """
@@ -32,8 +54,8 @@ class DialplanSectionHandler(FsapiHandler):
             section='dialplan',
         )
 
-    def get_document(self, request):
-        """ Return dialplan document. """
+    def get_handler(self, request):
+        """ Return the context and its dialplan handler. """
         context = request.POST.get('Caller-Context')
         if not context:
             raise Http404
@@ -41,7 +63,17 @@ class DialplanSectionHandler(FsapiHandler):
         if not handler:
             self.logger.info('No dialplan handler for %s', context)
             raise Http404
+        return context, handler
+
+    def get_document(self, request):
+        """ Return dialplan document. """
+        context, handler = self.get_handler(request)
         return handler.get_dialplan(request, context)
 
+    async def aget_document(self, request):
+        """ Return dialplan document. """
+        context, handler = self.get_handler(request)
+        return await handler.aget_dialplan(request, context)
+
 
 register_fsapi_handler(DialplanSectionHandler())
@@ -1,15 +1,31 @@
 """ Directory request handler module. """
 import logging
+import threading
 from django.http import Http404
 from fsapi.views import Handler, FsapiHandler, register_fsapi_handler
 
 
 directory_handlers = {}
 
+_lock = threading.Lock()
+
+
+def update_directory_handlers(handlers, replaced=()):
+    """ Swap in a copy of the registry without handlers that are instances
+    of the replaced classes and with the domain/handler dict added. """
+    global directory_handlers  # pylint: disable=global-statement,invalid-name
+    with _lock:
+        updated = {
+            key: handler for key, handler in directory_handlers.items()
+            if not isinstance(handler, replaced)
+        }
+        updated.update(handlers)
+        directory_handlers = updated
+
 
 def register_directory_handler(domain, handler):
     """ Add a directory handler to the registry."""
-    directory_handlers[domain] = handler
+    update_directory_handlers({domain: handler})
     logging.getLogger('django.server').info(
         'directory %s %s', domain, handler
     )
@@ -18,10 +34,16 @@ def register_directory_handler(domain, handler):
 class DirectoryHandler(Handler):
     """ Directory handler abstract class. """
 
+    pool = 'directory'
+
     def get_directory(self, request, domain):
         """ Return rendered directory. """
         raise NotImplementedError
 
+    async def aget_directory(self, request, domain):
+        """ Return get_directory from a worker thread. """
+        return await self.run_sync(self.get_directory, request, domain)
+
 
 class DirectorySectionHandler(FsapiHandler):
     """ Handler for all directory requests. """
@@ -31,8 +53,8 @@ class DirectorySectionHandler(FsapiHandler):
             section='directory',
         )
 
-    def get_document(self, request):
-        """ Return directory document. """
+    def get_handler(self, request):
+        """ Return the domain and its directory handler. """
         domain = request.POST.get('key_value')
         if not domain:
             raise Http404
@@ -40,7 +62,17 @@ class DirectorySectionHandler(FsapiHandler):
         if not handler:
             self.logger.info('No directory handler for %s', domain)
             raise Http404
+        return domain, handler
+
+    def get_document(self, request):
+        """ Return directory document. """
+        domain, handler = self.get_handler(request)
         return handler.get_directory(request, domain)
 
+    async def aget_document(self, request):
+        """ Return directory document. """
+        domain, handler = self.get_handler(request)
+        return await handler.aget_directory(request, domain)
+
 
 register_fsapi_handler(DirectorySectionHandler())
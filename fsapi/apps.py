@@ -8,5 +8,13 @@ class FsapiConfig(AppConfig):
     name = 'fsapi'
 
     def ready(self):
-        """ Autodiscover registries. """
+        """ Autodiscover registries and reload them on SIGHUP. """
+        # pylint: disable=import-outside-toplevel
+        import sys
+
         autodiscover_modules(self.name)
+        autodiscover_modules('documents')
+        if sys.argv[-1] == 'project.asgi:application':
+            from fsapi import reload
+
+            reload.install()
@@ -0,0 +1,134 @@
+""" Fsapi ASGI application module.
+
+FsapiApplication serves localhost form POSTs to /fsapi straight from the
+registered fsapi handlers, without Django's middleware and URL resolution,
+and passes every other request to the wrapped Django application. """
+import logging
+import time
+from django.conf import settings
+from django.http import Http404, HttpRequest, QueryDict
+from prometheus_client import Histogram
+from fsapi import recorder, xml
+from fsapi.views import fsapi_index, get_fsapi_document
+
+
+request_time = Histogram(
+    'pbx_fsapi_request_seconds',
+    'Fsapi fast path request time.',
+    ['section']
+)
+
+FSAPI_PATH = '/fsapi'
+
+FORM_TYPE = b'application/x-www-form-urlencoded'
+
+CONTENT_TYPE = b'text/html; charset=utf-8'
+
+
+class FsapiApplication:
+    """ ASGI fsapi fast path. """
+
+    logger = logging.getLogger('django.server')
+
+    def __init__(self, application):
+        """ Wrap the Django ASGI application. """
+        self.application = application
+        self.not_found = None
+
+    @staticmethod
+    def get_host(headers):
+        """ Return the request host the way Django's get_host finds it,
+        without the port. """
+        host = None
+        if settings.USE_X_FORWARDED_HOST:
+            host = headers.get(b'x-forwarded-host')
+        if host is None:
+            host = headers.get(b'host', b'')
+        return host.decode('latin-1').rsplit(':', 1)[0]
+
+    def is_fast(self, scope, headers):
+        """ Return True if the fast path serves the request. """
+        return (
+            scope['path'] == FSAPI_PATH
+            and scope['method'] == 'POST'
+            and self.get_host(headers) == 'localhost'
+            and headers.get(b'content-type', b'').split(b';')[0] == FORM_TYPE
+        )
+
+    @staticmethod
+    async def read_body(receive):
+        """ Return the request body. """
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    @staticmethod
+    def get_request(scope, body):
+        """ Return a bare HttpRequest with POST data for the handlers. """
+        request = HttpRequest()
+        request.method = 'POST'
+        request.path = request.path_info = FSAPI_PATH
+        request.POST = QueryDict(body, encoding=settings.DEFAULT_CHARSET)
+        client = scope.get('client') or ('', 0)
+        request.META = {
+            'REMOTE_ADDR': client[0],
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': FSAPI_PATH,
+            'SERVER_NAME': 'localhost',
+        }
+        return request
+
+    def get_not_found(self):
+        """ Return the fsapi 404 document. """
+        if self.not_found is None:
+            self.not_found = xml.build_document('fsapi/404.xml', {})
+        return self.not_found
+
+    @staticmethod
+    async def send_response(send, status, body):
+        """ Send the response. """
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', CONTENT_TYPE),
+                (b'content-length', str(len(body)).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        """ Serve fsapi requests or pass them to Django. """
+        if scope['type'] != 'http' or scope['path'] != FSAPI_PATH:
+            await self.application(scope, receive, send)
+            return
+        headers = dict(scope['headers'])
+        if not self.is_fast(scope, headers):
+            await self.application(scope, receive, send)
+            return
+        start = time.monotonic()
+        request = self.get_request(scope, await self.read_body(receive))
+        try:
+            document = await get_fsapi_document(request)
+            if isinstance(document, str):
+                document = document.encode()
+            status = recorded_status = 200
+        except Http404:
+            document = self.get_not_found()
+            status, recorded_status = 200, 404
+        except Exception:  # pylint: disable=broad-except
+            self.logger.exception('fsapi %s', request.POST.get('section'))
+            document = b''
+            status = recorded_status = 500
+        await self.send_response(send, status, document)
+        recorder.record(
+            request, recorded_status, document, time.monotonic() - start
+        )
+        section = request.POST.get('section')
+        if (settings.PBX_HOSTNAME, section) not in fsapi_index:
+            section = 'other'
+        request_time.labels(section=section).observe(time.monotonic() - start)
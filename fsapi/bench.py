@@ -0,0 +1,115 @@
+""" Fsapi benchmark module.
+
+Scenarios are lists of mod_xml_curl-shaped POST data dicts. The run
+function POSTs them, round robin, to FsapiView and returns throughput,
+latency percentiles and per-request query counts. Requests run on the
+calling thread's event loop, and sync handler work runs on the calling
+thread, so that the test database connection sees every query. """
+import statistics
+import time
+from contextlib import contextmanager
+from itertools import cycle, islice
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from fsapi.views import FsapiView
+
+
+PERCENTILES = (50, 95, 99)
+
+
+@contextmanager
+def muted(*signals):
+    """ Disconnect every receiver of the signals, for bulk fixture
+    loads that reload once afterwards. """
+    saved = [(signal, signal.receivers) for signal in signals]
+    for signal in signals:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+def post(view, factory, data):
+    """ Return the response status of a POST of the data to the view. """
+    request = factory.post('/fsapi', data)
+    try:
+        return async_to_sync(view)(request).status_code
+    except Http404:
+        return 404
+
+
+def get_latencies(view, factory, bodies, requests):
+    """ Return a list of request seconds and the number of 404s. """
+    latencies = []
+    not_found = 0
+    for data in islice(cycle(bodies), requests):
+        start = time.perf_counter()
+        status = post(view, factory, data)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            not_found += 1
+    return latencies, not_found
+
+
+def get_queries(view, factory, bodies):
+    """ Return the number of queries each body's request makes. """
+    queries = []
+    with CaptureQueriesContext(connection) as context:
+        for data in bodies:
+            count = len(context.captured_queries)
+            post(view, factory, data)
+            queries.append(len(context.captured_queries) - count)
+    return queries
+
+
+def get_percentile(ordered, percentile):
+    """ Return the percentile of the sorted values, interpolated between
+    the closest ranks the way statistics.quantiles' inclusive method
+    does, which Python 3.7 lacks. """
+    position = (len(ordered) - 1) * percentile / 100
+    index = int(position)
+    if index + 1 >= len(ordered):
+        return ordered[-1]
+    return ordered[index] + (
+        (ordered[index + 1] - ordered[index]) * (position - index)
+    )
+
+
+def get_percentiles(latencies):
+    """ Return a dict of pNN_ms keys to latency percentiles. """
+    ordered = sorted(latencies)
+    return {
+        'p%s_ms' % percentile: get_percentile(ordered, percentile) * 1000
+        for percentile in PERCENTILES
+    }
+
+
+def run(bodies, requests=1000, warmup=100, budget=None):
+    """ Return a result dict for the scenario's bodies, flagged over
+    budget if a request made more than budget queries. """
+    view = FsapiView.as_view()
+    factory = RequestFactory()
+    get_latencies(view, factory, bodies, warmup)
+    start = time.perf_counter()
+    latencies, not_found = get_latencies(view, factory, bodies, requests)
+    seconds = time.perf_counter() - start
+    queries = get_queries(view, factory, bodies)
+    result = {
+        'requests': requests,
+        'seconds': seconds,
+        'throughput': requests / seconds,
+        'not_found': not_found,
+        'queries_mean': statistics.mean(queries),
+        'queries_max': max(queries),
+        'budget': budget,
+        'over_budget': budget is not None and max(queries) > budget,
+    }
+    result.update(get_percentiles(latencies))
+    return result
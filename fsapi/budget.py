@@ -0,0 +1,88 @@
+""" Fsapi query budget module.
+
+Handlers declare the most queries that one request may make in their
+query_budget attribute, None for no budget. When settings.FSAPI_QUERY_BUDGETS
+is 'log' or 'raise', get_fsapi_document counts the queries that handler
+sync work makes for each request, and requests over the budget of the last
+handler that ran sync work are logged with their SQL and counted in a
+metric, or raise QueryBudgetExceeded. Tests use 'raise'. """
+import contextvars
+import logging
+from functools import wraps
+from django.conf import settings
+from django.db import connection
+from prometheus_client import Counter
+
+
+exceeded = Counter(
+    'pbx_fsapi_query_budget_exceeded',
+    'Fsapi requests that made more queries than their handler budget.',
+    ['handler']
+)
+
+_count = contextvars.ContextVar('fsapi_query_count', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """ A request made more queries than its handler budget. """
+
+
+class QueryCount:
+    """ A database execute wrapper that records a request's queries and
+    the last handler that ran sync work for it. """
+
+    def __init__(self):
+        """ Start with no queries. """
+        self.queries = []
+        self.handler = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """ Record the query and execute it. """
+        # pylint: disable=too-many-arguments
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+def start():
+    """ Start counting the request's queries, when budgets are on. Return
+    the context variable token or None. """
+    if settings.FSAPI_QUERY_BUDGETS not in ('log', 'raise'):
+        return None
+    return _count.set(QueryCount())
+
+
+def counted(handler, func):
+    """ Return func, wrapped to count its queries for the handler when
+    the request's queries are being counted. """
+    count = _count.get()
+    if count is None:
+        return func
+
+    @wraps(func)
+    def wrapper(*args):
+        """ Call func with the execute wrapper installed. """
+        count.handler = handler
+        with connection.execute_wrapper(count):
+            return func(*args)
+
+    return wrapper
+
+
+def finish(token):
+    """ Stop counting and check the request's queries against the
+    budget. """
+    if token is None:
+        return
+    count = _count.get()
+    _count.reset(token)
+    handler = count.handler
+    budget = getattr(handler, 'query_budget', None)
+    if budget is None or len(count.queries) <= budget:
+        return
+    message = '%s made %s queries, budget %s:\n%s' % (
+        handler, len(count.queries), budget, '\n'.join(count.queries)
+    )
+    exceeded.labels(handler=str(handler)).inc()
+    if settings.FSAPI_QUERY_BUDGETS == 'raise':
+        raise QueryBudgetExceeded(message)
+    logging.getLogger('django.server').warning(message)
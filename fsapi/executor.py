@@ -0,0 +1,63 @@
+""" Fsapi sync handler execution module.
+
+In thread_sensitive mode, sync handler work runs the way Django runs sync
+views under ASGI, on one shared thread. In thread_pool mode, it runs on
+bounded per-pool thread pools, sized by settings.FSAPI_POOLS, so that slow
+work in one pool doesn't queue requests for another. Each pool thread
+keeps its own database connection. """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from prometheus_client import Gauge, Histogram
+
+
+queue_depth = Gauge(
+    'pbx_fsapi_pool_queue_depth',
+    'Fsapi calls waiting for a pool thread.',
+    ['pool']
+)
+
+wait_time = Histogram(
+    'pbx_fsapi_pool_wait_seconds',
+    'Time fsapi calls wait for a pool thread.',
+    ['pool']
+)
+
+pools = {}
+
+
+def get_pool(name):
+    """ Return the named pool, creating it on first use. """
+    pool = pools.get(name)
+    if pool is None:
+        pool = pools.setdefault(name, ThreadPoolExecutor(
+            max_workers=settings.FSAPI_POOLS.get(
+                name, settings.FSAPI_POOLS['default']
+            ),
+            thread_name_prefix='fsapi-%s' % name,
+        ))
+    return pool
+
+
+def call(name, submitted, func, args):
+    """ Record the wait and call func in a pool thread. """
+    queue_depth.labels(pool=name).dec()
+    wait_time.labels(pool=name).observe(time.monotonic() - submitted)
+    try:
+        return func(*args)
+    finally:
+        for connection in connections.all():
+            connection.close_if_unusable_or_obsolete()
+
+
+async def run(name, func, *args):
+    """ Return func(*args) run according to settings.FSAPI_EXECUTION. """
+    if settings.FSAPI_EXECUTION != 'thread_pool':
+        return await sync_to_async(func)(*args)
+    queue_depth.labels(pool=name).inc()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_pool(name), call, name, time.monotonic(), func, args
+    )
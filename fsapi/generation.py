@@ -0,0 +1,155 @@
+""" Fsapi cache generation module.
+
+Worker processes share a generation counter, eight bytes in an mmap'd
+file in var. Committed changes to models that reloaders depend on bump
+the counter, and each worker polls it from a daemon thread, running the
+reloaders when another process has bumped it. Workers' caches therefore
+converge within the poll interval plus reload time of a change. """
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from django.conf import settings
+from django.db import connections, transaction
+from prometheus_client import Gauge
+from fsapi import reload
+
+
+generation_gauge = Gauge(
+    'pbx_cache_generation',
+    'Cache generation of the worker\'s registries and caches.'
+)
+
+COUNTER = struct.Struct('<Q')
+
+_lock = threading.Lock()
+
+_generation = None
+
+_seen = None
+
+
+class Generation:
+    """ A counter in an mmap'd file. """
+
+    def __init__(self, path):
+        """ Map the file, creating it if needed. """
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o640)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size < COUNTER.size:
+                os.ftruncate(self.fd, COUNTER.size)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.map = mmap.mmap(self.fd, COUNTER.size)
+
+    def read(self):
+        """ Return the counter value. """
+        return COUNTER.unpack_from(self.map)[0]
+
+    def bump(self):
+        """ Increment the counter and return the previous and new
+        values. """
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            previous = self.read()
+            COUNTER.pack_into(self.map, 0, previous + 1)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        return previous, previous + 1
+
+    def close(self):
+        """ Unmap and close the file. """
+        self.map.close()
+        os.close(self.fd)
+
+
+def get_generation():
+    """ Return the shared Generation, mapping it if needed. """
+    global _generation, _seen  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    with _lock:
+        if _generation is None:
+            _generation = Generation(settings.GENERATION_FILE)
+            _seen = _generation.read()
+            generation_gauge.set(_seen)
+        return _generation
+
+
+def close():
+    """ Unmap the shared Generation. """
+    global _generation  # pylint: disable=global-statement,invalid-name
+    with _lock:
+        if _generation is not None:
+            _generation.close()
+            _generation = None
+
+
+def get_seen():
+    """ Return the generation of this process's registries and caches. """
+    get_generation()
+    return _seen
+
+
+def bump():
+    """ Bump the shared generation after this process's own change. """
+    global _seen  # pylint: disable=global-statement,invalid-name
+    generation = get_generation()
+    with _lock:
+        previous, current = generation.bump()
+        if previous == _seen:
+            # No other process's change is pending, so local signal
+            # receivers have already brought this process up to date.
+            _seen = current
+            generation_gauge.set(current)
+
+
+def poll():
+    """ Run the reloaders if the shared generation has changed. Return
+    True if they ran. """
+    global _seen  # pylint: disable=global-statement,invalid-name
+    current = get_generation().read()
+    if current == _seen:
+        return False
+    reload.reload()
+    with _lock:
+        _seen = max(_seen, current)
+    generation_gauge.set(_seen)
+    return True
+
+
+def _poll_thread(interval):
+    """ Poll until the process exits. """
+    logger = logging.getLogger('django.server')
+    while True:
+        try:
+            if poll():
+                logger.info('cache generation %s', _seen)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('cache generation poll failed')
+        finally:
+            connections.close_all()
+        time.sleep(interval)
+
+
+def start_polling(interval=None):
+    """ Start polling in a daemon thread and return the thread. """
+    get_generation()
+    thread = threading.Thread(
+        target=_poll_thread,
+        args=(interval or settings.GENERATION_POLL_INTERVAL,),
+        name='fsapi-generation',
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def changed(sender, **kwargs):
+    """ Bump the generation after reloader model changes commit. """
+    # pylint: disable=unused-argument
+    if kwargs.get('action', 'post_').startswith('post_'):
+        transaction.on_commit(bump)
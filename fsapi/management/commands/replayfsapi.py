@@ -0,0 +1,143 @@
+""" Management utility to replay recorded fsapi traffic. """
+import json
+import time
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from fsapi import bench, recorder, xml
+
+
+DESCRIBED_KEYS = (
+    'key_value', 'profile', 'purpose', 'user', 'Caller-Context',
+    'Caller-Destination-Number', 'variable_sip_to_user',
+)
+
+
+def describe(record):
+    """ Return a short description of a recorded request. """
+    post = record['post']
+    values = ['%s=%s' % (key, post[key])
+              for key in DESCRIBED_KEYS if key in post]
+    return '%s %s' % (post.get('section'), ' '.join(values))
+
+
+class Command(BaseCommand):
+    """ A command to replay recorded fsapi requests against a local
+    instance and compare its responses with the recorded ones. """
+
+    help = 'Used to replay recorded fsapi traffic.'
+
+    def add_arguments(self, parser):
+        """ Add replay args. """
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            help='Record files, oldest first. Defaults to every worker\'s '
+            'record file and its backups.',
+        )
+        parser.add_argument(
+            '--url',
+            default='http://localhost:8000/fsapi',
+            help='Fsapi URL of the instance.',
+        )
+        parser.add_argument(
+            '--speed',
+            type=float,
+            default=1.0,
+            help='Pace multiplier, 0 to replay without pauses.',
+        )
+        parser.add_argument(
+            '--show',
+            type=int,
+            default=10,
+            help='Number of response diffs to show.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write JSON results to the file.',
+        )
+
+    @staticmethod
+    def get_status(response, not_found):
+        """ Return the response status, 404 for the not found document. """
+        if response.status_code == 200:
+            if recorder.get_digest(response.content) == not_found:
+                return 404
+        return response.status_code
+
+    def replay(self, records, options):
+        """ Replay the records and return a dict of section to latencies
+        and a list of (record, status, digest) diffs. """
+        not_found = recorder.get_digest(
+            xml.build_document('fsapi/404.xml', {})
+        )
+        latencies = {}
+        diffs = []
+        first = records[0]['time']
+        start = time.monotonic()
+        with httpx.Client(timeout=10.0) as client:
+            for record in records:
+                if options['speed']:
+                    delay = (record['time'] - first) / options['speed']
+                    delay -= time.monotonic() - start
+                    if delay > 0:
+                        time.sleep(delay)
+                sent = time.perf_counter()
+                try:
+                    response = client.post(options['url'], data=record['post'])
+                except httpx.HTTPError as err:
+                    diffs.append((record, 'error', str(err)))
+                    continue
+                latencies.setdefault(record['post'].get('section'), []).append(
+                    time.perf_counter() - sent
+                )
+                status = self.get_status(response, not_found)
+                digest = recorder.get_digest(response.content)
+                if status != record['status'] or (
+                        status == 200 and digest != record['digest']):
+                    diffs.append((record, status, digest))
+        return latencies, diffs
+
+    def handle(self, *args, **options):
+        """ Replay and report latencies and diffs per section. """
+        paths = options['paths'] or recorder.get_paths(
+            settings.FSAPI_RECORD_FILE
+        )
+        records = sorted(recorder.read(paths), key=lambda rec: rec['time'])
+        if not records:
+            raise CommandError('No recorded requests found.')
+        latencies, diffs = self.replay(records, options)
+        results = {}
+        for section, section_latencies in sorted(
+                latencies.items(), key=lambda item: str(item[0])):
+            result = {'requests': len(section_latencies), 'diffs': 0}
+            if len(section_latencies) > 1:
+                result.update(bench.get_percentiles(section_latencies))
+            results[str(section)] = result
+        for record, _, _ in diffs:
+            result = results.setdefault(
+                str(record['post'].get('section')), {'requests': 0}
+            )
+            result['diffs'] = result.get('diffs', 0) + 1
+        for section, result in results.items():
+            self.stdout.write('%-15s %6s requests %6s diffs %s' % (
+                section, result['requests'], result['diffs'], ' '.join(
+                    '%s %.2fms' % (key[:-3], result[key])
+                    for key in sorted(result) if key.endswith('_ms')
+                )
+            ))
+        for record, status, digest in diffs[:options['show']]:
+            self.stdout.write('%s: recorded %s %s, replayed %s %s' % (
+                describe(record), record['status'], record['digest'],
+                status, digest
+            ))
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({
+                    'url': options['url'],
+                    'speed': options['speed'],
+                    'requests': len(records),
+                    'diffs': len(diffs),
+                    'sections': results,
+                }, output_file, indent=2, sort_keys=True)
+                output_file.write('\n')
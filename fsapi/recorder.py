@@ -0,0 +1,164 @@
+""" Fsapi traffic recorder module.
+
+When settings.FSAPI_RECORD is on, FsapiView and the ASGI fast path record
+a sample of fsapi requests to a rotating JSONL file per worker process,
+named after FSAPI_RECORD_FILE with the process id, one JSON object per
+line with the request time, redacted POST data, response status, document
+digest and size, and handling seconds. Not found documents are recorded
+with status 404, though they're sent with status 200.
+
+Documents aren't recorded, since line-auth documents hold passwords, so
+replays compare digests. Digests are keyed with SECRET_KEY, so that
+passwords can't be guessed from line-auth document digests, and replays
+must run against an instance with the same key.
+
+Records are queued, and a listener thread writes and rotates the file, so
+that the event loop doesn't wait on file I/O. """
+import hashlib
+import glob
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from logging.handlers import (
+    QueueHandler, QueueListener, RotatingFileHandler
+)
+from django.conf import settings
+
+
+REDACTED = '[redacted]'
+
+SECRET_KEYS = re.compile(
+    r'pass|secret|token|auth_response|auth_nonce|auth_cnonce|credential',
+    re.IGNORECASE
+)
+
+logger = logging.getLogger('fsapi.recorder')
+logger.propagate = False
+
+_lock = threading.Lock()
+
+# Path of the file that logger's listener writes.
+_path = None
+
+_listener = None
+
+
+def get_path(path):
+    """ Return this process's record file path for the record path. """
+    base, ext = os.path.splitext(path)
+    return '%s.%s%s' % (base, os.getpid(), ext)
+
+
+def get_logger():
+    """ Return the recorder logger, which queues records for a listener
+    thread that writes this process's record file. """
+    global _path, _listener  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    path = get_path(settings.FSAPI_RECORD_FILE)
+    if _path == path:
+        return logger
+    with _lock:
+        if _path != path:
+            _stop()
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=settings.FSAPI_RECORD_MAX_BYTES,
+                backupCount=settings.FSAPI_RECORD_BACKUPS,
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            records = queue.SimpleQueue()
+            logger.addHandler(QueueHandler(records))
+            logger.setLevel(logging.INFO)
+            _listener = QueueListener(records, handler)
+            _listener.start()
+            _path = path
+    return logger
+
+
+def _stop():
+    """ Remove the logger's handler, and write queued records and close
+    the file. Call with _lock held. """
+    global _path, _listener  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _path = _listener = None
+
+
+def stop():
+    """ Write queued records and close the record file. """
+    with _lock:
+        _stop()
+
+
+def redact(data):
+    """ Return the POST data dict with secret values redacted. """
+    return {
+        key: REDACTED if SECRET_KEYS.search(key) else value
+        for key, value in data.items()
+    }
+
+
+def get_digest(document):
+    """ Return a short SECRET_KEY keyed digest of the document bytes. """
+    return hmac.new(
+        settings.SECRET_KEY.encode(), document, hashlib.sha256
+    ).hexdigest()[:16]
+
+
+def record(request, status, document, seconds):
+    """ Record a sample of requests when recording is on. """
+    if not settings.FSAPI_RECORD:
+        return
+    if random.random() >= settings.FSAPI_RECORD_SAMPLE:
+        return
+    if isinstance(document, str):
+        document = document.encode()
+    get_logger().info(json.dumps({
+        'time': time.time(),
+        'post': redact(request.POST.dict()),
+        'status': status,
+        'digest': get_digest(document),
+        'bytes': len(document),
+        'seconds': seconds,
+    }, sort_keys=True))
+
+
+def get_paths(path):
+    """ Return the worker record files for the record path and their
+    backups, oldest first. """
+    base, ext = os.path.splitext(path)
+    paths = []
+    for worker_path in sorted(glob.glob('%s.*%s' % (base, ext))):
+        paths.extend(
+            '%s.%s' % (worker_path, index)
+            for index in range(settings.FSAPI_RECORD_BACKUPS, 0, -1)
+        )
+        paths.append(worker_path)
+    return paths
+
+
+def read(paths):
+    """ Yield records from the JSONL files, skipping missing files and
+    partial lines. """
+    for path in paths:
+        try:
+            with open(path) as record_file:
+                for line in record_file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
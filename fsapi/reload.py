@@ -0,0 +1,97 @@
+""" Fsapi registry reload module.
+
+Apps register reloaders, functions that rebuild their registries and
+caches from the database, with the models they depend on. On SIGHUP, or
+when another process changes those models, the reloaders run in a worker
+thread and each swaps in its rebuilt state with a single assignment, so
+that requests in flight keep using the previous state until it's
+replaced. """
+import logging
+import signal
+import threading
+import time
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+reloaders = {}
+
+reload_senders = []
+
+_lock = threading.Lock()
+
+
+def register_reloader(name, reloader, senders=()):
+    """ Add a reloader function to the registry. Bump the cache
+    generation, then persist warm states, on changes to the sender
+    models. """
+    # pylint: disable=import-outside-toplevel
+    from fsapi.generation import changed
+    from fsapi.warmstart import dump_on_commit
+
+    reloaders[name] = reloader
+    reload_senders.extend(senders)
+    for receiver, prefix in (
+            (changed, 'generation'), (dump_on_commit, 'warmstart')):
+        for sender in senders:
+            label = sender._meta.label_lower
+            post_save.connect(
+                receiver, sender=sender,
+                dispatch_uid='%s-save-%s' % (prefix, label)
+            )
+            post_delete.connect(
+                receiver, sender=sender,
+                dispatch_uid='%s-delete-%s' % (prefix, label)
+            )
+            m2m_changed.connect(
+                receiver, sender=sender,
+                dispatch_uid='%s-m2m-%s' % (prefix, label)
+            )
+
+
+def reload():
+    """ Run every reloader. """
+    logger = logging.getLogger('django.server')
+    with _lock:
+        start = time.monotonic()
+        for name, reloader in list(reloaders.items()):
+            try:
+                reloader()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('reload %s failed', name)
+        logger.info(
+            'reloaded %s in %.3fs',
+            ', '.join(reloaders), time.monotonic() - start
+        )
+
+
+def _reload_thread():
+    """ Reload and close the thread's database connections. """
+    try:
+        reload()
+    finally:
+        connections.close_all()
+
+
+def start_reload():
+    """ Start reloading in a daemon thread and return the thread. """
+    thread = threading.Thread(
+        target=_reload_thread, name='fsapi-reload', daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def handle_sighup(signum, frame):
+    """ Reload on SIGHUP without blocking the signalled thread. """
+    # pylint: disable=unused-argument
+    start_reload()
+
+
+def install():
+    """ Reload registries on SIGHUP and on cache generation changes. """
+    # pylint: disable=import-outside-toplevel
+    from fsapi import generation
+
+    signal.signal(signal.SIGHUP, handle_sighup)
+    generation.start_polling()
@@ -0,0 +1,84 @@
+""" Fsapi ASGI fast path test module. """
+from urllib.parse import urlencode
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from common.tests.base import BaseTestCase
+from configuration.fsapi import ModuleConfigHandler, module_config_handlers
+from fsapi.asgi import FsapiApplication
+
+
+class EchoConfigHandler(ModuleConfigHandler):
+    """ Return the POSTed profile. """
+
+    def get_config(self, request):
+        """ Return the profile. """
+        return '<profile>%s</profile>' % request.POST.get('profile')
+
+
+class FsapiApplicationTestCase(BaseTestCase):
+    """ Verify the fsapi fast path. """
+
+    def setUp(self):
+        """ Register a test config handler and wrap a fake Django app. """
+        super().setUp()
+        module_config_handlers['echo'] = EchoConfigHandler()
+        self.addCleanup(module_config_handlers.pop, 'echo')
+        self.passed = []
+
+        async def django_application(scope, receive, send):
+            """ Record passed requests. """
+            # pylint: disable=unused-argument
+            self.passed.append(scope['path'])
+            await send({'type': 'http.response.start', 'status': 404})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        self.application = FsapiApplication(django_application)
+
+    async def request(self, data, host=b'localhost', path='/fsapi'):
+        """ Return the status and body of a POST. """
+        scope = {
+            'type': 'http',
+            'method': 'POST',
+            'path': path,
+            'headers': [
+                (b'host', host),
+                (b'content-type', b'application/x-www-form-urlencoded'),
+            ],
+        }
+        communicator = ApplicationCommunicator(self.application, scope)
+        await communicator.send_input({
+            'type': 'http.request',
+            'body': urlencode(data).encode(),
+        })
+        start = await communicator.receive_output()
+        body = await communicator.receive_output()
+        return start['status'], body['body']
+
+    async def test_document(self):
+        """ Assert handler documents are served without Django. """
+        status, body = await self.request({
+            'hostname': settings.PBX_HOSTNAME,
+            'section': 'configuration',
+            'key_value': 'echo.conf',
+            'profile': 'intercom',
+        })
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'<profile>intercom</profile>')
+        self.assertEqual(self.passed, [])
+
+    async def test_not_found(self):
+        """ Assert unmatched requests get the fsapi 404 document. """
+        status, body = await self.request({
+            'hostname': settings.PBX_HOSTNAME,
+            'section': 'configuration',
+            'key_value': 'nosuch.conf',
+        })
+        self.assertEqual(status, 200)
+        self.assertIn(b'<result status="not found" />', body)
+
+    async def test_passed(self):
+        """ Assert non-local and other requests pass to Django. """
+        status, _ = await self.request({}, host=settings.PBX_HOSTNAME.encode())
+        self.assertEqual(status, 404)
+        await self.request({}, path='/admin/')
+        self.assertEqual(self.passed, ['/fsapi', '/admin/'])
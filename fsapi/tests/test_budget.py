@@ -0,0 +1,72 @@
+""" Fsapi query budget test module. """
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from common.tests.base import BaseTestCase
+from configuration.fsapi import ModuleConfigHandler, module_config_handlers
+from fsapi import budget
+from fsapi.views import get_fsapi_document
+
+
+class UsersConfigHandler(ModuleConfigHandler):
+    """ Return a document that queries once per user. """
+
+    query_budget = 2
+
+    def get_config(self, request):
+        """ Return the users' names. """
+        names = []
+        for user in User.objects.all():
+            names.append(User.objects.get(pk=user.pk).username)
+        return '<users>%s</users>' % ','.join(names)
+
+
+class BudgetTestCase(BaseTestCase):
+    """ Verify fsapi query budgets. """
+
+    def setUp(self):
+        """ Register the test config handler and add a user. """
+        super().setUp()
+        module_config_handlers['users'] = UsersConfigHandler()
+        self.addCleanup(module_config_handlers.pop, 'users')
+        User.objects.create(username='user0')
+        self.request = RequestFactory().post('/fsapi', {
+            'hostname': settings.PBX_HOSTNAME,
+            'section': 'configuration',
+            'key_value': 'users.conf',
+        })
+
+    async def add_user(self):
+        """ Add a second user, putting requests over budget. """
+        await sync_to_async(User.objects.create)(username='user1')
+
+    @override_settings(FSAPI_QUERY_BUDGETS='raise')
+    async def test_raise(self):
+        """ Assert requests over budget raise with their SQL. """
+        self.assertEqual(
+            await get_fsapi_document(self.request), '<users>user0</users>'
+        )
+        await self.add_user()
+        with self.assertRaisesRegex(
+                budget.QueryBudgetExceeded,
+                'UsersConfigHandler made 3 queries, budget 2'):
+            await get_fsapi_document(self.request)
+
+    @override_settings(FSAPI_QUERY_BUDGETS='log')
+    async def test_log(self):
+        """ Assert requests over budget are logged and counted. """
+        await self.add_user()
+        labels = {'handler': 'UsersConfigHandler'}
+        before = budget.exceeded.labels(**labels)._value.get()
+        with self.assertLogs('django.server', 'WARNING') as logs:
+            await get_fsapi_document(self.request)
+        self.assertIn('auth_user', logs.output[0])
+        self.assertEqual(
+            budget.exceeded.labels(**labels)._value.get(), before + 1
+        )
+
+    async def test_off(self):
+        """ Assert requests aren't counted when budgets are off. """
+        await self.add_user()
+        await get_fsapi_document(self.request)
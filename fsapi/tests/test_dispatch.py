@@ -0,0 +1,59 @@
+""" Fsapi dispatch test module. """
+from urllib.parse import urlencode
+from django.conf import settings
+from django.test import RequestFactory
+from common.tests.base import BaseTestCase
+from fsapi.views import FsapiHandler, index_fsapi_handlers
+
+
+class DispatchTestCase(BaseTestCase):
+    """ Verify fsapi handler dispatch. """
+
+    def test_index(self):
+        """ Assert handlers are indexed by hostname and section. """
+        hostname = settings.PBX_HOSTNAME
+        directory = FsapiHandler(section='directory')
+        dialplan = FsapiHandler(section='dialplan')
+        extra = FsapiHandler(section='dialplan', purpose='gateways')
+        any_section = FsapiHandler(purpose='network-list')
+        index = index_fsapi_handlers([extra, directory, any_section, dialplan])
+        self.assertEqual(index[(hostname, 'directory')],
+                         (directory, any_section))
+        self.assertEqual(index[(hostname, 'dialplan')],
+                         (extra, any_section, dialplan))
+        self.assertEqual(index[(hostname, None)], (any_section,))
+        self.assertNotIn(('otherhost', 'dialplan'), index)
+
+    def test_extra_keys(self):
+        """ Assert only non-indexed keys are rechecked. """
+        handler = FsapiHandler(section='dialplan', purpose='gateways')
+        factory = RequestFactory()
+        request = factory.post('/fsapi', {'purpose': 'gateways'})
+        self.assertTrue(handler.matches_extra(request))
+        request = factory.post('/fsapi', {'purpose': 'network-list'})
+        self.assertFalse(handler.matches_extra(request))
+
+    def test_not_found(self):
+        """ Assert unmatched requests return the fsapi 404 document. """
+        for data in (
+                {'hostname': 'otherhost', 'section': 'configuration'},
+                {'hostname': settings.PBX_HOSTNAME, 'section': 'nosuch'},
+                {'hostname': settings.PBX_HOSTNAME,
+                 'section': 'configuration', 'key_value': 'nosuch.conf'}):
+            response = self.client.post(
+                '/fsapi', data, HTTP_X_FORWARDED_HOST='localhost'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'<result status="not found" />', response.content)
+
+    async def test_async_not_found(self):
+        """ Assert the async view returns the fsapi 404 document. """
+        response = await self.async_client.post(
+            '/fsapi',
+            urlencode({'hostname': settings.PBX_HOSTNAME,
+                       'section': 'dialplan'}),
+            content_type='application/x-www-form-urlencoded',
+            HTTP_X_FORWARDED_HOST='localhost',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<result status="not found" />', response.content)
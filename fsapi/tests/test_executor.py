@@ -0,0 +1,27 @@
+""" Fsapi executor test module. """
+import asyncio
+import threading
+from django.test import override_settings
+from common.tests.base import BaseTestCase
+from fsapi import executor
+
+
+@override_settings(FSAPI_EXECUTION='thread_pool')
+class ExecutorTestCase(BaseTestCase):
+    """ Verify thread pool execution. """
+
+    async def test_pool_thread(self):
+        """ Assert calls run on the named pool's threads. """
+        name = await executor.run(
+            'dialplan', lambda: threading.current_thread().name
+        )
+        self.assertTrue(name.startswith('fsapi-dialplan'))
+
+    async def test_pools_interleave(self):
+        """ Assert a blocked pool doesn't block other pools. """
+        event = threading.Event()
+        blocked = asyncio.ensure_future(
+            executor.run('dialplan', event.wait, 5)
+        )
+        await executor.run('directory', event.set)
+        self.assertTrue(await blocked)
@@ -0,0 +1,59 @@
+""" Cache generation test module. """
+import os
+import tempfile
+from unittest import mock
+from django.test import override_settings
+from fsapi import generation
+from fsapi.tests.base import BaseTestCase
+from intercom.models import Intercom
+
+
+class GenerationTestCase(BaseTestCase):
+    """ Verify cross-worker cache generations. """
+
+    def setUp(self):
+        """ Map a temporary generation file. """
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'generation')
+        settings = override_settings(
+            GENERATION_FILE=self.path,
+            ROUTING_SNAPSHOT_FILE=os.path.join(directory.name, 'routing'),
+            WARM_SNAPSHOT_FILE=os.path.join(directory.name, 'warm'),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        generation.close()
+        self.addCleanup(generation.close)
+
+    def test_counter(self):
+        """ Assert processes see each other's bumps. """
+        other = generation.Generation(self.path)
+        self.addCleanup(other.close)
+        self.assertEqual(generation.get_generation().read(), 0)
+        self.assertEqual(other.bump(), (0, 1))
+        self.assertEqual(generation.get_generation().read(), 1)
+
+    def test_poll(self):
+        """ Assert other processes' changes run the reloaders once. """
+        other = generation.Generation(self.path)
+        self.addCleanup(other.close)
+        with mock.patch('fsapi.reload.reload') as reload:
+            self.assertFalse(generation.poll())
+            other.bump()
+            self.assertTrue(generation.poll())
+            self.assertFalse(generation.poll())
+        reload.assert_called_once_with()
+        self.assertEqual(generation.get_seen(), 1)
+
+    def test_own_changes(self):
+        """ Assert committed local changes bump without reloading. """
+        with mock.patch('fsapi.reload.reload') as reload, \
+                mock.patch('common.firewall.start_sync'):
+            with self.captureOnCommitCallbacks(execute=True):
+                Intercom.objects.create(domain='intercom', port=5061)
+            self.assertEqual(generation.get_generation().read(), 1)
+            self.assertFalse(generation.poll())
+        reload.assert_not_called()
+        self.assertEqual(generation.get_seen(), 1)
@@ -0,0 +1,144 @@
+""" Fsapi traffic recorder test module. """
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import urlencode
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+from common.tests.base import BaseTestCase
+from configuration.fsapi import ModuleConfigHandler, module_config_handlers
+from fsapi import recorder
+from fsapi.asgi import FsapiApplication
+
+
+class EchoConfigHandler(ModuleConfigHandler):
+    """ Return the POSTed profile. """
+
+    def get_config(self, request):
+        """ Return the profile. """
+        return '<profile>%s</profile>' % request.POST.get('profile')
+
+
+class EchoRequestHandler(BaseHTTPRequestHandler):
+    """ Answer every POST with a fixed document. """
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """ Send the document. """
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = b'<profile>intercom</profile>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """ Don't log requests. """
+
+
+class RecorderTestCase(BaseTestCase):
+    """ Verify fsapi traffic recording and replay. """
+
+    def setUp(self):
+        """ Register a test config handler and record to a temporary
+        file. """
+        super().setUp()
+        module_config_handlers['echo'] = EchoConfigHandler()
+        self.addCleanup(module_config_handlers.pop, 'echo')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'fsapi.jsonl')
+        record_settings = override_settings(
+            FSAPI_RECORD=True, FSAPI_RECORD_FILE=self.path
+        )
+        record_settings.enable()
+        self.addCleanup(record_settings.disable)
+        self.addCleanup(recorder.stop)
+        self.application = FsapiApplication(None)
+
+    async def request(self, data):
+        """ POST the data to the fast path. """
+        scope = {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/fsapi',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'content-type', b'application/x-www-form-urlencoded'),
+            ],
+        }
+        communicator = ApplicationCommunicator(self.application, scope)
+        await communicator.send_input({
+            'type': 'http.request',
+            'body': urlencode(data).encode(),
+        })
+        await communicator.receive_output()
+        await communicator.receive_output()
+        await communicator.wait()
+
+    async def record(self):
+        """ Record a found and a not found request. """
+        for key_value in ('echo.conf', 'nosuch.conf'):
+            await self.request({
+                'hostname': settings.PBX_HOSTNAME,
+                'section': 'configuration',
+                'key_value': key_value,
+                'profile': 'intercom',
+                'sip_auth_password': 'secret',
+            })
+
+    async def test_record(self):
+        """ Assert requests are recorded with redacted secrets. """
+        await self.record()
+        recorder.stop()
+        paths = recorder.get_paths(self.path)
+        self.assertEqual(paths[-1], recorder.get_path(self.path))
+        self.assertRegex(paths[-1], r'fsapi\.%s\.jsonl$' % os.getpid())
+        records = list(recorder.read(paths))
+        self.assertEqual([rec['status'] for rec in records], [200, 404])
+        self.assertEqual(
+            records[0]['post']['sip_auth_password'], recorder.REDACTED
+        )
+        self.assertEqual(records[0]['post']['profile'], 'intercom')
+        self.assertEqual(
+            records[0]['digest'],
+            recorder.get_digest(b'<profile>intercom</profile>')
+        )
+        with override_settings(SECRET_KEY='other'):
+            self.assertNotEqual(
+                records[0]['digest'],
+                recorder.get_digest(b'<profile>intercom</profile>')
+            )
+
+    async def test_sample(self):
+        """ Assert unsampled requests aren't recorded. """
+        with override_settings(FSAPI_RECORD_SAMPLE=0.0):
+            await self.record()
+        recorder.stop()
+        self.assertEqual(
+            list(recorder.read(recorder.get_paths(self.path))), []
+        )
+
+    def test_replay(self):
+        """ Assert replays report response diffs. """
+        async_to_sync(self.record)()
+        recorder.stop()
+        server = ThreadingHTTPServer(('127.0.0.1', 0), EchoRequestHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        stdout = StringIO()
+        call_command(
+            'replayfsapi', speed=0,
+            url='http://127.0.0.1:%s/fsapi' % server.server_port,
+            stdout=stdout
+        )
+        output = stdout.getvalue()
+        self.assertRegex(output, r'configuration +2 requests +1 diffs')
+        self.assertIn('key_value=nosuch.conf', output)
@@ -1,24 +1,53 @@
 """ Fsapi app view module. """
+import asyncio
 import logging
+import time
+from functools import update_wrapper
 from django.conf import settings
 from django.http import Http404, HttpResponse
-from django.shortcuts import render
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
+from fsapi import budget, executor, recorder, xml
 
 
 def custom404(request):
     """ Custom 404 with 200 status code. """
-    return HttpResponse(render(request, 'fsapi/404.xml'))
+    return HttpResponse(xml.build_document('fsapi/404.xml', {}, request))
 
 
 fsapi_handlers = []
 
+fsapi_index = {}
+
+
+def index_fsapi_handlers(handlers):
+    """ Return a dict of (hostname, section) to the handlers, in
+    registration order, that can match requests with those values.
+
+    Handlers without a section key are indexed with every section and
+    under (hostname, None) for requests with unindexed sections. """
+    index = {}
+    for handler in handlers:
+        hostname = handler.keys.get('hostname')
+        index.setdefault((hostname, None), [])
+        if 'section' in handler.keys:
+            index.setdefault((hostname, handler.keys['section']), [])
+    for (hostname, section), indexed in index.items():
+        for handler in handlers:
+            if handler.keys.get('hostname') != hostname:
+                continue
+            if handler.keys.get('section', section) != section:
+                continue
+            indexed.append(handler)
+    return {key: tuple(indexed) for key, indexed in index.items()}
+
 
 def register_fsapi_handler(handler):
     """ Add a handler to the global handler registry."""
     fsapi_handlers.append(handler)
+    fsapi_index.clear()
+    fsapi_index.update(index_fsapi_handlers(fsapi_handlers))
     logging.getLogger('django.server').info('fsapi %s', handler)
 
 
@@ -28,13 +57,36 @@ class Handler:
 
     logger = logging.getLogger('django.server')
     admin_logger = logging.getLogger('django.pbx')
-
-    def rendered(self, request, template, context, log=False):
-        """ Render the template. """
-        decoded = render(request, template, context).content.decode()
+    pool = 'default'
+    query_budget = None
+    use_templates = False
+    minify = False
+
+    def document(self, request, template, context, log=False):
+        """ Return document bytes from the template's registered builder,
+        or rendered when the handler uses templates. """
+        document = xml.build_document(
+            template, context, request, self.use_templates
+        )
+        if self.minify:
+            document = xml.minify(document)
         if log:
-            self.logger.info(decoded)
-        return decoded
+            self.logger.info(document.decode())
+        return document
+
+    async def adocument(self, request, template, context, log=False):
+        """ Return the document from a worker thread, for documents that
+        query the database. """
+        return await self.run_sync(
+            self.document, request, template, context, log
+        )
+
+    async def run_sync(self, func, *args):
+        """ Return func(*args) from a worker thread of the handler's
+        pool, counting its queries against the handler's budget. """
+        return await executor.run(
+            self.pool, budget.counted(self, func), *args
+        )
 
     def __str__(self):
         return self.__class__.__name__
@@ -49,10 +101,16 @@ class FsapiHandler(Handler):
             'hostname': settings.PBX_HOSTNAME,
         }
         self.keys.update(**kwargs)
-
-    def matches(self, request):
-        """ Return True if POST data contains all expected keys/values. """
-        for key, value in self.keys.items():
+        self.pool = self.keys.get('section', self.pool)
+        self.extra_keys = tuple(
+            (key, value) for key, value in self.keys.items()
+            if key not in ('hostname', 'section')
+        )
+
+    def matches_extra(self, request):
+        """ Return True if POST data contains all expected keys/values
+        other than the indexed hostname and section. """
+        for key, value in self.extra_keys:
             if (
                     key not in request.POST
                     or value != request.POST[key]):
@@ -60,9 +118,31 @@ class FsapiHandler(Handler):
         return True
 
     def get_document(self, request):
-        """ Return self.rendered template/context. """
+        """ Return the request's document. """
         raise NotImplementedError
 
+    async def aget_document(self, request):
+        """ Return get_document from a worker thread. Override to serve
+        the document from the event loop. """
+        return await self.run_sync(self.get_document, request)
+
+
+async def get_fsapi_document(request):
+    """ Return the first matching handler's document or raise Http404.
+    Check query budgets when they're on. """
+    token = budget.start()
+    try:
+        hostname = request.POST.get('hostname')
+        handlers = fsapi_index.get((hostname, request.POST.get('section')))
+        if handlers is None:
+            handlers = fsapi_index.get((hostname, None), ())
+        for handler in handlers:
+            if handler.matches_extra(request):
+                return await handler.aget_document(request)
+        raise Http404
+    finally:
+        budget.finish(token)
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class FsapiView(View):
@@ -71,11 +151,32 @@ class FsapiView(View):
 
     http_method_names = ['post']
 
-    def post(self, request, *args, **kwargs):
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """ Return a coroutine function view so that Django's handlers
+        await it instead of running it in a worker thread. """
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            """ Await async method handlers. """
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        return update_wrapper(async_view, view)
+
+    async def post(self, request, *args, **kwargs):
         """ Handle API requests. """
         # pylint: disable=unused-argument
         request.custom404 = custom404
-        for handler in fsapi_handlers:
-            if handler.matches(request):
-                return HttpResponse(handler.get_document(request))
-        raise Http404
+        start = time.monotonic()
+        try:
+            document = await get_fsapi_document(request)
+        except Http404:
+            recorder.record(
+                request, 404, xml.NOT_FOUND, time.monotonic() - start
+            )
+            raise
+        recorder.record(request, 200, document, time.monotonic() - start)
+        return HttpResponse(document)
@@ -0,0 +1,169 @@
+""" Fsapi warm start module.
+
+Apps register warm state providers, pairs of functions that dump their
+registries and caches to picklable state and load it back. The states are
+persisted to the warm snapshot file in var along with a fingerprint of
+the code and the database: a digest of the project's modules, templates
+and env settings files, applied migrations, the cache generation and each
+reloader model's row count and maximum pk. At startup, the states are loaded if
+the fingerprint still matches, and otherwise the reloaders rebuild them
+and persist them, before the application serves requests, so that fsapi
+requests never see empty registries.
+
+Changes made through the ORM bump the generation and persist new states
+once per commit. Raw SQL updates that keep row counts and pks are not
+detected. """
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Count, Max
+from common.transactions import on_commit_once
+from fsapi import generation, reload
+
+
+VERSION = 1
+
+warm_states = {}
+
+_lock = threading.Lock()
+
+_code_digest = None
+
+
+def register_warm_state(name, dump, load):
+    """ Add a warm state dump/load function pair to the registry. Load
+    functions raise ValueError if the state can't be used. """
+    warm_states[name] = (dump, load)
+
+
+def get_code_paths():
+    """ Yield the paths of the project's modules and templates, outside
+    static dirs, and of its env settings files. """
+    base_dir = settings.BASE_DIR
+    roots = [
+        app_config.path for app_config in apps.get_app_configs()
+        if app_config.path.startswith(os.path.join(base_dir, ''))
+    ]
+    roots.append(os.path.join(base_dir, 'project'))
+    for root in roots:
+        for path, dirs, files in os.walk(root):
+            dirs[:] = [name for name in dirs
+                       if name not in ('static', '__pycache__')]
+            is_templates = os.sep + 'templates' in path[len(root):]
+            for name in files:
+                if is_templates or name.endswith('.py'):
+                    yield os.path.join(path, name)
+    for name in ('django_globals.py', 'ports.py'):
+        yield os.path.join(base_dir, 'var', name)
+
+
+def get_code_digest():
+    """ Return a digest of the code that warm states depend on, computed
+    once per process. """
+    global _code_digest  # pylint: disable=global-statement,invalid-name
+    if _code_digest is None:
+        digest = hashlib.sha256()
+        for path in sorted(get_code_paths()):
+            digest.update(
+                os.path.relpath(path, settings.BASE_DIR).encode() + b'\0'
+            )
+            with open(path, 'rb') as code_file:
+                digest.update(hashlib.sha256(code_file.read()).digest())
+        _code_digest = digest.hexdigest()
+    return _code_digest
+
+
+def get_fingerprint():
+    """ Return a digest of the code and database state that warm states
+    depend on. """
+    digest = hashlib.sha256()
+    digest.update(repr((VERSION, django.VERSION)).encode())
+    digest.update(get_code_digest().encode())
+    digest.update(repr(sorted(
+        MigrationRecorder(connection).applied_migrations()
+    )).encode())
+    digest.update(repr(generation.get_generation().read()).encode())
+    for sender in sorted(
+            set(reload.reload_senders), key=lambda model: model._meta.label):
+        digest.update(repr((
+            sender._meta.label,
+            sender.objects.aggregate(Count('pk'), Max('pk')),
+        )).encode())
+    return digest.hexdigest()
+
+
+def dump():
+    """ Persist every warm state with the current fingerprint. """
+    with _lock:
+        snapshot = {
+            'version': VERSION,
+            'fingerprint': get_fingerprint(),
+            'states': {
+                name: dumper() for name, (dumper, _) in warm_states.items()
+            },
+        }
+        path = settings.WARM_SNAPSHOT_FILE
+        temp_path = '%s.%s' % (path, os.getpid())
+        with open(temp_path, 'wb') as snapshot_file:
+            pickle.dump(snapshot, snapshot_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+
+def load():
+    """ Load every warm state if the snapshot matches the database.
+    Return True if the states were loaded. """
+    try:
+        with open(settings.WARM_SNAPSHOT_FILE, 'rb') as snapshot_file:
+            snapshot = pickle.load(snapshot_file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return False
+    if (
+            snapshot.get('version') != VERSION
+            or snapshot.get('fingerprint') != get_fingerprint()
+            or set(snapshot['states']) != set(warm_states)):
+        return False
+    try:
+        for name, (_, loader) in warm_states.items():
+            loader(snapshot['states'][name])
+    except ValueError as err:
+        logging.getLogger('django.server').info('warm state stale: %s', err)
+        return False
+    return True
+
+
+def start():
+    """ Load warm states, or rebuild and persist them. Return True if the
+    states were loaded. """
+    logger = logging.getLogger('django.server')
+    start_time = time.monotonic()
+    try:
+        if load():
+            logger.info(
+                'warm start in %.3fs', time.monotonic() - start_time
+            )
+            return True
+    except Exception:  # pylint: disable=broad-except
+        logger.exception('warm start load failed')
+    logger.info('warm start snapshot stale, rebuilding')
+    reload.reload()
+    try:
+        dump()
+    except Exception:  # pylint: disable=broad-except
+        logger.exception('warm start dump failed')
+    logger.info('cold start in %.3fs', time.monotonic() - start_time)
+    return False
+
+
+def dump_on_commit(sender, **kwargs):
+    """ Persist warm states once after reloader model changes commit. """
+    # pylint: disable=unused-argument
+    if kwargs.get('action', 'post_').startswith('post_'):
+        on_commit_once(dump)
@@ -0,0 +1,62 @@
+""" Fsapi XML document builder module.
+
+Document builders format freeswitch/xml documents from handler template
+contexts without the template engine. Builders are registered by template
+name and produce the same bytes as the template they replace. """
+import re
+from django.template.loader import render_to_string
+
+
+document_builders = {}
+
+_escapes = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+_whitespace = re.compile(rb'>\s+<')
+
+NOT_FOUND = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+    b'<document type="freeswitch/xml">\n'
+    b'  <section name="result">\n'
+    b'    <result status="not found" />\n'
+    b'  </section>\n'
+    b'</document>\n'
+)
+
+
+def not_found(context):
+    """ Return the fsapi/404.xml document. """
+    # pylint: disable=unused-argument
+    return NOT_FOUND
+
+
+def register_document_builder(template, builder):
+    """ Add a builder for the template to the registry. """
+    document_builders[template] = builder
+
+
+def escape(value):
+    """ Return str(value) escaped like Django template variables. """
+    return str(value).translate(_escapes)
+
+
+def minify(document):
+    """ Return the document bytes without whitespace between tags. """
+    return _whitespace.sub(b'><', document).strip()
+
+
+def build_document(template, context, request=None, use_templates=False):
+    """ Return the template's document bytes from its registered builder,
+    or rendered when it has none or use_templates is True. """
+    builder = document_builders.get(template)
+    if builder is None or use_templates:
+        return render_to_string(template, context, request).encode()
+    return builder(context)
+
+
+register_document_builder('fsapi/404.xml', not_found)
@@ -4,7 +4,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from intercom.models import (
     OutboundCallerId, Intercom,
-    Extension, DidExtension,
+    Extension, DidExtension, DidBlock,
     Bridge, OutboundExtension,
     Line, OutsideLine
 )
@@ -43,12 +43,18 @@ class IntercomAdmin(admin.ModelAdmin):
 class ExtensionAdmin(admin.ModelAdmin):
     """ Extension model admin tweaks. """
 
+    def get_queryset(self, request):
+        """ Select Actions and their subtypes with the Extensions. """
+        return super().get_queryset(request).select_related(
+            'intercom', *Extension.get_action_lookups()
+        )
+
     def action_repr(self, obj):
         """ Return a representation of the action. """
         # pylint: disable=no-self-use
         action = obj.get_action()
         if action:
-            return '%s %s' % (obj.get_action().__class__.__name__, action.name)
+            return '%s %s' % (action.__class__.__name__, action.name)
         return None
 
     action_repr.short_description = 'Action'
@@ -67,6 +73,12 @@ class DidExtensionAdmin(admin.ModelAdmin):
     list_display = ('did_number', 'extension')
 
 
+@admin.register(DidBlock)
+class DidBlockAdmin(admin.ModelAdmin):
+    """ DidBlock model admin tweaks. """
+    list_display = ('did_prefix', 'intercom')
+
+
 @admin.register(Bridge)
 class BridgeAdmin(admin.ModelAdmin):
     """ Bridge model admin tweaks. """
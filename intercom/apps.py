@@ -21,72 +21,149 @@ class IntercomConfig(AppConfig):
         intercom_settings['action_names'] = action_names
 
     def config_dialplan_handlers(self):
-        """ Configure dialplan handlers. """
+        """ Configure dialplan handlers, replacing any registered for
+        Intercoms and Gateways that no longer exist. """
         # pylint: disable=no-self-use
-        from dialplan.fsapi import register_dialplan_handler
+        import logging
+        from dialplan.fsapi import update_dialplan_handlers
         from intercom.dialplan import (
             LineCallHandler,
             InboundCallHandler
         )
         from intercom.models import Intercom
-        from sofia.models import Gateway
-
-        for intercom in Intercom.objects.all():
-            register_dialplan_handler(intercom.domain, LineCallHandler())
-        for gateway in Gateway.objects.all():
-            register_dialplan_handler(gateway.domain, InboundCallHandler())
+        from sofia.gateways import get_gateways
+
+        handlers = {}
+        for domain in Intercom.objects.values_list('domain', flat=True):
+            handlers[domain] = LineCallHandler()
+        for domain in get_gateways():
+            handlers[domain] = InboundCallHandler()
+        update_dialplan_handlers(
+            handlers, (LineCallHandler, InboundCallHandler)
+        )
+        logger = logging.getLogger('django.server')
+        for context, handler in handlers.items():
+            logger.info('dialplan %s %s', context, handler)
 
     def config_directory_handlers(self):
-        """ Configure directory handlers. """
+        """ Configure directory handlers, replacing any registered for
+        Intercoms that no longer exist. """
         # pylint: disable=no-self-use
-        from directory.fsapi import register_directory_handler
+        import logging
+        from directory.fsapi import update_directory_handlers
         from intercom.models import Intercom
         from intercom.directory import LineAuthHandler
 
-        for intercom in Intercom.objects.all():
-            register_directory_handler(intercom.domain, LineAuthHandler())
+        handlers = {}
+        for domain in Intercom.objects.values_list('domain', flat=True):
+            handlers[domain] = LineAuthHandler()
+        update_directory_handlers(handlers, (LineAuthHandler,))
+        logger = logging.getLogger('django.server')
+        for domain, handler in handlers.items():
+            logger.info('directory %s %s', domain, handler)
+
+    def config_handlers(self):
+        """ Configure dialplan and directory handlers. """
+        self.config_dialplan_handlers()
+        self.config_directory_handlers()
 
-    def config_gateways(self):
-        """ Add gateways to settings. """
+    def dump_state(self):
+        """ Return the handler registries and published routing snapshot
+        build id as warm state. """
         # pylint: disable=no-self-use
-        from sofia.models import Gateway
+        from dialplan.fsapi import dialplan_handlers
+        from directory.fsapi import directory_handlers
+        from intercom import routing
+        from intercom.dialplan import InboundCallHandler, LineCallHandler
+        from intercom.directory import LineAuthHandler
 
-        intercom_settings['gateways'] = list(
-            Gateway.objects.order_by('priority')
+        return {
+            'dialplan': {
+                context: handler
+                for context, handler in dialplan_handlers.items()
+                if isinstance(handler, (LineCallHandler, InboundCallHandler))
+            },
+            'directory': {
+                domain: handler
+                for domain, handler in directory_handlers.items()
+                if isinstance(handler, LineAuthHandler)
+            },
+            'routing': routing.publish(),
+        }
+
+    def load_state(self, state):
+        """ Swap in warm state. """
+        # pylint: disable=no-self-use
+        from dialplan.fsapi import update_dialplan_handlers
+        from directory.fsapi import update_directory_handlers
+        from intercom import routing
+        from intercom.dialplan import InboundCallHandler, LineCallHandler
+        from intercom.directory import LineAuthHandler
+
+        if (
+                not routing.load(state['routing'])
+                and routing.get_build_id() != state['routing']):
+            raise ValueError('Routing snapshot file changed.')
+        update_dialplan_handlers(
+            state['dialplan'], (LineCallHandler, InboundCallHandler)
         )
+        update_directory_handlers(state['directory'], (LineAuthHandler,))
+
+    def config_routing(self, publish=False):
+        """ Build the routing snapshot and optionally publish it. """
+        # pylint: disable=no-self-use
+        from intercom import routing
+
+        routing.rebuild()
+        if publish:
+            routing.publish()
+
+    def reload(self):
+        """ Rebuild registries, the routing snapshot and caches. Load the
+        routing snapshot file only if this process has a build id, since
+        a process without one can't tell whether the file is current.
+        Clear caches after the snapshot swap, so that requests during the
+        rebuild can't cache documents built from the old snapshot. """
+        # pylint: disable=no-self-use
+        from intercom import dialstrings, matchers, routing
+        from intercom.directory import directory_cache
+
+        self.config_handlers()
+        if routing.get_build_id() is None or not routing.load():
+            self.config_routing(publish=True)
+        matchers.invalidate()
+        dialstrings.invalidate()
+        directory_cache.clear()
+
+    def config_signals(self):
+        """ Connect model signal receivers. """
+        # pylint: disable=no-self-use
+        from intercom import signals
+
+        signals.connect()
 
     def ready(self):
         """ Config on app ready. """
         import logging
         import sys
         from django.db.utils import OperationalError
+        from fsapi.reload import register_reloader
+        from fsapi.warmstart import register_warm_state
+        from intercom import signals
 
-        # Configure the intercom.
+        # Configure the intercom. The ASGI application warm starts it.
         self.config_action_names()
-        try:
-            self.config_gateways()
-            self.config_dialplan_handlers()
-            self.config_directory_handlers()
-        except OperationalError:
-            pass  # These fail when tables don't exist.
+        self.config_signals()
+        register_reloader(self.name, self.reload, signals.get_senders())
+        register_warm_state(self.name, self.dump_state, self.load_state)
+        if sys.argv[-1] != 'project.asgi:application':
+            try:
+                self.config_handlers()
+                self.config_routing()
+            except OperationalError:
+                pass  # These fail when tables don't exist.
 
         # Log settings.
         logger = logging.getLogger('django.server')
         for key, value in intercom_settings.items():
             logger.info('%s %s %s', self.name, key, value)
-
-        # Open ports.
-        if sys.argv[-1] == 'project.asgi:application':
-            from common import firewall
-            from intercom.models import Intercom
-
-            for intercom in Intercom.objects.all():
-                firewall.accept(
-                    'tcp',
-                    intercom.port,
-                    intercom.port,
-                )
-                logger.info(
-                    '%s opened tcp %s',
-                    self.name, intercom.port
-                )
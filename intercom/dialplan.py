@@ -1,16 +1,21 @@
 """ Intercom dialplan app dialplan request handler module. """
 from django.http import Http404
-from django.shortcuts import get_object_or_404
 from dialplan.fsapi import DialplanHandler
-from intercom.models import Extension, DidExtension, Gateway, Line, get_e164
+from intercom import matchers, routing
+from intercom.models import get_e164
+from sofia import gateways
 
 
 class LineCallHandler(DialplanHandler):
     """ Line call dialplan request handler. """
 
+    # Bridge Action Lines and OutsideLines.
+    query_budget = 2
+
     # Handle 404 with an annotation.
-    def get_dialplan(self, request, context):
-        """ Return Line Extension/Matcher template/context. """
+    def route_call(self, request, context):
+        """ Return Line Extension/Matcher template, context and log flag. """
+        # pylint: disable=no-self-use
 
         # Get the dialed number.
         dest_number = request.POST.get('Caller-Destination-Number')
@@ -21,90 +26,96 @@ class LineCallHandler(DialplanHandler):
         username = request.POST.get('variable_user_name')
         if not username:
             raise Http404
-        caller = get_object_or_404(Line, username=username)
+        caller = routing.get_line(username)
+        if not caller:
+            raise Http404
 
         # Try Extensions.
-        try:
-
-            # Extension.
-            extension = Extension.objects.get(
-                intercom__domain=context,
-                extension_number=dest_number
-            )
-            action = extension.get_action()
-            if not action:
+        route = routing.get_route(context, dest_number)
+        if route:
+            if not route.action:
                 raise Http404
-            template = action.template
             context_data = {
                 'context': context,
-                'dest_number': extension.extension_number,
+                'dest_number': route.extension.extension_number,
                 'caller': caller,
-                'extension': extension,
-                'action': action,
+                'extension': route.extension,
+                'action': route.action,
             }
-            return self.rendered(request, template, context_data)
-        except Extension.DoesNotExist:
-            pass
+            return route.template, context_data, False
 
         # Try DidExtensions and OutboundExtensions.
         full_number = get_e164(dest_number)
         if not full_number:
             raise Http404
-        did_extensions = DidExtension.objects.all()
-        for outbound_ext in caller.outbound_extensions.all():
-            if outbound_ext.matches(full_number):
-
-                # Route to another Intercom via DidExtension.
-                for did_extension in did_extensions:
-                    if did_extension.did_number == full_number:
-                        extension = did_extension.extension
-                        if not extension:
-                            raise Http404
-                        action = extension.get_action()
-                        if not action:
-                            raise Http404
-                        template = action.template
-                        context_data = {
-                            'context': context,
-                            'dest_number': extension.extension_number,
-                            'caller': caller,
-                            'extension': extension,
-                            'action': action,
-                        }
-                        return self.rendered(request, template, context_data)
-
-                # Route via Gateways.
-                template = outbound_ext.template
+        outbound_ext = matchers.match(
+            caller.outbound_extensions.all(), full_number
+        )
+        if outbound_ext:
+
+            # Route to another Intercom via DidExtension.
+            route = routing.get_did_route(full_number)
+            if route:
+                if not route.action:
+                    raise Http404
                 context_data = {
                     'context': context,
-                    'dest_number': dest_number,
+                    'dest_number': route.extension.extension_number,
                     'caller': caller,
-                    'gateway': outbound_ext.gateway
+                    'extension': route.extension,
+                    'action': route.action,
                 }
-                return self.rendered(request, template, context_data, True)
+                return route.template, context_data, False
+
+            # Route via Gateways.
+            template = outbound_ext.template
+            context_data = {
+                'context': context,
+                'dest_number': dest_number,
+                'caller': caller,
+                'gateway': outbound_ext.gateway
+            }
+            return template, context_data, True
 
         # No Extension, no DidExtension, no OutboundExtension.
         raise Http404
 
+    def get_dialplan(self, request, context):
+        """ Return the Line Extension/Matcher document. """
+        return self.document(request, *self.route_call(request, context))
+
+    async def aget_dialplan(self, request, context):
+        """ Route the call on the event loop and build the document, which
+        may query Action relations, in a worker thread. """
+        return await self.adocument(
+            request, *self.route_call(request, context)
+        )
+
 
 class InboundCallHandler(DialplanHandler):
     """ Inbound call dialplan request handler. """
 
+    # Bridge Action Lines and OutsideLines.
+    query_budget = 2
+
+    @staticmethod
+    def get_gateway(request):
+        """ Return the calling Gateway from the registry or None. """
+        domain = request.POST.get('variable_sip_gateway')
+        if not domain:
+            return None
+        return gateways.get_gateway(domain)
+
     # Handle 404 with an annotation.
-    def get_dialplan(self, request, context):
-        """ Return template/context. """
+    def route_call(self, request, context, gateway):
+        """ Return template, context and log flag. """
 
         # Called number is the Gateway's registration username.
         dest_number = request.POST.get('Caller-Destination-Number')
-        domain = request.POST.get('variable_sip_gateway')
-        if not dest_number or not domain:
+        if not dest_number or not gateway:
+            raise Http404
+        if gateway.username != dest_number:
             raise Http404
-        try:
-            gateway = Gateway.objects.get(domain=domain)
-            if gateway.username != dest_number:
-                raise Http404
-        except Gateway.DoesNotExist as err:
-            raise Http404 from err
 
         # Caller ID
         caller = {
@@ -114,22 +125,36 @@ class InboundCallHandler(DialplanHandler):
 
         # SIP to user is the full number.
         did_number = request.POST.get('variable_sip_to_user')
-        try:
-            did_extension = DidExtension.objects.get(did_number=did_number)
-        except DidExtension.DoesNotExist:
-            pass  # Write an error log / admin email.
-        extension = did_extension.extension
-        action = extension.get_action()
-        if not action:
+        if not did_number:
+            self.logger.info('No DID number for %s', dest_number)
+            raise Http404
+        full_number = get_e164(did_number)
+        route = routing.get_did_route(full_number or did_number)
+        if not route or not route.action:
+            self.logger.info('No DID route for %s', did_number)
             raise Http404
 
         # Action extension.
-        template = action.template
         context_data = {
             'context': context,
             'dest_number': dest_number,
             'caller': caller,
-            'extension': extension,
-            'action': action,
+            'extension': route.extension,
+            'action': route.action,
         }
-        return self.rendered(request, template, context_data)
+        return route.template, context_data, False
+
+    def get_dialplan(self, request, context):
+        """ Return the DID Action document. """
+        gateway = self.get_gateway(request)
+        return self.document(
+            request, *self.route_call(request, context, gateway)
+        )
+
+    async def aget_dialplan(self, request, context):
+        """ Route the call on the event loop and build the document, which
+        may query Action relations, in a worker thread. """
+        gateway = self.get_gateway(request)
+        return await self.adocument(
+            request, *self.route_call(request, context, gateway)
+        )
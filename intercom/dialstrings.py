@@ -0,0 +1,86 @@
+""" Intercom app bridge dialstring plan module.
+
+A Bridge's dialstring only varies by caller, so each Bridge gets a cached
+plan: its member Line and OutsideLine gateway chain dialstrings without
+caller ID prefixes, and the Intercom's outbound caller ID prefix. Per-call
+dialstrings join the caller's prefixes to the plan's parts.
+
+Plans are dropped when Bridge membership, Lines, OutsideLines, Gateways,
+gateway health ratings or caller IDs change, and plans built across a
+drop aren't cached. """
+import copy
+from collections import namedtuple
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from common.lru import LruCache
+from intercom.models import get_e164
+from sofia.gateways import get_chain
+
+
+Plan = namedtuple('Plan', ('lines', 'outside_lines', 'outbound_prefix'))
+
+plan_cache = LruCache('dialstring', settings.DIALSTRING_CACHE_SIZE)
+
+LINE = ']${sofia_contact(%s@%s)}'
+
+GATEWAY = ']sofia/gateway/%s/%s'
+
+
+def get_prefix(name, number):
+    """ Return the caller ID prefix of a dialstring. """
+    return (
+        '[origination_caller_id_name=%s,'
+        'origination_caller_id_number=%s' % (name, number)
+    )
+
+
+def get_gateway_parts(phone_number, gateways):
+    """ Return the gateway failover chain dialstrings for the number,
+    without caller ID prefixes, or None if the number isn't E.164. """
+    full_number = get_e164(phone_number)
+    if not full_number:
+        return None
+    return tuple(GATEWAY % (gateway.domain, full_number)
+                 for gateway in gateways)
+
+
+def build(action):
+    """ Return a new Plan for the Bridge, prefetching its members onto a
+    copy so that shared routing snapshot objects get no caches. """
+    action = copy.copy(action)
+    action._prefetched_objects_cache = {}
+    prefetch_related_objects([action], *action.get_prefetch())
+    lines = tuple(
+        (line.pk, LINE % (line.username, settings.PBX_HOSTNAME))
+        for line in action.line_set.all()
+    )
+    outside_lines = []
+    for outside_line in action.outsideline_set.all():
+        if outside_line.gateway:
+            gateways = (outside_line.gateway,)
+        else:
+            gateways = get_chain()
+        outside_lines.append((
+            outside_line.phone_number,
+            get_gateway_parts(outside_line.phone_number, gateways)
+        ))
+    outbound_prefix = None
+    cid = action.extension.intercom.default_outbound_caller_id
+    if cid:
+        outbound_prefix = get_prefix(cid.name, cid.phone_number)
+    return Plan(lines, tuple(outside_lines), outbound_prefix)
+
+
+def get_plan(action):
+    """ Return the Bridge's cached or built Plan. """
+    plan = plan_cache.get(action.pk)
+    if plan is None:
+        version = plan_cache.version
+        plan = build(action)
+        plan_cache.set(action.pk, plan, version)
+    return plan
+
+
+def invalidate():
+    """ Drop every Plan. """
+    plan_cache.clear()
@@ -1,15 +1,23 @@
 """ Intercom app directory request handler module. """
+from django.conf import settings
 from django.http import Http404
-from django.shortcuts import get_object_or_404
+from common.lru import LruCache
 from directory.fsapi import DirectoryHandler
-from intercom.models import Intercom, Line
+from intercom import routing
+
+
+directory_cache = LruCache('directory', settings.DIRECTORY_CACHE_SIZE)
 
 
 class LineAuthHandler(DirectoryHandler):
     """ Handle Line auth requests. """
 
-    def get_directory(self, request, domain):
-        """ Return template/context to auth a Line registration. """
+    query_budget = 0
+
+    @staticmethod
+    def get_cached(request, domain):
+        """ Return the requested username and its cached line-auth document
+        or None. """
 
         # Reject directory gateway requests.
         purpose = request.POST.get('purpose')
@@ -18,12 +26,38 @@ class LineAuthHandler(DirectoryHandler):
             # even when parse=false.
             raise Http404
 
-        # Send the line-auth template.
         username = request.POST.get('user')
         if not username:
             raise Http404
-        intercom = get_object_or_404(Intercom, domain=domain)
-        line = get_object_or_404(Line, username=username, intercom=intercom)
+        return username, directory_cache.get((domain, username))
+
+    def build_directory(self, request, domain, username):
+        """ Return and cache the Line's line-auth document, unless the
+        cache is cleared while it's built. """
+        version = directory_cache.version
+        line = routing.get_line(username)
+        if not line or line.intercom.domain != domain:
+            raise Http404
         template = 'intercom/line-auth.xml'
         context = {'line': line}
-        return self.rendered(request, template, context)
+        document = self.document(request, template, context)
+        directory_cache.set((domain, username), document, version)
+        return document
+
+    def get_directory(self, request, domain):
+        """ Return the cached or built document to auth a Line
+        registration. """
+        username, document = self.get_cached(request, domain)
+        if document is None:
+            document = self.build_directory(request, domain, username)
+        return document
+
+    async def aget_directory(self, request, domain):
+        """ Return a cached Line auth document from the event loop, or
+        build it in a worker thread. """
+        username, document = self.get_cached(request, domain)
+        if document is None:
+            document = await self.run_sync(
+                self.build_directory, request, domain, username
+            )
+        return document
@@ -0,0 +1,74 @@
+""" Intercom app document builder module. """
+from fsapi.xml import escape, register_document_builder
+from intercom.templatetags import bridge_extras, outbound_extras
+
+
+LINE_AUTH = '''<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<document type="freeswitch/xml">
+  <section name="directory">
+    <domain name="%(domain)s">
+      <user id="%(username)s">
+        <params>
+          <param name="password" value="%(password)s" />
+        </params>
+      </user>
+    </domain>
+  </section>
+</document>
+'''
+
+BRIDGE = '''
+<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<document type="freeswitch/xml">
+  <section name="dialplan">
+    <context name="%(context)s">
+      <extension name="bridge">
+        <condition regex="all">
+          <regex field="destination_number" expression="^%(dest_number)s$"/>
+          <action application="set" data="inherit_codec=true"/>
+          <action application="export" data="_nolocal_rtp_secure_media=true"/>
+          <!--action application="info"/-->
+          <action application="bridge" data="%(dialstring)s"/>
+        </condition>
+      </extension>
+    </context>
+  </section>
+</document>
+'''
+
+
+def line_auth(context):
+    """ Return the intercom/line-auth.xml document. """
+    line = context['line']
+    return (LINE_AUTH % {
+        'domain': escape(line.intercom.domain),
+        'username': escape(line.username),
+        'password': escape(line.password),
+    }).encode()
+
+
+def bridge(context):
+    """ Return the intercom/bridge.xml document. """
+    return (BRIDGE % {
+        'context': escape(context['context']),
+        'dest_number': escape(context['dest_number']),
+        'dialstring': escape(bridge_extras.get_dialstring(
+            context['caller'], context['extension'], context['action']
+        )),
+    }).encode()
+
+
+def outbound(context):
+    """ Return the intercom/outbound.xml document. """
+    return (BRIDGE % {
+        'context': escape(context['context']),
+        'dest_number': escape(context['dest_number']),
+        'dialstring': escape(outbound_extras.get_dialstring(
+            context['caller'], context['dest_number'], context['gateway']
+        )),
+    }).encode()
+
+
+register_document_builder('intercom/line-auth.xml', line_auth)
+register_document_builder('intercom/bridge.xml', bridge)
+register_document_builder('intercom/outbound.xml', outbound)
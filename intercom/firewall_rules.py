@@ -0,0 +1,14 @@
+""" Intercom app firewall rules registration module. """
+from common.firewall import register_rule_provider
+from intercom.models import Intercom
+
+
+def get_intercom_rules():
+    """ Return a rule for each Intercom profile port. """
+    return [
+        ('tcp', port, port)
+        for port in Intercom.objects.values_list('port', flat=True)
+    ]
+
+
+register_rule_provider('intercom', get_intercom_rules, (Intercom,))
@@ -0,0 +1,134 @@
+""" Management utility to benchmark fsapi requests. """
+import json
+import logging
+import os
+import platform
+import tempfile
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from fsapi import bench, reload
+from fsapi.views import Handler
+from intercom import synthetic
+
+
+class Command(BaseCommand):
+    """ A command to benchmark fsapi requests against a synthetic PBX in a
+    test database. """
+
+    help = 'Used to benchmark fsapi requests against a synthetic PBX.'
+
+    def add_arguments(self, parser):
+        """ Add PBX size and run args. """
+        for size, default in synthetic.SIZES.items():
+            parser.add_argument(
+                '--%s' % size.replace('_', '-'),
+                type=int,
+                default=default,
+                help='Number of %s (default %s).' % (
+                    size.replace('_', ' '), default
+                ),
+            )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Timed requests per scenario.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=100,
+            help='Untimed requests per scenario.',
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Run only the named scenario. Repeat for more.',
+        )
+        parser.add_argument(
+            '--templates',
+            action='store_true',
+            help='Render documents from templates instead of builders.',
+        )
+        parser.add_argument(
+            '--label',
+            default='',
+            help='Label the results, for example with a commit hash.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write JSON results to the file.',
+        )
+
+    def run_scenarios(self, options):
+        """ Create the PBX, reload and return scenario results. """
+        sizes = {size: options[size] for size in synthetic.SIZES}
+        pbx = synthetic.create_pbx(**sizes)
+        reload.reload()
+        scenarios = synthetic.get_scenarios(pbx)
+        names = options['scenario'] or list(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError('Unknown scenarios: %s' % ', '.join(
+                sorted(unknown)
+            ))
+        results = {}
+        for name in names:
+            results[name] = bench.run(
+                scenarios[name], options['requests'], options['warmup'],
+                synthetic.BUDGETS.get(name)
+            )
+            self.stdout.write(
+                '%(name)-20s %(throughput)8.1f req/s '
+                'p50 %(p50_ms)6.2fms p95 %(p95_ms)6.2fms '
+                'p99 %(p99_ms)6.2fms queries %(queries_mean)5.1f '
+                'max %(queries_max)s 404 %(not_found)s%(over)s' % dict(
+                    results[name], name=name,
+                    over=' OVER BUDGET' if results[name]['over_budget'] else ''
+                )
+            )
+        return sizes, results
+
+    def handle(self, *args, **options):
+        """ Benchmark in a test database with snapshot files in a temporary
+        directory and sync handler work on this thread. Handler logging is
+        off below verbosity 2. """
+        if options['requests'] < 2:
+            raise CommandError('Run at least 2 requests.')
+        if options['verbosity'] < 2:
+            logging.disable(logging.INFO)
+        directory = tempfile.TemporaryDirectory()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        use_templates = Handler.use_templates
+        Handler.use_templates = options['templates']
+        try:
+            with override_settings(
+                    FSAPI_EXECUTION='thread_sensitive',
+                    GENERATION_FILE=os.path.join(directory.name, 'generation'),
+                    ROUTING_SNAPSHOT_FILE=os.path.join(
+                        directory.name, 'routing'
+                    ),
+                    WARM_SNAPSHOT_FILE=os.path.join(directory.name, 'warm')):
+                sizes, results = self.run_scenarios(options)
+        finally:
+            Handler.use_templates = use_templates
+            logging.disable(logging.NOTSET)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            directory.cleanup()
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({
+                    'label': options['label'],
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'use_templates': options['templates'],
+                    'sizes': sizes,
+                    'requests': options['requests'],
+                    'warmup': options['warmup'],
+                    'scenarios': results,
+                }, output_file, indent=2, sort_keys=True)
+                output_file.write('\n')
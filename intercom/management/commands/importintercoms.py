@@ -1,6 +1,7 @@
 """ Management utility to manage Intercom profiles. """
 import ast
 import os
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from intercom.models import Intercom
@@ -41,5 +42,6 @@ class Command(BaseCommand):
             config = ast.literal_eval(intercom_fd.read())
         if config.get('INTERCOMS'):
             self.manage_intercoms(config['INTERCOMS'])
+            call_command('syncfirewall', stdout=self.stdout)
         else:
             print('No Intercoms found')
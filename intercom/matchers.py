@@ -0,0 +1,96 @@
+""" Intercom app OutboundExtension expression matcher module.
+
+Expressions are compiled once. Each distinct ordered set of
+OutboundExtensions gets a matcher that combines the set's expressions into
+a single alternation of named groups, so that one fullmatch call returns
+the first matching OutboundExtension in set order. """
+import re
+from django.core.exceptions import ValidationError
+
+
+_backreference = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]')
+
+_patterns = {}
+
+_matchers = {}
+
+
+def compile_expression(expression):
+    """ Return the compiled expression. """
+    pattern = _patterns.get(expression)
+    if pattern is None:
+        pattern = re.compile(expression)
+        _patterns[expression] = pattern
+    return pattern
+
+
+def validate_expression(expression):
+    """ Raise ValidationError if the expression doesn't compile. """
+    try:
+        compile_expression(expression)
+    except re.error as err:
+        raise ValidationError(
+            'Invalid expression: %(error)s',
+            params={'error': err},
+        ) from err
+
+
+class OutboundMatcher:
+    """ Match full numbers against an ordered set of OutboundExtension
+    expressions. """
+
+    def __init__(self, key):
+        """ Compile the combined pattern for (pk, expression) pairs. """
+        self.pks = {}
+        self.patterns = []
+        alternatives = []
+        for pk, expression in key:
+            group = 'e%s' % pk
+            self.pks[group] = pk
+            self.patterns.append((pk, compile_expression(expression)))
+            alternatives.append('(?P<%s>%s)' % (group, expression))
+        self.combined = None
+        if any(_backreference.search(expr) for _, expr in key):
+            return  # Numbered group references shift when combined.
+        try:
+            self.combined = re.compile('|'.join(alternatives))
+        except re.error:
+            pass  # Group names and inline flags can clash when combined.
+
+    def match(self, full_number):
+        """ Return the pk of the first matching expression or None. """
+        if self.combined:
+            match = self.combined.fullmatch(full_number)
+            if match:
+                return self.pks[match.lastgroup]
+            return None
+        for pk, pattern in self.patterns:
+            if pattern.fullmatch(full_number):
+                return pk
+        return None
+
+
+def get_matcher(outbound_extensions):
+    """ Return the cached matcher for the OutboundExtensions. """
+    key = tuple((ext.pk, ext.expression) for ext in outbound_extensions)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = OutboundMatcher(key)
+        _matchers[key] = matcher
+    return matcher
+
+
+def match(outbound_extensions, full_number):
+    """ Return the first OutboundExtension that matches or None. """
+    outbound_extensions = list(outbound_extensions)
+    pk = get_matcher(outbound_extensions).match(full_number)
+    for outbound_ext in outbound_extensions:
+        if outbound_ext.pk == pk:
+            return outbound_ext
+    return None
+
+
+def invalidate():
+    """ Drop compiled expressions and matchers. """
+    _patterns.clear()
+    _matchers.clear()
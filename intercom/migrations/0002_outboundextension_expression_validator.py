@@ -0,0 +1,19 @@
+# Generated by Django 3.2.7 on 2026-10-18 07:40
+
+from django.db import migrations, models
+import intercom.matchers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intercom', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboundextension',
+            name='expression',
+            field=models.CharField(max_length=50, validators=[intercom.matchers.validate_expression]),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.7 on 2026-10-18 07:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intercom', '0002_outboundextension_expression_validator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DidBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('did_prefix', models.CharField(max_length=50, unique=True)),
+                ('intercom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='intercom.intercom')),
+            ],
+            options={
+                'verbose_name': 'DID block',
+                'verbose_name_plural': 'DID blocks',
+            },
+        ),
+    ]
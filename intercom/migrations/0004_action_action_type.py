@@ -0,0 +1,29 @@
+# Generated by Django 3.2.7 on 2026-10-18 08:20
+
+from django.db import migrations, models
+
+
+def set_action_types(apps, schema_editor):
+    """ Record existing Actions' subtypes. """
+    # pylint: disable=unused-argument
+    Action = apps.get_model('intercom', 'Action')
+    Bridge = apps.get_model('intercom', 'Bridge')
+    Action.objects.filter(
+        pk__in=Bridge.objects.values('action_ptr')
+    ).update(action_type='bridge')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intercom', '0003_didblock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='action',
+            name='action_type',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(set_action_types, migrations.RunPython.noop),
+    ]
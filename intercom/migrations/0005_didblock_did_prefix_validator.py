@@ -0,0 +1,19 @@
+# Generated by Django 3.2.7 on 2026-10-18 08:39
+
+from django.db import migrations, models
+import intercom.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intercom', '0004_action_action_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='didblock',
+            name='did_prefix',
+            field=models.CharField(max_length=50, unique=True, validators=[intercom.models.validate_did_prefix]),
+        ),
+    ]
@@ -1,7 +1,9 @@
 """ Intercom app models module. """
 import re
+from django.core.exceptions import ValidationError
 from django.db import models
 from intercom.apps import intercom_settings
+from intercom.matchers import validate_expression
 from sofia.models import SofiaProfile, Gateway
 
 
@@ -16,6 +18,16 @@ def get_e164(number):
     return None
 
 
+def validate_did_prefix(prefix):
+    """ Raise ValidationError unless the prefix is an E.164 number
+    prefix. """
+    if not re.fullmatch(r'\+[1-9]\d{0,13}', prefix):
+        raise ValidationError(
+            'Invalid DID prefix: %(prefix)s, expected + and up to 14 digits',
+            params={'prefix': prefix},
+        )
+
+
 class OutboundCallerId(models.Model):
     """ An ITSP-verified calling name/number to send out Gateways. """
 
@@ -49,7 +61,8 @@ class Extension(models.Model):
 
     Action objects of various types reference Extensions. The get_action
     method returns the Action object that refrences a particular Extension
-    object, if any. """
+    object, if any, in one query, or none when the Extension was loaded with
+    the get_action_lookups relations. """
 
     class Meta:
         constraints = [
@@ -61,14 +74,27 @@ class Extension(models.Model):
         verbose_name = 'Intercom extension'
         verbose_name_plural = 'Intercom extensions'
 
+    @staticmethod
+    def get_action_lookups(prefix='action'):
+        """ Return select_related lookups for the Action and every Action
+        subtype. """
+        lookups = [prefix]
+        for name in intercom_settings['action_names']:
+            lookups.append('%s__%s' % (prefix, name))
+        return lookups
+
     def get_action(self):
         """ Return the Extension's Action subtype or None. """
-        if hasattr(self, 'action'):
-            action = getattr(self, 'action')
-            for name in intercom_settings['action_names']:
-                if hasattr(action, name):
-                    return getattr(action, name)
-        return None
+        field = self._meta.get_field('action')
+        if not field.is_cached(self):
+            action = Action.objects.select_related(
+                *intercom_settings['action_names']
+            ).filter(extension=self).first()
+            field.set_cached_value(self, action)
+        action = field.get_cached_value(self)
+        if action is None:
+            return None
+        return action.get_subtype()
 
     extension_number = models.CharField(max_length=50)
     intercom = models.ForeignKey(
@@ -104,6 +130,31 @@ class DidExtension(models.Model):
         return f'{self.did_number} {self.extension}'
 
 
+class DidBlock(models.Model):
+    """ A contiguous block of DID numbers and the Intercom whose Extensions
+    receive calls to them.
+
+    The digits that follow the block's E.164 prefix are the Extension
+    number, so +1555123 routes +15551234100 to Extension 4100. """
+
+    class Meta:
+        verbose_name = 'DID block'
+        verbose_name_plural = 'DID blocks'
+
+    did_prefix = models.CharField(
+        unique=True,
+        max_length=50,
+        validators=[validate_did_prefix],
+    )
+    intercom = models.ForeignKey(
+        Intercom,
+        on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return f'{self.did_prefix} ({self.intercom})'
+
+
 class Action(models.Model):
     """ A concrete named Extension dialplan action.
 
@@ -120,6 +171,33 @@ class Action(models.Model):
         Extension,
         on_delete=models.CASCADE,
     )
+    action_type = models.CharField(
+        max_length=50,
+        editable=False,
+        default='',
+    )
+
+    def save(self, *args, **kwargs):
+        """ Record the subtype's model name and save. """
+        # pylint: disable=signature-differs
+        if self._meta.model_name in intercom_settings['action_names']:
+            self.action_type = self._meta.model_name
+        super().save(*args, **kwargs)
+
+    def get_subtype(self):
+        """ Return the Action subtype object named by action_type, or None.
+        Subtype objects return themselves. """
+        if self._meta.model_name == self.action_type:
+            return self
+        if self.action_type not in intercom_settings['action_names']:
+            return None
+        return getattr(self, self.action_type)
+
+    def get_prefetch(self):
+        """ Return prefetch_related lookups for the relations that the
+        template uses. """
+        # pylint: disable=no-self-use
+        return ()
 
     def __str__(self):
         return f'{self.name} {self.extension}'
@@ -134,6 +212,20 @@ class Bridge(Action):
 
     template = 'intercom/bridge.xml'
 
+    def get_prefetch(self):
+        """ Return member Line and OutsideLine/Gateway lookups. """
+        return (
+            models.Prefetch(
+                'line_set', queryset=Line.objects.order_by('pk')
+            ),
+            models.Prefetch(
+                'outsideline_set',
+                queryset=OutsideLine.objects.select_related(
+                    'gateway'
+                ).order_by('pk'),
+            ),
+        )
+
 
 class OutboundExtension(models.Model):
     """ A combined regular expression and dialplan action.
@@ -146,16 +238,19 @@ class OutboundExtension(models.Model):
     The dialplan sends the calling Line's OutboundCallerId, if configured,
     or the Intercom's if not. """
 
-    def matches(self, full_number):
-        """ Return True on full-number match. """
-        if re.fullmatch(self.expression, full_number):
-            return True
-        return False
+    def save(self, *args, **kwargs):
+        """ Validate the expression and save. """
+        # pylint: disable=signature-differs
+        validate_expression(self.expression)
+        super().save(*args, **kwargs)
 
     template = 'intercom/outbound.xml'
 
     name = models.CharField(max_length=50)
-    expression = models.CharField(max_length=50)
+    expression = models.CharField(
+        max_length=50,
+        validators=[validate_expression],
+    )
     gateway = models.ForeignKey(
         Gateway,
         blank=True,
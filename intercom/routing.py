@@ -0,0 +1,305 @@
+""" Intercom app dialplan routing snapshot module.
+
+The snapshot maps Line usernames to preloaded Line objects, Intercom
+domains to an extension_number/Route mapping and E.164 DID numbers to
+Routes, so that dialplan handlers resolve callers, Extension Actions and
+DIDs without database queries.
+
+The snapshot is immutable. The rebuild function builds a new one and swaps
+it in with a single assignment, so handlers never see a partial rebuild.
+
+The process that makes a change rebuilds once when the change's
+transaction commits, and publishes its snapshot to the routing snapshot
+file. Other workers load the file instead of querying the database,
+mapping it and decoding only the records that their requests look
+up. """
+import logging
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from django.conf import settings
+from django.db.models import Prefetch
+from intercom import snapshot
+from intercom.apps import intercom_settings
+
+
+Route = namedtuple('Route', ('extension', 'action', 'template'))
+
+unassigned = Route(None, None, None)
+
+
+class Snapshot(namedtuple('Snapshot', ('lines', 'extensions', 'dids'))):
+    """ A routing snapshot built from the database. """
+    __slots__ = ()
+
+    def get_line(self, username):
+        """ Return the Line for the username or None. """
+        return self.lines.get(username)
+
+    def get_routes(self, domain):
+        """ Return the extension_number/Route mapping for the domain or
+        None. """
+        return self.extensions.get(domain)
+
+    def get_dids(self):
+        """ Return the DidIndex. """
+        return self.dids
+
+    def get_records(self):
+        """ Return snapshot file (key, value) records. """
+        records = [(('line', username), line)
+                   for username, line in self.lines.items()]
+        records.extend(
+            (('routes', domain), dict(routes))
+            for domain, routes in self.extensions.items()
+        )
+        records.append((('dids',), self.dids))
+        return records
+
+
+class MappedSnapshot(snapshot.MappedSnapshot):
+    """ A routing snapshot loaded from the routing snapshot file. """
+
+    def get_line(self, username):
+        """ Return the Line for the username or None. """
+        return self.get(('line', username))
+
+    def get_routes(self, domain):
+        """ Return the extension_number/Route mapping for the domain or
+        None. """
+        return self.get(('routes', domain))
+
+    def get_dids(self):
+        """ Return the DidIndex. """
+        return self.get(('dids',))
+
+
+class DidIndex:
+    """ DID number and DID block lookups keyed by E.164 number. """
+
+    def __init__(self, numbers, blocks):
+        """ Index number/Route and prefix/Route mapping dicts. """
+        self.numbers = MappingProxyType(numbers)
+        self.blocks = MappingProxyType(blocks)
+        self.prefix_lengths = tuple(sorted(
+            {len(prefix) for prefix in blocks}, reverse=True
+        ))
+
+    def __reduce__(self):
+        """ Pickle the mappings as dicts, unassigned Routes as None. """
+        return (DidIndex.load, (
+            {
+                number: None if route is unassigned else route
+                for number, route in self.numbers.items()
+            },
+            {prefix: dict(routes) for prefix, routes in self.blocks.items()}
+        ))
+
+    @classmethod
+    def load(cls, numbers, blocks):
+        """ Return an unpickled DidIndex. """
+        return cls(
+            {
+                number: unassigned if route is None else route
+                for number, route in numbers.items()
+            },
+            {
+                prefix: MappingProxyType(routes)
+                for prefix, routes in blocks.items()
+            }
+        )
+
+    def get(self, full_number):
+        """ Return the DID's Route, unassigned or None if not a DID. """
+        if not full_number:
+            return None
+        route = self.numbers.get(full_number)
+        if route is not None:
+            return route
+        for length in self.prefix_lengths:
+            routes = self.blocks.get(full_number[:length])
+            if routes is not None:
+                return routes.get(full_number[length:], unassigned)
+        return None
+
+
+_snapshot = Snapshot(
+    MappingProxyType({}), MappingProxyType({}), DidIndex({}, {})
+)
+
+_lock = threading.Lock()
+
+# Build id of the snapshot file that _snapshot matches, or None.
+_build_id = None
+
+_published = True
+
+
+def get_line(username):
+    """ Return the snapshot Line for the username or None. """
+    return _snapshot.get_line(username)
+
+
+def get_route(domain, extension_number):
+    """ Return the snapshot Route for the domain/number or None. """
+    routes = _snapshot.get_routes(domain)
+    if routes is None:
+        return None
+    return routes.get(extension_number)
+
+
+def get_did_route(full_number):
+    """ Return the snapshot Route for the E.164 DID number, unassigned if
+    the DID has no Extension or None if it's not a DID. """
+    return _snapshot.get_dids().get(full_number)
+
+
+def _get_actions():
+    """ Return a dict of Extension pk to Action subtype object, selected
+    in one query whatever the number of subtypes. """
+    # pylint: disable=import-outside-toplevel
+    from intercom.models import Action
+
+    actions = {}
+    queryset = Action.objects.select_related(
+        'extension__intercom__default_outbound_caller_id',
+        *intercom_settings['action_names']
+    )
+    for action in queryset:
+        subtype = action.get_subtype()
+        if subtype is not None:
+            actions[action.extension_id] = subtype
+    return actions
+
+
+def _get_lines():
+    """ Return a dict of username to preloaded Line object. """
+    # pylint: disable=import-outside-toplevel
+    from intercom.models import Line, OutboundExtension
+
+    queryset = Line.objects.select_related(
+        'extension',
+        'intercom__default_outbound_caller_id',
+        'outbound_caller_id',
+    ).prefetch_related(
+        Prefetch(
+            'outbound_extensions',
+            queryset=OutboundExtension.objects.select_related(
+                'gateway'
+            ).order_by('pk'),
+        )
+    )
+    return {line.username: line for line in queryset}
+
+
+def _get_dids(extensions):
+    """ Return a DidIndex of the domain/number/Route extensions dict. """
+    # pylint: disable=import-outside-toplevel
+    from intercom.models import DidBlock, DidExtension, get_e164
+
+    numbers = {}
+    queryset = DidExtension.objects.select_related('extension__intercom')
+    for did_extension in queryset:
+        full_number = get_e164(did_extension.did_number)
+        route = unassigned
+        if did_extension.extension:
+            extension = did_extension.extension
+            route = extensions[extension.intercom.domain][
+                extension.extension_number
+            ]
+        numbers[full_number or did_extension.did_number] = route
+    blocks = {}
+    for block in DidBlock.objects.select_related('intercom'):
+        blocks[block.did_prefix] = extensions.get(
+            block.intercom.domain, MappingProxyType({})
+        )
+    return DidIndex(numbers, blocks)
+
+
+def build():
+    """ Return a new routing Snapshot. """
+    # pylint: disable=import-outside-toplevel
+    from intercom.models import Extension
+
+    actions = _get_actions()
+    extensions = {}
+    queryset = Extension.objects.select_related(
+        'intercom__default_outbound_caller_id'
+    )
+    for extension in queryset:
+        action = actions.get(extension.pk)
+        if action:
+            route = Route(action.extension, action, action.template)
+        else:
+            route = Route(extension, None, None)
+        routes = extensions.setdefault(extension.intercom.domain, {})
+        routes[extension.extension_number] = route
+    extensions = MappingProxyType({
+        domain: MappingProxyType(routes)
+        for domain, routes in extensions.items()
+    })
+    return Snapshot(
+        MappingProxyType(_get_lines()),
+        extensions,
+        _get_dids(extensions)
+    )
+
+
+def rebuild():
+    """ Build a new Snapshot and swap it in. """
+    global _snapshot, _published  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    new_snapshot = build()
+    with _lock:
+        _snapshot = new_snapshot
+        _published = False
+    logging.getLogger('django.server').info(
+        'routing %s lines %s intercoms %s dids %s did blocks',
+        len(new_snapshot.lines), len(new_snapshot.extensions),
+        len(new_snapshot.dids.numbers), len(new_snapshot.dids.blocks)
+    )
+
+
+def get_build_id():
+    """ Return the build id of the snapshot file that the snapshot
+    matches, or None. """
+    return _build_id
+
+
+def publish():
+    """ Write the rebuilt snapshot to the snapshot file, if it hasn't
+    been written. Return the file's build id. """
+    global _build_id, _published  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    with _lock:
+        if _published:
+            return _build_id
+        _build_id = snapshot.write(
+            settings.ROUTING_SNAPSHOT_FILE, _snapshot.get_records()
+        )
+        _published = True
+    logging.getLogger('django.server').info('routing published')
+    return _build_id
+
+
+def load(expected=None):
+    """ Map the snapshot file and swap it in if another process has
+    published it, and if it has the expected build id when one is given.
+    Return True if it was swapped in. """
+    global _snapshot, _build_id, _published  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    path = settings.ROUTING_SNAPSHOT_FILE
+    build_id = snapshot.read_build_id(path)
+    if build_id is None or build_id == _build_id:
+        return False
+    if expected is not None and build_id != expected:
+        return False
+    mapped = MappedSnapshot(path)
+    with _lock:
+        _snapshot = mapped
+        _build_id = mapped.build_id
+        _published = True
+    logging.getLogger('django.server').info(
+        'routing loaded %s records', len(mapped.index)
+    )
+    return True
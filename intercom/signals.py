@@ -0,0 +1,188 @@
+""" Intercom app signal receivers module. """
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from common.transactions import on_commit_once
+from intercom import dialstrings, matchers, routing
+from intercom.directory import directory_cache
+from intercom.models import (
+    Action, DidBlock, DidExtension, Extension, Intercom, Line,
+    OutboundCallerId, OutboundExtension, OutsideLine
+)
+from sofia import health
+from sofia.models import Gateway
+
+
+def rebuild():
+    """ Rebuild and publish the routing snapshot, then drop matchers,
+    dialstring plans and directory documents built from the old one. """
+    routing.rebuild()
+    routing.publish()
+    matchers.invalidate()
+    dialstrings.invalidate()
+    directory_cache.clear()
+
+
+def rebuild_routing(sender, **kwargs):
+    """ Rebuild the routing snapshot once when routing model changes
+    commit. """
+    # pylint: disable=unused-argument
+    on_commit_once(rebuild)
+
+
+def rebuild_routing_m2m(sender, action, **kwargs):
+    """ Rebuild the routing snapshot once when routing m2m changes
+    commit. """
+    # pylint: disable=unused-argument
+    if action.startswith('post_'):
+        on_commit_once(rebuild)
+
+
+def invalidate_matchers(sender, **kwargs):
+    """ Drop compiled matchers on OutboundExtension changes. """
+    # pylint: disable=unused-argument
+    if kwargs.get('action', 'post_').startswith('post_'):
+        matchers.invalidate()
+
+
+def reload_handlers(sender, **kwargs):
+    """ Rebuild gateways and handler registries on Intercom/Gateway
+    changes. """
+    # pylint: disable=unused-argument
+    apps.get_app_config('intercom').config_handlers()
+
+
+def invalidate_dialstrings(sender, **kwargs):
+    """ Drop dialstring plans on Bridge membership and member, Gateway,
+    gateway health and caller ID changes. """
+    # pylint: disable=unused-argument
+    if kwargs.get('action', 'post_').startswith('post_'):
+        dialstrings.invalidate()
+
+
+def get_dialstring_senders():
+    """ Return the models that dialstring plans depend on, other than the
+    bridges m2m through models. """
+    senders = [
+        Extension, Intercom, Line, OutsideLine, Gateway, OutboundCallerId
+    ]
+    senders.extend(Action.__subclasses__())
+    return senders
+
+
+def clear_directory_cache(sender, **kwargs):
+    """ Drop cached directory documents on Line/Intercom changes. """
+    # pylint: disable=unused-argument
+    directory_cache.clear()
+
+
+def get_routing_senders():
+    """ Return the models that the routing snapshot depends on. """
+    senders = [
+        DidBlock,
+        DidExtension,
+        Extension,
+        Intercom,
+        Line,
+        OutboundCallerId,
+        OutboundExtension,
+        Gateway,
+        Action,
+    ]
+    senders.extend(Action.__subclasses__())
+    return senders
+
+
+def get_senders():
+    """ Return the models that routing, matchers, handler registries,
+    dialstring plans and the directory cache depend on. """
+    return get_routing_senders() + [
+        Line.outbound_extensions.through,
+        Line.bridges.through,
+        OutsideLine,
+        OutsideLine.bridges.through,
+    ]
+
+
+def connect():
+    """ Connect routing receivers to model signals. """
+    for sender in get_routing_senders():
+        post_save.connect(
+            rebuild_routing,
+            sender=sender,
+            dispatch_uid='routing-save-%s' % sender._meta.label_lower,
+        )
+        post_delete.connect(
+            rebuild_routing,
+            sender=sender,
+            dispatch_uid='routing-delete-%s' % sender._meta.label_lower,
+        )
+    m2m_changed.connect(
+        rebuild_routing_m2m,
+        sender=Line.outbound_extensions.through,
+        dispatch_uid='routing-m2m-outbound-extensions',
+    )
+
+    # Matchers.
+    post_save.connect(
+        invalidate_matchers,
+        sender=OutboundExtension,
+        dispatch_uid='matchers-save-outboundextension',
+    )
+    post_delete.connect(
+        invalidate_matchers,
+        sender=OutboundExtension,
+        dispatch_uid='matchers-delete-outboundextension',
+    )
+    m2m_changed.connect(
+        invalidate_matchers,
+        sender=Line.outbound_extensions.through,
+        dispatch_uid='matchers-m2m-outbound-extensions',
+    )
+
+    # Gateways and handler registries.
+    for sender in (Intercom, Gateway):
+        post_save.connect(
+            reload_handlers,
+            sender=sender,
+            dispatch_uid='handlers-save-%s' % sender._meta.label_lower,
+        )
+        post_delete.connect(
+            reload_handlers,
+            sender=sender,
+            dispatch_uid='handlers-delete-%s' % sender._meta.label_lower,
+        )
+
+    # Dialstring plans.
+    for sender in get_dialstring_senders():
+        post_save.connect(
+            invalidate_dialstrings,
+            sender=sender,
+            dispatch_uid='dialstrings-save-%s' % sender._meta.label_lower,
+        )
+        post_delete.connect(
+            invalidate_dialstrings,
+            sender=sender,
+            dispatch_uid='dialstrings-delete-%s' % sender._meta.label_lower,
+        )
+    for sender in (Line.bridges.through, OutsideLine.bridges.through):
+        m2m_changed.connect(
+            invalidate_dialstrings,
+            sender=sender,
+            dispatch_uid='dialstrings-m2m-%s' % sender._meta.label_lower,
+        )
+    health.ratings_changed.connect(
+        invalidate_dialstrings, dispatch_uid='dialstrings-gateway-health'
+    )
+
+    # Directory cache.
+    for sender in (Intercom, Line):
+        post_save.connect(
+            clear_directory_cache,
+            sender=sender,
+            dispatch_uid='directory-save-%s' % sender._meta.label_lower,
+        )
+        post_delete.connect(
+            clear_directory_cache,
+            sender=sender,
+            dispatch_uid='directory-delete-%s' % sender._meta.label_lower,
+        )
@@ -0,0 +1,88 @@
+""" Intercom app routing snapshot file module.
+
+A snapshot file holds a header, a pickled index of record keys to
+offset/length pairs, relative to the end of the index, and a pickled
+record per Line, per Intercom's routes and for the DID index. Workers
+map the file read-only, so its pages are shared through the page cache,
+and decode records on first lookup. """
+import mmap
+import os
+import pickle
+import struct
+import uuid
+
+
+MAGIC = b'PBXRSNP1'
+
+HEADER = struct.Struct('<8s16sQ')
+
+_missing = object()
+
+
+def write(path, records):
+    """ Write the (key, value) records to a new snapshot file and swap it
+    in. Return the file's build id. """
+    build_id = uuid.uuid4().bytes
+    encoded = []
+    index = {}
+    offset = 0
+    for key, value in records:
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        index[key] = (offset, len(data))
+        encoded.append(data)
+        offset += len(data)
+    index_data = pickle.dumps(index, pickle.HIGHEST_PROTOCOL)
+    temp_path = '%s.%s' % (path, os.getpid())
+    with open(temp_path, 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, build_id, len(index_data)))
+        snapshot_file.write(index_data)
+        for data in encoded:
+            snapshot_file.write(data)
+    os.replace(temp_path, path)
+    return build_id
+
+
+def read_build_id(path):
+    """ Return the snapshot file's build id or None. """
+    try:
+        with open(path, 'rb') as snapshot_file:
+            magic, build_id, _ = HEADER.unpack(
+                snapshot_file.read(HEADER.size)
+            )
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC:
+        return None
+    return build_id
+
+
+class MappedSnapshot:
+    """ Lazily decoded records of a mapped snapshot file. """
+
+    def __init__(self, path):
+        """ Map the file and decode its index. """
+        with open(path, 'rb') as snapshot_file:
+            self.map = mmap.mmap(
+                snapshot_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        magic, self.build_id, index_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError('Not a routing snapshot: %s' % path)
+        self.base = HEADER.size + index_size
+        self.index = pickle.loads(self.map[HEADER.size:self.base])
+        self.decoded = {}
+
+    def get(self, key):
+        """ Return the decoded record or None. """
+        value = self.decoded.get(key, _missing)
+        if value is _missing:
+            location = self.index.get(key)
+            if location is None:
+                return None
+            offset, size = location
+            offset += self.base
+            with memoryview(self.map) as view:
+                with view[offset:offset + size] as record:
+                    value = pickle.loads(record)
+            self.decoded[key] = value
+        return value
@@ -0,0 +1,277 @@
+""" Intercom app synthetic PBX module.
+
+The create_pbx function fills an empty database with a PBX of the given
+size, and get_scenarios returns mod_xml_curl-shaped POST data for
+requests that the PBX's fsapi handlers answer. """
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from fsapi.bench import muted
+from intercom.models import (
+    Bridge, DidExtension, Extension, Intercom, Line, OutboundCallerId,
+    OutboundExtension, OutsideLine
+)
+from sofia.models import Gateway
+
+
+SIZES = {
+    'intercoms': 2,
+    'lines': 50,
+    'extensions': 20,
+    'members': 5,
+    'outside_lines': 2,
+    'dids': 10,
+    'outbound_extensions': 3,
+    'gateways': 2,
+}
+
+# Most queries per scenario request.
+BUDGETS = {
+    'directory': 0,
+    'dialplan-extension': 2,
+    'dialplan-outbound': 0,
+    'dialplan-did': 2,
+    'dialplan-inbound': 2,
+    'configuration': 0,
+}
+
+INTERCOM_PORT = 6000
+
+GATEWAY_PORT = 7000
+
+
+def get_did_number(intercom_index, did_index):
+    """ Return a synthetic E.164 DID number. """
+    return '+1555%03d%04d' % (intercom_index, did_index)
+
+
+def create_pbx(**sizes):
+    """ Create a PBX and return a dict that describes it. Sizes are per
+    Intercom, and bridges have members Lines and outside_lines OutsideLines
+    each, every other one through a Gateway. Receivers are muted, so reload
+    afterwards. """
+    sizes = dict(SIZES, **sizes)
+    pbx = {'intercoms': [], 'gateways': []}
+    with muted(post_save, post_delete, m2m_changed), transaction.atomic():
+        gateways = []
+        for index in range(sizes['gateways']):
+            gateway = Gateway.objects.create(
+                domain='gateway%s' % index, port=GATEWAY_PORT + index,
+                username='1555999%04d' % index, password='gwpass',
+                proxy='sip.example.com', realm='sip.example.com',
+                priority=index
+            )
+            gateways.append(gateway)
+            pbx['gateways'].append({
+                'domain': gateway.domain,
+                'username': gateway.username,
+            })
+        OutboundExtension.objects.bulk_create(
+            OutboundExtension(
+                name='outbound%s' % index,
+                expression=r'\+%s\d{10}' % (index + 1),
+                gateway=gateways[index % len(gateways)] if gateways else None
+            ) for index in range(sizes['outbound_extensions'])
+        )
+        outbound_extensions = list(OutboundExtension.objects.order_by('pk'))
+        cid = OutboundCallerId.objects.create(
+            name='PBX', phone_number='+15555550100'
+        )
+        for index in range(sizes['intercoms']):
+            pbx['intercoms'].append(create_intercom(
+                index, sizes, cid, outbound_extensions, gateways
+            ))
+    return pbx
+
+
+def create_intercom(index, sizes, cid, outbound_extensions, gateways):
+    """ Create an Intercom and return a dict that describes it. """
+    intercom = Intercom.objects.create(
+        domain='intercom%s' % index, port=INTERCOM_PORT + index,
+        default_outbound_caller_id=cid
+    )
+    Extension.objects.bulk_create(
+        Extension(
+            extension_number=str(100 + number), intercom=intercom
+        ) for number in range(sizes['extensions'])
+    )
+    extensions = list(intercom.extension_set.order_by('pk'))
+    bridges = []
+    for extension in extensions:
+        bridge = Bridge(name='bridge%s' % extension.extension_number,
+                        extension=extension)
+        bridge.save()
+        bridges.append(bridge)
+    Line.objects.bulk_create(
+        Line(
+            name='line%s' % number,
+            username='%s-user%s' % (intercom.domain, number),
+            password='pass%s' % number,
+            intercom=intercom,
+        ) for number in range(sizes['lines'])
+    )
+    lines = list(intercom.line_set.order_by('pk'))
+    Line.bridges.through.objects.bulk_create(
+        Line.bridges.through(
+            line_id=lines[(bridge_index + member) % len(lines)].pk,
+            bridge_id=bridge.pk
+        )
+        for bridge_index, bridge in enumerate(bridges)
+        for member in range(min(sizes['members'], len(lines)))
+    )
+    OutsideLine.objects.bulk_create(
+        OutsideLine(
+            note='outside%s' % number,
+            phone_number='+1777%03d%04d' % (index, number),
+            gateway=gateways[number % len(gateways)]
+            if gateways and number % 2 else None
+        ) for number in range(len(bridges) * sizes['outside_lines'])
+    )
+    outside_lines = list(OutsideLine.objects.filter(
+        phone_number__startswith='+1777%03d' % index
+    ).order_by('pk'))
+    OutsideLine.bridges.through.objects.bulk_create(
+        OutsideLine.bridges.through(
+            outsideline_id=outside_line.pk,
+            bridge_id=bridges[number // sizes['outside_lines']].pk
+        )
+        for number, outside_line in enumerate(outside_lines)
+    )
+    Line.outbound_extensions.through.objects.bulk_create(
+        Line.outbound_extensions.through(
+            line_id=line.pk, outboundextension_id=outbound_ext.pk
+        )
+        for line in lines for outbound_ext in outbound_extensions
+    )
+    DidExtension.objects.bulk_create(
+        DidExtension(
+            did_number=get_did_number(index, number),
+            extension=extensions[number % len(extensions)]
+        ) for number in range(sizes['dids'])
+    )
+    return {
+        'domain': intercom.domain,
+        'usernames': [line.username for line in lines],
+        'extension_numbers': [ext.extension_number for ext in extensions],
+        'did_numbers': [
+            get_did_number(index, number) for number in range(sizes['dids'])
+        ],
+    }
+
+
+def get_request_data(section, **data):
+    """ Return POST data with the fields that mod_xml_curl sends with
+    every request. """
+    request_data = {
+        'hostname': settings.PBX_HOSTNAME,
+        'section': section,
+        'Core-UUID': '4e9a7bbc-55f3-4a06-9bbd-ae4a2d7d5c3e',
+        'FreeSWITCH-Hostname': settings.PBX_HOSTNAME,
+        'FreeSWITCH-Switchname': settings.PBX_HOSTNAME,
+        'FreeSWITCH-IPv4': '127.0.0.1',
+        'FreeSWITCH-IPv6': '::1',
+        'Event-Date-Local': '2021-09-01 12:00:00',
+        'Event-Date-GMT': 'Wed, 01 Sep 2021 12:00:00 GMT',
+        'Event-Calling-File': 'mod_xml_curl.c',
+    }
+    request_data.update(data)
+    return request_data
+
+
+def get_channel_data(context, dest_number, **data):
+    """ Return dialplan POST data for a channel. """
+    return get_request_data(
+        'dialplan',
+        **{
+            'Event-Name': 'CHANNEL_DATA',
+            'Hunt-Context': context,
+            'Caller-Context': context,
+            'Caller-Destination-Number': dest_number,
+            'Caller-Direction': 'inbound',
+            'Caller-Unique-ID': str(uuid.uuid4()),
+            'Channel-State': 'CS_ROUTING',
+            'Answer-State': 'ringing',
+            'Call-Direction': 'inbound',
+            **data,
+        }
+    )
+
+
+def get_scenarios(pbx):
+    """ Return a dict of scenario name to POST data list. """
+    scenarios = {
+        'directory': [],
+        'dialplan-extension': [],
+        'dialplan-outbound': [],
+        'dialplan-did': [],
+        'dialplan-inbound': [],
+        'configuration': [get_request_data(
+            'configuration', **{
+                'Event-Name': 'REQUEST_PARAMS',
+                'tag_name': 'configuration',
+                'key_name': 'name',
+                'key_value': 'sofia.conf',
+            }
+        )],
+    }
+    dids = [
+        number for intercom in pbx['intercoms']
+        for number in intercom['did_numbers']
+    ]
+    for intercom in pbx['intercoms']:
+        domain = intercom['domain']
+        for index, username in enumerate(intercom['usernames']):
+            scenarios['directory'].append(get_request_data(
+                'directory', **{
+                    'Event-Name': 'REQUEST_PARAMS',
+                    'tag_name': 'domain',
+                    'key_name': 'name',
+                    'key_value': domain,
+                    'action': 'sip_auth',
+                    'sip_profile': domain,
+                    'sip_auth_method': 'REGISTER',
+                    'user': username,
+                    'domain': domain,
+                }
+            ))
+            caller = {
+                'Caller-Username': username,
+                'Caller-Caller-ID-Name': username,
+                'variable_user_name': username,
+                'variable_domain_name': domain,
+            }
+            numbers = intercom['extension_numbers']
+            if numbers:
+                scenarios['dialplan-extension'].append(get_channel_data(
+                    domain, numbers[index % len(numbers)], **caller
+                ))
+            if pbx['gateways']:
+                scenarios['dialplan-outbound'].append(get_channel_data(
+                    domain, '+1666%07d' % index, **caller
+                ))
+            if dids:
+                scenarios['dialplan-did'].append(get_channel_data(
+                    domain, dids[index % len(dids)], **caller
+                ))
+        scenarios['configuration'].append(get_request_data(
+            'configuration', **{
+                'Event-Name': 'REQUEST_PARAMS',
+                'tag_name': 'configuration',
+                'key_name': 'name',
+                'key_value': 'sofia.conf',
+                'profile': domain,
+            }
+        ))
+    gateways = pbx['gateways']
+    for index, number in enumerate(dids if gateways else ()):
+        gateway = gateways[index % len(gateways)]
+        scenarios['dialplan-inbound'].append(get_channel_data(
+            gateway['domain'], gateway['username'], **{
+                'Caller-Caller-ID-Name': 'Caller',
+                'Caller-Caller-ID-Number': '+15555550199',
+                'variable_sip_gateway': gateway['domain'],
+                'variable_sip_to_user': number,
+            }
+        ))
+    return {name: bodies for name, bodies in scenarios.items() if bodies}
@@ -1,9 +1,8 @@
 """ Intercom app template tags module. """
-from django.conf import settings
 from django import template
-from intercom.apps import intercom_settings
+from django.http import Http404
+from intercom.dialstrings import get_plan, get_prefix
 from intercom.models import Line
-from intercom.templatetags.outbound_extras import outbound_dialstring
 
 
 register = template.Library()
@@ -11,54 +10,39 @@ register = template.Library()
 
 @register.simple_tag
 def get_dialstring(caller, extension, action):
-    """ Return the dialstring for the bridge template. """
+    """ Return the dialstring for the bridge template from the Bridge's
+    cached dialstring plan. """
+    # pylint: disable=unused-argument
+    plan = get_plan(action)
 
     # Local/outbound caller ID
-    local_cid = {}
-    outbound_cid = {}
     if isinstance(caller, Line):
-        local_cid['name'] = caller.name
-        local_cid['number'] = caller.username
+        number = caller.username
         if caller.extension:
-            local_cid['number'] = caller.extension.extension_number
-        intercom_cid = extension.intercom.default_outbound_caller_id
-        if intercom_cid:
-            outbound_cid['name'] = intercom_cid.name
-            outbound_cid['number'] = intercom_cid.phone_number
-        else:
-            outbound_cid = local_cid
+            number = caller.extension.extension_number
+        local_prefix = get_prefix(caller.name, number)
+        outbound_prefix = plan.outbound_prefix or local_prefix
+        caller_pk = caller.pk
+        caller_number = None
     else:
         # For inbound calls, the dialplan sends name/number dict.
-        local_cid = caller
-        outbound_cid = caller
-
-    # Generate dialstring.
-    dialstrings = []
+        local_prefix = get_prefix(caller['name'], caller['number'])
+        outbound_prefix = local_prefix
+        caller_pk = None
+        caller_number = caller['number']
 
     # Call other Lines.
-    tpl = '[%s,%s]${sofia_contact(%s@%s)}'
-    for line in action.line_set.all():
-        if line == caller:
-            continue
-        dialstrings.append(tpl % (
-            'origination_caller_id_name=%s' % local_cid['name'],
-            'origination_caller_id_number=%s' % local_cid['number'],
-            line.username,
-            settings.PBX_HOSTNAME
-        ))
+    dialstrings = [
+        local_prefix + part for pk, part in plan.lines if pk != caller_pk
+    ]
 
     # Call other OutsideLines.
-    for outside_line in action.outsideline_set.all():
-        if isinstance(caller, dict):
-            if caller['number'] == outside_line.phone_number:
-                continue
-        if outside_line.gateway:
-            gateways = (outside_line.gateway,)
-        else:
-            gateways = intercom_settings['gateways']
-        dialstrings.append(outbound_dialstring(
-            outside_line.phone_number, gateways, outbound_cid
-        ))
+    for phone_number, parts in plan.outside_lines:
+        if phone_number == caller_number:
+            continue
+        if parts is None:
+            raise Http404
+        dialstrings.append('|'.join(outbound_prefix + part for part in parts))
 
     # Return the complete dialstring.
     return ':_:'.join(dialstrings)
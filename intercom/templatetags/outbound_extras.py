@@ -1,8 +1,8 @@
 """ Intercom app template tags module. """
 from django import template
 from django.http import Http404
-from intercom.apps import intercom_settings
 from intercom.models import get_e164
+from sofia.gateways import get_chain
 
 
 register = template.Library()
@@ -36,7 +36,7 @@ def get_dialstring(caller, dest_number, gateway):
     if gateway:
         gateways = (gateway,)
     else:
-        gateways = intercom_settings['gateways']
+        gateways = get_chain()
 
     cid_obj = None
     if caller.outbound_caller_id:
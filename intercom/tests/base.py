@@ -0,0 +1,83 @@
+""" Test case base module. """
+import logging
+import os
+import tempfile
+from unittest import mock
+from django.test import RequestFactory, TestCase, override_settings
+from intercom.models import (
+    Bridge, DidExtension, Extension, Intercom, Line, OutboundCallerId,
+    OutboundExtension, OutsideLine
+)
+from sofia.models import Gateway
+
+
+class BaseTestCase(TestCase):
+    """ Parent class with a small PBX. """
+
+    def setUp(self):
+        """ Log everything to the console, keep snapshot files out of var,
+        don't sync the firewall and create the PBX, running its commit
+        hooks. """
+        logging.disable(logging.NOTSET)
+        logger = logging.getLogger(__name__)
+        logger.setLevel(logging.DEBUG)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            GENERATION_FILE=os.path.join(directory.name, 'generation'),
+            ROUTING_SNAPSHOT_FILE=os.path.join(directory.name, 'routing'),
+            WARM_SNAPSHOT_FILE=os.path.join(directory.name, 'warm'),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        start_sync = mock.patch('common.firewall.start_sync')
+        start_sync.start()
+        self.addCleanup(start_sync.stop)
+        self.factory = RequestFactory()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cid = OutboundCallerId.objects.create(
+                name='PBX', phone_number='+15555550100'
+            )
+            self.gateway = Gateway.objects.create(
+                domain='gateway', port=5071, username='gwuser',
+                password='gwpass', proxy='sip.example.com',
+                realm='sip.example.com', priority=1
+            )
+            self.intercom = Intercom.objects.create(
+                domain='intercom', port=5061,
+                default_outbound_caller_id=self.cid
+            )
+            self.extension = Extension.objects.create(
+                extension_number='100', intercom=self.intercom
+            )
+            self.bridge = Bridge.objects.create(
+                name='front', extension=self.extension
+            )
+            self.outbound = OutboundExtension.objects.create(
+                name='us', expression=r'\+1\d{10}'
+            )
+            self.lines = []
+            for index in range(3):
+                line = Line.objects.create(
+                    name='line%s' % index, username='user%s' % index,
+                    password='pass%s' % index, intercom=self.intercom
+                )
+                line.bridges.add(self.bridge)
+                line.outbound_extensions.add(self.outbound)
+                self.lines.append(line)
+            self.outside_line = OutsideLine.objects.create(
+                note='cell', phone_number='+15555550199'
+            )
+            self.outside_line.bridges.add(self.bridge)
+            self.did = DidExtension.objects.create(
+                did_number='+15555550150', extension=self.extension
+            )
+
+    def post(self, **data):
+        """ Return a POST request with the data. """
+        return self.factory.post('/fsapi', data)
+
+    @staticmethod
+    def _log(data):
+        """ Log data to the django.server info logger. """
+        logging.getLogger('django.server').info(data)
@@ -0,0 +1,60 @@
+""" Extension Action resolution test module. """
+from django.contrib import admin
+from intercom.models import Action, Bridge, Extension
+from intercom.tests.base import BaseTestCase
+
+
+class ActionTestCase(BaseTestCase):
+    """ Verify Extension.get_action queries. """
+
+    def setUp(self):
+        """ Add Extensions with and without Bridges. """
+        super().setUp()
+        for number in range(200, 210):
+            extension = Extension.objects.create(
+                extension_number=str(number), intercom=self.intercom
+            )
+            if number % 2:
+                Bridge.objects.create(name=str(number), extension=extension)
+
+    def test_action_type(self):
+        """ Assert Actions record their subtype. """
+        self.assertEqual(self.bridge.action_type, 'bridge')
+        action = Action.objects.get(pk=self.bridge.pk)
+        self.assertEqual(action.action_type, 'bridge')
+        self.assertEqual(action.get_subtype(), self.bridge)
+
+    def test_get_action(self):
+        """ Assert get_action takes one query, then none. """
+        extension = Extension.objects.get(pk=self.extension.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(extension.get_action(), self.bridge)
+        with self.assertNumQueries(0):
+            self.assertIsInstance(extension.get_action(), Bridge)
+        extension = Extension.objects.get(extension_number='200')
+        with self.assertNumQueries(1):
+            self.assertIsNone(extension.get_action())
+            self.assertIsNone(extension.get_action())
+
+    def test_selected(self):
+        """ Assert Extensions selected with the action lookups resolve
+        Actions without queries. """
+        queryset = Extension.objects.select_related(
+            *Extension.get_action_lookups()
+        )
+        with self.assertNumQueries(1):
+            actions = [ext.get_action() for ext in queryset]
+        self.assertEqual(len(actions), 11)
+        self.assertEqual(sum(isinstance(a, Bridge) for a in actions), 6)
+
+    def test_admin(self):
+        """ Assert the admin changelist resolves Actions in its query. """
+        model_admin = admin.site._registry[Extension]
+        request = self.factory.get('/admin/intercom/extension/')
+        with self.assertNumQueries(1):
+            reprs = [
+                model_admin.action_repr(extension)
+                for extension in model_admin.get_queryset(request)
+            ]
+        self.assertIn('Bridge front', reprs)
+        self.assertIn(None, reprs)
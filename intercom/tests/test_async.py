@@ -0,0 +1,49 @@
+""" Async handler test module. """
+from unittest import mock
+from intercom.dialplan import InboundCallHandler, LineCallHandler
+from intercom.directory import LineAuthHandler, directory_cache
+from intercom.tests.base import BaseTestCase
+
+
+class AsyncHandlerTestCase(BaseTestCase):
+    """ Verify async handler variants. """
+
+    async def test_directory(self):
+        """ Assert cached Line auth documents are served from the event
+        loop, and misses are built in a worker thread. """
+        directory_cache.clear()
+        request = self.post(user='user1')
+        handler = LineAuthHandler()
+        with mock.patch.object(
+                handler, 'run_sync', wraps=handler.run_sync) as run_sync:
+            document = await handler.aget_directory(request, 'intercom')
+            self.assertIn(b'value="pass1"', document)
+            self.assertEqual(run_sync.call_count, 1)
+            self.assertEqual(
+                await handler.aget_directory(request, 'intercom'), document
+            )
+            self.assertEqual(run_sync.call_count, 1)
+
+    async def test_line_call(self):
+        """ Assert Line calls render the Bridge. """
+        request = self.post(**{
+            'Caller-Destination-Number': '100',
+            'variable_user_name': 'user0',
+        })
+        document = await LineCallHandler().aget_dialplan(request, 'intercom')
+        self.assertIn(b'user2@', document)
+
+    async def test_inbound_call(self):
+        """ Assert inbound calls look up the Gateway in the registry and
+        render the Bridge. """
+        request = self.post(**{
+            'Caller-Destination-Number': 'gwuser',
+            'variable_sip_gateway': 'gateway',
+            'Caller-Caller-ID-Name': 'Caller',
+            'Caller-Caller-ID-Number': '+15555550177',
+            'variable_sip_to_user': '+15555550150',
+        })
+        document = await InboundCallHandler().aget_dialplan(
+            request, 'gateway'
+        )
+        self.assertIn(b'user0@', document)
@@ -0,0 +1,117 @@
+""" Bridge dialstring test module. """
+from unittest import mock
+from intercom import dialstrings, routing
+from intercom.dialplan import InboundCallHandler, LineCallHandler
+from intercom.models import Line, OutboundCallerId, OutsideLine
+from intercom.tests.base import BaseTestCase
+from sofia import health
+from sofia.models import Gateway
+
+
+class BridgeTestCase(BaseTestCase):
+    """ Verify bridge dialstring plans. """
+
+    def get_dialplan(self):
+        """ Return user0's bridge document. """
+        request = self.post(**{
+            'Caller-Destination-Number': '100',
+            'variable_user_name': 'user0',
+        })
+        return LineCallHandler().get_dialplan(request, 'intercom')
+
+    def test_constant_queries(self):
+        """ Assert bridge documents take two queries whatever the
+        membership, and none with a cached plan. """
+        with self.assertNumQueries(2):
+            self.get_dialplan()
+        with self.assertNumQueries(0):
+            self.get_dialplan()
+        for index in range(10):
+            line = Line.objects.create(
+                name='more%s' % index, username='more%s' % index,
+                password='pass', intercom=self.intercom
+            )
+            line.bridges.add(self.bridge)
+            outside_line = OutsideLine.objects.create(
+                note='more', phone_number='+1555555%04d' % index,
+                gateway=self.gateway if index % 2 else None
+            )
+            outside_line.bridges.add(self.bridge)
+        with self.assertNumQueries(2):
+            document = self.get_dialplan()
+        self.assertIn(b'more9@', document)
+        self.assertIn(b'sofia/gateway/gateway/+15555550009', document)
+
+    def test_snapshot_unchanged(self):
+        """ Assert plans don't cache members on snapshot Actions. """
+        self.get_dialplan()
+        action = routing.get_route('intercom', '100').action
+        self.assertFalse(hasattr(action, '_prefetched_objects_cache'))
+
+    def test_invalidation(self):
+        """ Assert membership and caller ID changes drop plans. """
+        self.assertIn(b'user1@', self.get_dialplan())
+        self.lines[1].bridges.remove(self.bridge)
+        self.assertNotIn(b'user1@', self.get_dialplan())
+        self.outside_line.bridges.clear()
+        self.assertNotIn(b'+15555550199', self.get_dialplan())
+        self.outside_line.bridges.add(self.bridge)
+        OutboundCallerId.objects.filter(pk=self.cid.pk).update(name='Old')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cid.name = 'New'
+            self.cid.save()
+        self.assertIn(b'origination_caller_id_name=New', self.get_dialplan())
+
+    def test_invalidated_during_build(self):
+        """ Assert plans built across an invalidation aren't cached. """
+        build = dialstrings.build
+
+        def build_and_remove(action):
+            """ Build, then remove a member. """
+            plan = build(action)
+            self.lines[1].bridges.remove(self.bridge)
+            return plan
+
+        dialstrings.invalidate()
+        with mock.patch.object(dialstrings, 'build', build_and_remove):
+            self.assertIn(b'user1@', self.get_dialplan())
+        self.assertNotIn(b'user1@', self.get_dialplan())
+
+    def test_gateway_health(self):
+        """ Assert gateway health changes reorder cached plans. """
+        self.addCleanup(health.reset)
+        Gateway.objects.create(
+            domain='backup', port=5072, username='backupuser',
+            password='gwpass', proxy='sip.example.com',
+            realm='sip.example.com', priority=2
+        )
+        document = self.get_dialplan()
+        self.assertLess(
+            document.index(b'sofia/gateway/gateway/'),
+            document.index(b'sofia/gateway/backup/')
+        )
+        health.call_setup('gateway', 5.0)
+        document = self.get_dialplan()
+        self.assertLess(
+            document.index(b'sofia/gateway/backup/'),
+            document.index(b'sofia/gateway/gateway/')
+        )
+        health.gateway_state('gateway', 'FAIL_WAIT')
+        document = self.get_dialplan()
+        self.assertNotIn(b'sofia/gateway/gateway/', document)
+        self.assertIn(b'sofia/gateway/backup/+15555550199', document)
+
+    def test_inbound(self):
+        """ Assert inbound callers get their own caller ID and aren't
+        called back. """
+        request = self.post(**{
+            'Caller-Destination-Number': 'gwuser',
+            'Caller-Caller-ID-Name': 'Cell',
+            'Caller-Caller-ID-Number': '+15555550199',
+            'variable_sip_gateway': 'gateway',
+            'variable_sip_to_user': '+15555550150',
+        })
+        document = InboundCallHandler().get_dialplan(request, 'gateway')
+        self.assertIn(b'origination_caller_id_name=Cell', document)
+        self.assertIn(b'user0@', document)
+        self.assertNotIn(b'sofia/gateway', document)
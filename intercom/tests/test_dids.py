@@ -0,0 +1,83 @@
+""" DID index test module. """
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from intercom import routing
+from intercom.dialplan import InboundCallHandler, LineCallHandler
+from intercom.models import Bridge, DidBlock, DidExtension, Extension
+from intercom.tests.base import BaseTestCase
+
+
+class DidIndexTestCase(BaseTestCase):
+    """ Verify DID number and DID block routing. """
+
+    def setUp(self):
+        """ Add a DID block. """
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.block_extension = Extension.objects.create(
+                extension_number='4100', intercom=self.intercom
+            )
+            Bridge.objects.create(
+                name='block', extension=self.block_extension
+            )
+            DidBlock.objects.create(
+                did_prefix='+1555123', intercom=self.intercom
+            )
+
+    def test_lookups(self):
+        """ Assert DID lookups make no queries. """
+        with self.assertNumQueries(0):
+            route = routing.get_did_route('+15555550150')
+            self.assertEqual(route.extension, self.extension)
+            route = routing.get_did_route('+15551234100')
+            self.assertEqual(route.extension, self.block_extension)
+            route = routing.get_did_route('+15551234101')
+            self.assertIs(route, routing.unassigned)
+            self.assertIsNone(routing.get_did_route('+15555550151'))
+            self.assertIsNone(routing.get_did_route(None))
+
+    def test_normalized(self):
+        """ Assert DID numbers are indexed by E.164 number. """
+        with self.captureOnCommitCallbacks(execute=True):
+            DidExtension.objects.create(
+                did_number='5555550160', extension=self.block_extension
+            )
+        route = routing.get_did_route('+15555550160')
+        self.assertEqual(route.extension, self.block_extension)
+
+    def test_prefix_validation(self):
+        """ Assert DID block prefixes must be E.164 prefixes. """
+        for prefix in ('1555124', '+0555124', '+1555-124', '+155512345678901'):
+            block = DidBlock(did_prefix=prefix, intercom=self.intercom)
+            with self.assertRaises(ValidationError):
+                block.full_clean()
+        DidBlock(did_prefix='+1555124', intercom=self.intercom).full_clean()
+
+    def test_line_call(self):
+        """ Assert Line calls to DIDs short-circuit to the Extension. """
+        request = self.post(**{
+            'Caller-Destination-Number': '15551234100',
+            'variable_user_name': 'user0',
+        })
+        document = LineCallHandler().get_dialplan(request, 'intercom')
+        self.assertIn(b'"^4100$"', document)
+        self.assertNotIn(b'sofia/gateway', document)
+
+    def test_inbound_call(self):
+        """ Assert inbound calls route to DID Extensions or 404. """
+        handler = InboundCallHandler()
+        data = {
+            'Caller-Destination-Number': 'gwuser',
+            'variable_sip_gateway': 'gateway',
+            'Caller-Caller-ID-Name': 'Caller',
+            'Caller-Caller-ID-Number': '+15555550177',
+            'variable_sip_to_user': '+15555550150',
+        }
+        document = handler.get_dialplan(self.post(**data), 'gateway')
+        self.assertIn(b'user0@', document)
+        data['variable_sip_to_user'] = '+15551234199'
+        with self.assertRaises(Http404):
+            handler.get_dialplan(self.post(**data), 'gateway')
+        del data['variable_sip_to_user']
+        with self.assertRaises(Http404):
+            handler.get_dialplan(self.post(**data), 'gateway')
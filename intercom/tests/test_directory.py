@@ -0,0 +1,76 @@
+""" Directory cache test module. """
+from unittest import mock
+from django.http import Http404
+from common.lru import LruCache
+from intercom import routing
+from intercom.directory import LineAuthHandler, directory_cache
+from intercom.tests.base import BaseTestCase
+
+
+class DirectoryTestCase(BaseTestCase):
+    """ Verify cached Line auth documents. """
+
+    def setUp(self):
+        """ Start with an empty cache. """
+        super().setUp()
+        directory_cache.clear()
+
+    def get_directory(self, username, domain='intercom'):
+        """ Return the Line auth document. """
+        request = self.post(user=username)
+        return LineAuthHandler().get_directory(request, domain)
+
+    def test_cached(self):
+        """ Assert documents are cached without queries. """
+        document = self.get_directory('user0')
+        self.assertIn(b'value="pass0"', document)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_directory('user0'), document)
+        self.assertEqual(len(directory_cache), 1)
+
+    def test_invalidated(self):
+        """ Assert Line changes invalidate cached documents. """
+        self.get_directory('user0')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lines[0].password = 'changed'
+            self.lines[0].save()
+        self.assertIn(b'value="changed"', self.get_directory('user0'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lines[0].delete()
+        with self.assertRaises(Http404):
+            self.get_directory('user0')
+
+    def test_cleared_during_build(self):
+        """ Assert documents built across a clear aren't cached. """
+        get_line = routing.get_line
+
+        def get_line_and_clear(username):
+            """ Return the Line, then clear the cache. """
+            line = get_line(username)
+            directory_cache.clear()
+            return line
+
+        with mock.patch.object(routing, 'get_line', get_line_and_clear):
+            self.assertIn(b'value="pass0"', self.get_directory('user0'))
+        self.assertEqual(len(directory_cache), 0)
+        self.get_directory('user0')
+        self.assertEqual(len(directory_cache), 1)
+
+    def test_wrong_domain(self):
+        """ Assert Lines auth only in their Intercom's domain. """
+        with self.assertRaises(Http404):
+            self.get_directory('user0', 'otherdomain')
+
+    def test_eviction(self):
+        """ Assert the least recently used entry is evicted. """
+        cache = LruCache('test', 2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        version = cache.version
+        cache.clear()
+        self.assertFalse(cache.set('a', 1, version))
+        self.assertTrue(cache.set('a', 1, cache.version))
@@ -0,0 +1,87 @@
+""" Document builder test module. """
+from django.template.loader import render_to_string
+from fsapi.xml import build_document
+from intercom import routing
+from intercom.dialplan import InboundCallHandler, LineCallHandler
+from intercom.directory import directory_cache, LineAuthHandler
+from intercom.tests.base import BaseTestCase
+
+
+class DocumentBuilderTestCase(BaseTestCase):
+    """ Verify builders produce their templates' documents. """
+
+    def assert_parity(self, template, context):
+        """ Assert the built and rendered documents are identical. """
+        self.assertEqual(
+            build_document(template, context),
+            render_to_string(template, context).encode()
+        )
+
+    def test_line_auth(self):
+        """ Assert line-auth documents escape like the template. """
+        self.lines[0].password = 'p<&>"\'s'
+        self.lines[0].save()
+        line = routing.get_line('user0')
+        self.assert_parity('intercom/line-auth.xml', {'line': line})
+
+    def test_bridge(self):
+        """ Assert Line and inbound bridge documents match. """
+        route = routing.get_route('intercom', '100')
+        for caller in (
+                routing.get_line('user0'),
+                {'name': 'Caller & Co', 'number': '+15555550199'}):
+            self.assert_parity('intercom/bridge.xml', {
+                'context': 'intercom',
+                'dest_number': '100',
+                'caller': caller,
+                'extension': route.extension,
+                'action': route.action,
+            })
+
+    def test_outbound(self):
+        """ Assert outbound documents match. """
+        for gateway in (None, self.gateway):
+            self.assert_parity('intercom/outbound.xml', {
+                'context': 'intercom',
+                'dest_number': '+15555550123',
+                'caller': routing.get_line('user0'),
+                'gateway': gateway,
+            })
+
+    def test_not_found(self):
+        """ Assert the fsapi 404 document matches. """
+        self.assert_parity('fsapi/404.xml', {})
+
+    def test_handler_switch(self):
+        """ Assert handlers serve identical documents from templates. """
+        requests = (
+            (LineCallHandler, 'get_dialplan', (self.post(**{
+                'Caller-Destination-Number': '100',
+                'variable_user_name': 'user0',
+            }), 'intercom')),
+            (InboundCallHandler, 'get_dialplan', (self.post(**{
+                'Caller-Destination-Number': 'gwuser',
+                'variable_sip_gateway': 'gateway',
+                'variable_sip_to_user': '+15555550150',
+                'Caller-Caller-ID-Name': 'Caller',
+                'Caller-Caller-ID-Number': '+15555550177',
+            }), 'gateway')),
+            (LineAuthHandler, 'get_directory', (self.post(
+                user='user1'
+            ), 'intercom')),
+        )
+        for handler_class, method, args in requests:
+            built = getattr(handler_class(), method)(*args)
+            directory_cache.clear()
+            handler = handler_class()
+            handler.use_templates = True
+            self.assertEqual(getattr(handler, method)(*args), built)
+
+    def test_minify(self):
+        """ Assert minified documents drop whitespace between tags. """
+        handler = LineAuthHandler()
+        handler.minify = True
+        document = handler.get_directory(self.post(user='user1'), 'intercom')
+        self.assertTrue(document.startswith(b'<?xml'))
+        self.assertIn(b'<params><param name="password"', document)
+        self.assertNotIn(b'>\n', document)
@@ -0,0 +1,62 @@
+""" OutboundExtension matcher test module. """
+from django.core.exceptions import ValidationError
+from intercom import matchers
+from intercom.dialplan import LineCallHandler
+from intercom.models import OutboundExtension
+from intercom.tests.base import BaseTestCase
+
+
+class MatchersTestCase(BaseTestCase):
+    """ Verify OutboundExtension matchers. """
+
+    def test_priority(self):
+        """ Assert the first matching extension in set order wins. """
+        local = OutboundExtension.objects.create(
+            name='local', expression=r'\+1555\d{7}'
+        )
+        other = OutboundExtension.objects.create(
+            name='other', expression=r'\+1666\d{7}'
+        )
+        extensions = [other, local, self.outbound]
+        self.assertEqual(matchers.match(extensions, '+15555550123'), local)
+        self.assertEqual(matchers.match(extensions, '+17775550123'),
+                         self.outbound)
+        self.assertIsNone(matchers.match([other], '+15555550123'))
+
+    def test_fallback(self):
+        """ Assert expressions that can't be combined still match. """
+        first = OutboundExtension.objects.create(
+            name='first', expression=r'\+1(\d)\1\d{8}'
+        )
+        second = OutboundExtension.objects.create(
+            name='second', expression=r'(?P<x>\+1)\d{10}'
+        )
+        matcher = matchers.get_matcher([second, self.outbound])
+        self.assertIsNotNone(matcher.combined)
+        self.assertEqual(matcher.match('+15655550123'), second.pk)
+        matcher = matchers.get_matcher([first, second, self.outbound])
+        self.assertIsNone(matcher.combined)
+        self.assertEqual(matcher.match('+15555550123'), first.pk)
+        self.assertEqual(matcher.match('+15655550123'), second.pk)
+
+    def test_validation(self):
+        """ Assert invalid expressions are rejected on save. """
+        with self.assertRaises(ValidationError):
+            OutboundExtension.objects.create(name='bad', expression='(')
+
+    def test_invalidation(self):
+        """ Assert OutboundExtension changes drop cached matchers. """
+        matchers.get_matcher([self.outbound])
+        self.assertTrue(matchers._matchers)
+        self.outbound.expression = r'\+1555\d{7}'
+        self.outbound.save()
+        self.assertFalse(matchers._matchers)
+
+    def test_line_call(self):
+        """ Assert Line calls to external numbers route via Gateways. """
+        request = self.post(**{
+            'Caller-Destination-Number': '5555550123',
+            'variable_user_name': 'user0',
+        })
+        document = LineCallHandler().get_dialplan(request, 'intercom')
+        self.assertIn(b'sofia/gateway/gateway/+15555550123', document)
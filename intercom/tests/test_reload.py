@@ -0,0 +1,99 @@
+""" Registry reload test module. """
+import os
+import signal
+from unittest import mock
+from dialplan import fsapi as dialplan_fsapi
+from directory import fsapi as directory_fsapi
+from fsapi import reload
+from intercom import routing
+from intercom.dialplan import InboundCallHandler, LineCallHandler
+from intercom.directory import LineAuthHandler
+from intercom.models import Intercom, Line
+from intercom.tests.base import BaseTestCase
+from sofia import gateways
+from sofia.models import Gateway
+
+
+class ReloadTestCase(BaseTestCase):
+    """ Verify live handler registry updates and reloads. """
+
+    def test_intercom_signals(self):
+        """ Assert Intercom changes swap in updated registries. """
+        handlers = dialplan_fsapi.dialplan_handlers
+        intercom = Intercom.objects.create(domain='new', port=5062)
+        self.assertNotIn('new', handlers)
+        self.assertIsInstance(
+            dialplan_fsapi.dialplan_handlers['new'], LineCallHandler
+        )
+        self.assertIsInstance(
+            directory_fsapi.directory_handlers['new'], LineAuthHandler
+        )
+        intercom.domain = 'renamed'
+        intercom.save()
+        self.assertNotIn('new', dialplan_fsapi.dialplan_handlers)
+        self.assertIn('renamed', directory_fsapi.directory_handlers)
+        intercom.delete()
+        self.assertNotIn('renamed', dialplan_fsapi.dialplan_handlers)
+        self.assertNotIn('renamed', directory_fsapi.directory_handlers)
+
+    def test_gateway_signals(self):
+        """ Assert Gateway changes update handlers and priorities. """
+        gateway = Gateway.objects.create(
+            domain='backup', port=5072, username='backupuser',
+            password='gwpass', proxy='sip.example.com',
+            realm='sip.example.com', priority=2
+        )
+        self.assertIsInstance(
+            dialplan_fsapi.dialplan_handlers['backup'], InboundCallHandler
+        )
+        self.assertEqual(gateways.get_chain()[-1], gateway)
+        gateway.priority = 0
+        gateway.save()
+        self.assertEqual(gateways.get_chain()[0], gateway)
+        gateway.delete()
+        self.assertNotIn('backup', dialplan_fsapi.dialplan_handlers)
+        self.assertEqual(gateways.get_chain(), (self.gateway,))
+
+    def test_reload(self):
+        """ Assert reloads pick up changes made without signals. """
+        handler = LineAuthHandler()
+        handler.get_directory(self.post(user='user0'), 'intercom')
+        Line.objects.filter(username='user0').update(password='changed')
+        reload.reload()
+        self.assertIn(
+            b'value="changed"',
+            handler.get_directory(self.post(user='user0'), 'intercom')
+        )
+
+    def test_request_during_reload(self):
+        """ Assert documents built from the old snapshot during a reload
+        aren't served after it. """
+        handler = LineAuthHandler()
+        handler.get_directory(self.post(user='user0'), 'intercom')
+        Line.objects.filter(username='user0').update(password='changed')
+        rebuild = routing.rebuild
+
+        def request_and_rebuild():
+            """ Request the document, then rebuild. """
+            handler.get_directory(self.post(user='user0'), 'intercom')
+            rebuild()
+
+        with mock.patch.object(
+                routing, 'rebuild', side_effect=request_and_rebuild) as mocked:
+            reload.reload()
+        mocked.assert_called_once_with()
+        self.assertIn(
+            b'value="changed"',
+            handler.get_directory(self.post(user='user0'), 'intercom')
+        )
+
+    def test_sighup(self):
+        """ Assert SIGHUP starts a reload. """
+        previous = signal.getsignal(signal.SIGHUP)
+        self.addCleanup(signal.signal, signal.SIGHUP, previous)
+        with mock.patch('fsapi.generation.start_polling') as start_polling:
+            reload.install()
+        start_polling.assert_called_once_with()
+        with mock.patch.object(reload, 'start_reload') as start_reload:
+            os.kill(os.getpid(), signal.SIGHUP)
+        start_reload.assert_called_once_with()
@@ -0,0 +1,94 @@
+""" Routing snapshot test module. """
+from unittest import mock
+from django.db import transaction
+from django.http import Http404
+from intercom import routing
+from intercom.dialplan import LineCallHandler
+from intercom.models import Extension
+from intercom.tests.base import BaseTestCase
+
+
+class RoutingTestCase(BaseTestCase):
+    """ Verify the routing snapshot. """
+
+    def test_lookup_queries(self):
+        """ Assert snapshot lookups make no queries. """
+        with self.assertNumQueries(0):
+            line = routing.get_line('user0')
+            route = routing.get_route('intercom', '100')
+            self.assertEqual(
+                line.intercom.default_outbound_caller_id, self.cid
+            )
+            self.assertEqual(route.action, self.bridge)
+            self.assertEqual(route.template, 'intercom/bridge.xml')
+            self.assertEqual(
+                [ext.pk for ext in line.outbound_extensions.all()],
+                [self.outbound.pk]
+            )
+
+    def test_extension_signals(self):
+        """ Assert committed Extension changes rebuild the snapshot. """
+        with self.captureOnCommitCallbacks(execute=True):
+            extension = Extension.objects.create(
+                extension_number='200', intercom=self.intercom
+            )
+        route = routing.get_route('intercom', '200')
+        self.assertEqual(route.extension, extension)
+        self.assertIsNone(route.action)
+        with self.captureOnCommitCallbacks(execute=True):
+            extension.delete()
+        self.assertIsNone(routing.get_route('intercom', '200'))
+
+    def test_rebuilt_once_on_commit(self):
+        """ Assert a transaction's changes rebuild the snapshot once, after
+        it commits, and rolled back changes don't rebuild it. """
+        with mock.patch.object(
+                routing, 'rebuild', wraps=routing.rebuild) as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                for number in ('200', '201', '202'):
+                    Extension.objects.create(
+                        extension_number=number, intercom=self.intercom
+                    )
+                rebuild.assert_not_called()
+            rebuild.assert_called_once_with()
+            self.assertIsNotNone(routing.get_route('intercom', '202'))
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(ValueError):
+                    with transaction.atomic():
+                        Extension.objects.create(
+                            extension_number='203', intercom=self.intercom
+                        )
+                        raise ValueError
+            rebuild.assert_called_once_with()
+
+    def test_m2m_signals(self):
+        """ Assert committed Line outbound_extensions changes rebuild the
+        snapshot. """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lines[0].outbound_extensions.clear()
+        line = routing.get_line('user0')
+        self.assertEqual(list(line.outbound_extensions.all()), [])
+
+    def test_line_call(self):
+        """ Assert Line calls to Extensions render the Action. """
+        request = self.post(**{
+            'Caller-Destination-Number': '100',
+            'variable_user_name': 'user0',
+        })
+        document = LineCallHandler().get_dialplan(request, 'intercom')
+        self.assertIn(b'user1@', document)
+        self.assertNotIn(b'user0@', document)
+
+    def test_line_call_unknown(self):
+        """ Assert unknown callers and actionless Extensions 404. """
+        Extension.objects.create(
+            extension_number='200', intercom=self.intercom
+        )
+        handler = LineCallHandler()
+        for username, number in (('nosuchuser', '100'), ('user0', '200')):
+            request = self.post(**{
+                'Caller-Destination-Number': number,
+                'variable_user_name': username,
+            })
+            with self.assertRaises(Http404):
+                handler.get_dialplan(request, 'intercom')
@@ -0,0 +1,67 @@
+""" Routing snapshot file test module. """
+from django.conf import settings
+from intercom import routing, snapshot
+from intercom.dialplan import LineCallHandler
+from intercom.models import DidBlock
+from intercom.tests.base import BaseTestCase
+
+
+class SnapshotFileTestCase(BaseTestCase):
+    """ Verify published and mapped routing snapshots. """
+
+    def publish_other(self):
+        """ Publish a snapshot the way another process would. """
+        return snapshot.write(
+            settings.ROUTING_SNAPSHOT_FILE, routing.build().get_records()
+        )
+
+    def test_mapped_lookups(self):
+        """ Assert mapped records decode without queries. """
+        DidBlock.objects.create(did_prefix='+1555123', intercom=self.intercom)
+        self.publish_other()
+        mapped = routing.MappedSnapshot(settings.ROUTING_SNAPSHOT_FILE)
+        with self.assertNumQueries(0):
+            line = mapped.get_line('user0')
+            self.assertEqual(line, self.lines[0])
+            self.assertEqual(
+                line.intercom.default_outbound_caller_id, self.cid
+            )
+            self.assertEqual(
+                list(line.outbound_extensions.all()), [self.outbound]
+            )
+            self.assertIs(mapped.get_line('user0'), line)
+            self.assertIsNone(mapped.get_line('nosuchuser'))
+            route = mapped.get_routes('intercom')['100']
+            self.assertEqual(route.action, self.bridge)
+            dids = mapped.get_dids()
+            self.assertEqual(
+                dids.get('+15555550150').extension, self.extension
+            )
+            self.assertIs(dids.get('+15551234999'), routing.unassigned)
+
+    def test_load(self):
+        """ Assert other processes' snapshots are swapped in once. """
+        request = self.post(**{
+            'Caller-Destination-Number': '100',
+            'variable_user_name': 'user0',
+        })
+        built = LineCallHandler().get_dialplan(request, 'intercom')
+        self.publish_other()
+        self.assertTrue(routing.load())
+        self.assertFalse(routing.load())
+        with self.assertNumQueries(0):
+            self.assertEqual(routing.get_line('user0'), self.lines[0])
+        self.assertEqual(
+            LineCallHandler().get_dialplan(request, 'intercom'), built
+        )
+
+    def test_publish(self):
+        """ Assert committed changes publish this process's snapshot. """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lines[0].password = 'changed'
+            self.lines[0].save()
+        path = settings.ROUTING_SNAPSHOT_FILE
+        self.assertIsNotNone(snapshot.read_build_id(path))
+        self.assertFalse(routing.load())
+        mapped = routing.MappedSnapshot(path)
+        self.assertEqual(mapped.get_line('user0').password, 'changed')
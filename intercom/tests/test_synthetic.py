@@ -0,0 +1,54 @@
+""" Synthetic PBX benchmark test module. """
+from django.test import override_settings
+from fsapi import bench, reload
+from intercom import synthetic
+from intercom.models import Bridge, Line
+from intercom.tests.base import BaseTestCase
+
+
+class SyntheticTestCase(BaseTestCase):
+    """ Verify synthetic PBXs and benchmark runs. """
+
+    def setUp(self):
+        """ Add a small synthetic PBX and reload. """
+        super().setUp()
+        self.pbx = synthetic.create_pbx(
+            intercoms=2, lines=4, extensions=3, members=2, dids=2,
+            outbound_extensions=1, gateways=1
+        )
+        reload.reload()
+
+    def test_create_pbx(self):
+        """ Assert the PBX has the requested size. """
+        self.assertEqual(len(self.pbx['intercoms']), 2)
+        self.assertEqual(
+            Line.objects.filter(intercom__domain='intercom1').count(), 4
+        )
+        bridge = Bridge.objects.get(
+            extension__intercom__domain='intercom0',
+            extension__extension_number='100'
+        )
+        self.assertEqual(bridge.line_set.count(), 2)
+
+    @override_settings(FSAPI_QUERY_BUDGETS='raise')
+    def test_scenarios(self):
+        """ Assert every scenario request gets a document within handler
+        and scenario query budgets. """
+        scenarios = synthetic.get_scenarios(self.pbx)
+        self.assertEqual(len(scenarios), 6)
+        for name, bodies in scenarios.items():
+            result = bench.run(
+                bodies, len(bodies) + 1, 0, synthetic.BUDGETS[name]
+            )
+            self.assertEqual(result['not_found'], 0, name)
+            self.assertFalse(result['over_budget'], name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_percentiles(self):
+        """ Assert percentiles interpolate between the closest ranks. """
+        latencies = [index / 1000 for index in range(1, 12)]
+        self.assertEqual(
+            {key: round(value, 6)
+             for key, value in bench.get_percentiles(latencies).items()},
+            {'p50_ms': 6.0, 'p95_ms': 10.5, 'p99_ms': 10.9}
+        )
@@ -0,0 +1,121 @@
+""" Warm start test module. """
+import os
+from unittest import mock
+from django.conf import settings
+from dialplan import fsapi as dialplan_fsapi
+from directory import fsapi as directory_fsapi
+from fsapi import generation, reload, warmstart
+from intercom import routing
+from intercom.dialplan import InboundCallHandler, LineCallHandler
+from intercom.directory import LineAuthHandler
+from intercom.models import Line
+from intercom.tests.base import BaseTestCase
+from sofia import configuration, gateways
+
+
+class WarmStartTestCase(BaseTestCase):
+    """ Verify warm start snapshots. """
+
+    def setUp(self):
+        """ Persist warm states. """
+        super().setUp()
+        self.addCleanup(generation.close)
+        generation.close()
+        warmstart.dump()
+        self.documents = configuration.get_documents()
+
+    @staticmethod
+    def clear():
+        """ Drop state the way a restart would. """
+        dialplan_fsapi.update_dialplan_handlers(
+            {}, (LineCallHandler, InboundCallHandler)
+        )
+        directory_fsapi.update_directory_handlers({}, (LineAuthHandler,))
+        gateways.load_state([])
+        configuration.invalidate_documents()
+
+    def test_load(self):
+        """ Assert matching snapshots load with fingerprint queries only. """
+        self.clear()
+        with mock.patch.object(routing, '_build_id', None):
+            queries = 2 + len(set(reload.reload_senders))
+            with self.assertNumQueries(queries):
+                self.assertTrue(warmstart.start())
+            self.assertIsInstance(
+                routing._snapshot,  # pylint: disable=protected-access
+                routing.MappedSnapshot
+            )
+        self.assertIsInstance(
+            dialplan_fsapi.dialplan_handlers['gateway'], InboundCallHandler
+        )
+        self.assertIn('intercom', directory_fsapi.directory_handlers)
+        self.assertEqual(gateways.get_chain(), (self.gateway,))
+        with self.assertNumQueries(0):
+            self.assertEqual(configuration.get_documents(), self.documents)
+            self.assertEqual(routing.get_line('user0'), self.lines[0])
+
+    def test_stale_routing_file(self):
+        """ Assert rebuilds without a build id don't load the routing
+        snapshot file. """
+        Line.objects.create(
+            name='line3', username='user3', password='pass3',
+            intercom=self.intercom
+        )
+        self.clear()
+        with mock.patch.object(routing, '_build_id', None):
+            reload.reload()
+            self.assertEqual(routing.get_line('user3').username, 'user3')
+            self.assertIsNotNone(routing.get_build_id())
+
+    def test_cold_start(self):
+        """ Assert stale snapshots are rebuilt before start returns. """
+        Line.objects.create(
+            name='line3', username='user3', password='pass3',
+            intercom=self.intercom
+        )
+        self.clear()
+        with mock.patch.object(routing, '_build_id', None):
+            self.assertFalse(warmstart.start())
+            self.assertEqual(routing.get_line('user3').username, 'user3')
+        self.assertIsInstance(
+            dialplan_fsapi.dialplan_handlers['gateway'], InboundCallHandler
+        )
+        self.assertIn('intercom', directory_fsapi.directory_handlers)
+        self.assertEqual(gateways.get_chain(), (self.gateway,))
+        self.assertTrue(warmstart.load())
+
+    def test_code_changed(self):
+        """ Assert code changes make snapshots stale. """
+        self.assertTrue(warmstart.load())
+        with mock.patch.object(warmstart, '_code_digest', 'changed'):
+            self.assertFalse(warmstart.load())
+        self.assertIn(
+            os.path.join(settings.BASE_DIR, 'sofia', 'templates', 'sofia',
+                         'gateway.xml'),
+            list(warmstart.get_code_paths())
+        )
+
+    def test_dump_once(self):
+        """ Assert a transaction's changes persist states once. """
+        with mock.patch.object(warmstart, 'dump') as dump:
+            with self.captureOnCommitCallbacks(execute=True):
+                line = Line.objects.create(
+                    name='line3', username='user3', password='pass3',
+                    intercom=self.intercom
+                )
+                line.bridges.add(self.bridge)
+                line.outbound_extensions.add(self.outbound)
+            dump.assert_called_once_with()
+
+    def test_stale(self):
+        """ Assert database changes make snapshots stale. """
+        self.assertTrue(warmstart.load())
+        Line.objects.create(
+            name='line3', username='user3', password='pass3',
+            intercom=self.intercom
+        )
+        self.assertFalse(warmstart.load())
+        warmstart.dump()
+        self.assertTrue(warmstart.load())
+        generation.get_generation().bump()
+        self.assertFalse(warmstart.load())
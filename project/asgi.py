@@ -4,4 +4,11 @@ from django.core.asgi import get_asgi_application
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# pylint: disable=wrong-import-position
+from fsapi import warmstart  # noqa: E402
+from fsapi.asgi import FsapiApplication  # noqa: E402
+
+application = FsapiApplication(django_application)
+warmstart.start()
@@ -31,6 +31,100 @@ PORTS = env.get_settings(BASE_DIR, 'ports.py')
 PBX_HOSTNAME = django_globals['ALLOWED_HOSTS'][0]
 
 
+# Fsapi cache sizes.
+
+DIRECTORY_CACHE_SIZE = 1024
+
+DIALSTRING_CACHE_SIZE = 1024
+
+
+# Fsapi sync handler execution, thread_sensitive or thread_pool.
+
+FSAPI_EXECUTION = 'thread_sensitive'
+
+FSAPI_POOLS = {
+    'default': 2,
+    'configuration': 2,
+    'dialplan': 4,
+    'directory': 4,
+}
+
+
+# Fsapi handler query budget checks, None, 'log' or 'raise'.
+
+FSAPI_QUERY_BUDGETS = None
+
+
+# Cross-worker cache generation file and poll interval seconds.
+
+GENERATION_FILE = os.path.join(BASE_DIR, 'var', 'generation')
+
+GENERATION_POLL_INTERVAL = 1.0
+
+
+# Routing snapshot file shared by workers and warm start snapshot file.
+
+ROUTING_SNAPSHOT_FILE = os.path.join(BASE_DIR, 'var', 'routing.snapshot')
+
+WARM_SNAPSHOT_FILE = os.path.join(BASE_DIR, 'var', 'warm.snapshot')
+
+
+# Opt-in fsapi traffic recording, sample rate and JSONL file rotation. Each
+# worker records to the file with its process id before the extension.
+
+FSAPI_RECORD = False
+
+FSAPI_RECORD_SAMPLE = 1.0
+
+FSAPI_RECORD_FILE = os.path.join(BASE_DIR, 'var', 'fsapi.jsonl')
+
+FSAPI_RECORD_MAX_BYTES = 10 * 1024 * 1024
+
+FSAPI_RECORD_BACKUPS = 5
+
+
+# Firewall client timeout seconds, connect retries and pool size, the
+# state file of rules that syncs have added, the only rules they delete,
+# and seconds that a sync makes startup syncs at the same generation moot.
+
+FIREWALL_TIMEOUT = 5.0
+
+FIREWALL_RETRIES = 2
+
+FIREWALL_CONNECTIONS = 4
+
+FIREWALL_STATE_FILE = os.path.join(BASE_DIR, 'var', 'firewall.json')
+
+FIREWALL_STARTUP_SECONDS = 60.0
+
+
+# Opt-in FreeSWITCH event socket gateway health feed, with read timeout and
+# reconnect delay seconds.
+
+GATEWAY_EVENTS = False
+
+EVENT_SOCKET_PASSWORD = django_globals.get('EVENT_SOCKET_PASSWORD', 'ClueCon')
+
+EVENT_SOCKET_TIMEOUT = 1.0
+
+EVENT_SOCKET_RETRY = 5.0
+
+
+# Gateway health setup latency window size, slow and fast median setup
+# seconds, consecutive setup failures to skip a gateway and promotion hold
+# seconds.
+
+GATEWAY_HEALTH_WINDOW = 20
+
+GATEWAY_HEALTH_SLOW_SECONDS = 3.0
+
+GATEWAY_HEALTH_FAST_SECONDS = 1.5
+
+GATEWAY_HEALTH_FAILURES = 3
+
+GATEWAY_HEALTH_HOLD_SECONDS = 30.0
+
+
 # Other custom Django settings.
 
 CSRF_FAILURE_VIEW = 'common.views.custom403'
@@ -106,6 +200,7 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'var', 'db.sqlite3'),
+        'CONN_MAX_AGE': None,
     }
 }
 
@@ -4,29 +4,41 @@ from django.apps import AppConfig
 
 class SofiaConfig(AppConfig):
     """ Sofia app config. """
+    # pylint: disable=import-outside-toplevel
     name = 'sofia'
 
+    def reload(self):
+        """ Rebuild the gateway registry and drop config documents. """
+        # pylint: disable=no-self-use
+        from sofia import gateways
+        from sofia.configuration import invalidate_documents
+
+        gateways.refresh()
+        invalidate_documents()
+
     def ready(self):
         """ Config on app ready. """
-        # pylint: disable=import-outside-toplevel
         import sys
+        from django.conf import settings
+        from django.db.utils import OperationalError
+        from fsapi.reload import register_reloader
+        from fsapi.warmstart import register_warm_state
+        from sofia import events, gateways, signals
+        from sofia.configuration import get_documents, set_documents
 
-        # Open ports.
-        if sys.argv[-1] == 'project.asgi:application':
-            import logging
-            from common import firewall
-            from sofia.models import Gateway, AclAddress
+        signals.connect()
+        register_reloader(self.name, self.reload, signals.get_senders())
+        register_warm_state(
+            'gateways', gateways.dump_state, gateways.load_state
+        )
+        register_warm_state(self.name, get_documents, set_documents)
 
-            logger = logging.getLogger('django.server')
-            for gateway in Gateway.objects.all():
-                for acl_addr in AclAddress.objects.filter(gateway=gateway):
-                    firewall.accept(
-                        'tcp',
-                        gateway.port,
-                        gateway.port,
-                        acl_addr.address
-                    )
-                    logger.info(
-                        '%s opened tcp %s to %s',
-                        self.name, gateway.port, acl_addr.address
-                    )
+        # The ASGI application warm starts the gateway registry.
+        if sys.argv[-1] == 'project.asgi:application':
+            if settings.GATEWAY_EVENTS:
+                events.start()
+        else:
+            try:
+                gateways.refresh()
+            except OperationalError:
+                pass  # This fails when tables don't exist.
@@ -1,41 +1,122 @@
-""" Sofia app config request handler module. """
+""" Sofia app config request handler module.
+
+Sofia configuration documents are built once, all together, and kept as
+bytes, separately for builders and templates, until an Intercom, Gateway
+or AclAddress changes. Invalidations
+bump a version, and documents built across one are returned but not
+kept, so that a build can't restore documents that predate a change. """
+import threading
 from django.conf import settings
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from configuration.fsapi import ModuleConfigHandler, register_config_handler
+from fsapi.xml import build_document
 from intercom.models import Intercom
-from sofia.models import Gateway
+from sofia.gateways import get_gateways
+
+
+# Dict of use_templates flag to config bytes dict.
+_documents = {}
+
+_lock = threading.Lock()
+
+# Bumped by every invalidation and warm start swap.
+_version = 0
+
+
+def build_documents(use_templates=False):
+    """ Return a dict of profile domain, or None for all profiles, to
+    config bytes. """
+    intercoms = list(Intercom.objects.all())
+    gateways = list(get_gateways().values())
+    documents = {
+        None: build_document('sofia/sofia.conf.xml', {
+            'intercoms': intercoms,
+            'gateways': gateways,
+        }, use_templates=use_templates)
+    }
+    for intercom in intercoms:
+        documents[intercom.domain] = build_document(
+            'sofia/intercom.conf.xml', {'intercom': intercom},
+            use_templates=use_templates,
+        )
+    for gateway in gateways:
+        documents.setdefault(gateway.domain, build_document(
+            'sofia/gateway.conf.xml', {
+                'gateway': gateway,
+                'hostname': settings.PBX_HOSTNAME
+            }, use_templates=use_templates,
+        ))
+    return documents
+
+
+def get_documents(use_templates=False):
+    """ Return the config bytes dict, building it if needed, and keeping
+    it unless documents were invalidated during the build. """
+    documents = _documents.get(use_templates)
+    if documents is None:
+        version = _version
+        documents = build_documents(use_templates)
+        with _lock:
+            if _version == version:
+                _documents[use_templates] = documents
+    return documents
+
+
+def set_documents(documents):
+    """ Swap in builder config bytes from a warm start. """
+    global _documents, _version  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    with _lock:
+        _documents = {False: documents}
+        _version += 1
+
+
+def invalidate_documents():
+    """ Drop built config documents. """
+    global _documents, _version  # pylint: disable=global-statement
+    # pylint: disable=invalid-name
+    with _lock:
+        _documents = {}
+        _version += 1
 
 
 class SofiaConfigHandler(ModuleConfigHandler):
     """ Sofia profile config request handler. """
 
-    def get_config(self, request):
-        """ Return rendered config. """
+    # Intercoms, when documents aren't built.
+    query_budget = 1
+
+    @staticmethod
+    def select_config(request, documents):
+        """ Return the requested config from the documents. """
         # self.logger.info(request.POST.dict())
         domain = request.POST.get('profile')
         if domain:
 
             # The profile thread has requested its own configuration.
-            try:
-                intercom = Intercom.objects.get(domain=domain)
-                template = 'sofia/intercom.conf.xml'
-                context = {'intercom': intercom}
-            except Intercom.DoesNotExist:
-                gateway = get_object_or_404(Gateway, domain=domain)
-                template = 'sofia/gateway.conf.xml'
-                context = {
-                    'gateway': gateway,
-                    'hostname': settings.PBX_HOSTNAME
-                }
-            return self.rendered(request, template, context)
+            document = documents.get(domain)
+            if document is None:
+                raise Http404
+            return document
 
         # No profile specified in POST. Return all profiles.
-        template = 'sofia/sofia.conf.xml'
-        context = {
-            'intercoms': Intercom.objects.all(),
-            'gateways': Gateway.objects.all()
-        }
-        return self.rendered(request, template, context)
+        return documents[None]
+
+    def get_config(self, request):
+        """ Return the requested config document. """
+        return self.select_config(
+            request, get_documents(self.use_templates)
+        )
+
+    async def aget_config(self, request):
+        """ Return the config from the event loop, building documents in a
+        worker thread when they're not ready. """
+        documents = _documents.get(self.use_templates)
+        if documents is None:
+            documents = await self.run_sync(
+                get_documents, self.use_templates
+            )
+        return self.select_config(request, documents)
 
 
 register_config_handler('sofia', SofiaConfigHandler())
@@ -0,0 +1,194 @@
+""" Sofia app document builder module. """
+from fsapi.xml import escape, register_document_builder
+
+
+HEADER = '''<?xml version="1.0" encoding="UTF-8" standalone="%s"?>
+<document type="freeswitch/xml">
+  <section name="configuration">
+    <configuration name="sofia.conf" description="Sofia Endpoint">
+
+'''
+
+FOOTER = '''      </profiles>
+
+    </configuration>
+  </section>
+</document>
+'''
+
+INTERCOM_PROFILE = '''        <profile name="%(domain)s">
+
+          <aliases>
+          </aliases>
+
+          <gateways>
+          </gateways>
+
+          <domains>
+          </domains>
+
+          <settings>
+
+            <param name="user-agent-string" value="PBX/$${ version }"/>
+
+            <param name="ext-sip-ip" value="$${local_ip_v4}"/>
+            <param name="tls" value="true"/>
+            <param name="tls-only" value="true"/>
+            <param name="tls-sip-port" value="%(port)s"/>
+            <param name="tls-version" value="tlsv1.2"/>
+
+            <param name="codec-prefs" value="PCMU"/>
+            <param name="inbound-late-negotiation" value="true"/>
+
+            <param name="rtp-ip" value="$${local_ip_v4}"/>
+            <param name="ext-rtp-ip" value="$${local_ip_v4}"/>
+            <param name="rtp-timer-name" value="soft"/>
+            <!-- Channel var rtp_secure_media=true for outbound. -->
+            <param name="require-secure-rtp" value="true"/>
+
+            <param name="rfc2833-pt" value="101"/>
+            <param name="liberal-dtmf" value="true"/>
+            <param name="dtmf-duration" value="2000"/><!-- default 20 -->
+
+            <param name="auth-calls" value="true"/>
+            <param name="log-auth-failures" value="true"/>
+            <param name="force-register-domain" value="%(domain)s"/>
+            <param name="manage-presence" value="false"/>
+
+            <param name="dialplan" value="XML"/>
+            <param name="context" value="%(domain)s"/>
+
+          </settings>
+
+        </profile>
+'''
+
+GATEWAY_PROFILE = '''<profile name="%(domain)s">
+
+  <aliases>
+  </aliases>
+
+  <gateways>
+    <gateway name="%(domain)s">
+      <param name="register" value="true"/>
+      <param name="register-transport" value="tls"/>
+      <param name="expire-seconds" value="120"/>
+      <param name="username" value="%(username)s"/>
+      <param name="password" value="%(password)s"/>
+      <param name="proxy" value="%(proxy)s"/>
+      <param name="realm" value="%(realm)s"/>
+      <param name="sip_cid_type" value="rpid"/>
+    </gateway>
+  </gateways>
+
+  <domains>
+  </domains>
+
+  <settings>
+
+    <param name="user-agent-string" value="PBX/$${version}"/>
+
+    <param name="ext-sip-ip" value="$${local_ip_v4}"/>
+    <param name="tls" value="true"/>
+    <param name="tls-only" value="true"/>
+    <param name="tls-sip-port" value="%(port)s"/>
+    <param name="tls-version" value="tlsv1.2"/>
+
+    <param name="codec-prefs" value="PCMU"/>
+    <param name="inbound-late-negotiation" value="true"/>
+
+    <param name="ext-rtp-ip" value="$${local_ip_v4}"/>
+    <param name="rtp-timer-name" value="soft"/>
+    <param name="rtp-ip" value="$${local_ip_v4}"/>
+    <param name="require-secure-rtp" value="true"/>
+
+    <param name="rfc2833-pt" value="101"/>
+    <param name="liberal-dtmf" value="true"/>
+    <param name="dtmf-duration" value="2000"/>
+
+    <param name="auth-calls" value="false"/>
+    <param name="log-auth-failures" value="true"/>
+    <param name="force-register-domain" value="%(domain)s"/>
+    <param name="manage-presence" value="false"/>
+
+    <param name="dialplan" value="XML"/>
+    <param name="context" value="%(domain)s"/>
+
+  </settings>
+
+</profile>
+'''
+
+# Whitespace left by the sofia.conf.xml template's loop and with tags.
+LOOP_START = '        '
+LOOP_ITEM = '\n        \n%s\n        \n        '
+LOOP_SEPARATOR = '\n        '
+LOOP_END = '\n'
+
+
+def intercom_profile(intercom):
+    """ Return the sofia/intercom.xml profile str. """
+    return INTERCOM_PROFILE % {
+        'domain': escape(intercom.domain),
+        'port': escape(intercom.port),
+    }
+
+
+def gateway_profile(gateway):
+    """ Return the sofia/gateway.xml profile str. """
+    return GATEWAY_PROFILE % {
+        'domain': escape(gateway.domain),
+        'username': escape(gateway.username),
+        'password': escape(gateway.password),
+        'proxy': escape(gateway.proxy),
+        'realm': escape(gateway.realm),
+        'port': escape(gateway.port),
+    }
+
+
+def sofia_conf(context):
+    """ Return the sofia/sofia.conf.xml document. """
+    return ''.join((
+        HEADER % 'yes',
+        '      <global_settings>\n      </global_settings>\n\n',
+        '      <profiles>\n',
+        LOOP_START,
+        ''.join(
+            LOOP_ITEM % intercom_profile(intercom)
+            for intercom in context['intercoms']
+        ),
+        LOOP_SEPARATOR,
+        ''.join(
+            LOOP_ITEM % gateway_profile(gateway)
+            for gateway in context['gateways']
+        ),
+        LOOP_END,
+        FOOTER,
+    )).encode()
+
+
+def intercom_conf(context):
+    """ Return the sofia/intercom.conf.xml document. """
+    return ''.join((
+        HEADER % 'no',
+        '      <profiles>\n',
+        intercom_profile(context['intercom']),
+        '\n',
+        FOOTER,
+    )).encode()
+
+
+def gateway_conf(context):
+    """ Return the sofia/gateway.conf.xml document. """
+    return ''.join((
+        HEADER % 'no',
+        '      <profiles>\n',
+        gateway_profile(context['gateway']),
+        '\n',
+        FOOTER,
+    )).encode()
+
+
+register_document_builder('sofia/sofia.conf.xml', sofia_conf)
+register_document_builder('sofia/intercom.conf.xml', intercom_conf)
+register_document_builder('sofia/gateway.conf.xml', gateway_conf)
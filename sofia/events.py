@@ -0,0 +1,205 @@
+""" Sofia app FreeSWITCH event module.
+
+When settings.GATEWAY_EVENTS is on, a daemon thread in each ASGI worker
+connects to FreeSWITCH's event socket, subscribes to gateway state and
+channel hangup events and feeds them to the gateway health tracker:
+sofia::gateway_state events carry registration states and ping status,
+and outbound gateway channels' hangup events carry call setup times and
+causes. The thread re-rates gateways every EVENT_SOCKET_TIMEOUT seconds
+and reconnects every EVENT_SOCKET_RETRY seconds after errors. """
+import logging
+import socket
+import threading
+from urllib.parse import unquote
+from django.conf import settings
+from sofia import health
+
+
+EVENTS = 'CHANNEL_HANGUP_COMPLETE CUSTOM sofia::gateway_state'
+
+# Hangup causes that blame the gateway for a call that didn't set up.
+SETUP_FAILURES = frozenset((
+    'DESTINATION_OUT_OF_ORDER', 'GATEWAY_DOWN', 'NETWORK_OUT_OF_ORDER',
+    'NORMAL_TEMPORARY_FAILURE', 'RECOVERY_ON_TIMER_EXPIRE',
+    'SERVICE_UNAVAILABLE', 'SWITCH_CONGESTION',
+))
+
+# Channel timestamps, in microseconds, that end call setup.
+SETUP_TIMES = (
+    'Caller-Channel-Progress-Time', 'Caller-Channel-Progress-Media-Time',
+    'Caller-Channel-Answered-Time',
+)
+
+_stop = threading.Event()
+
+_thread = None
+
+
+def parse_headers(data):
+    """ Return a dict of the header block's URL-decoded values. """
+    headers = {}
+    for line in data.decode('utf-8', 'replace').split('\n'):
+        key, sep, value = line.partition(': ')
+        if sep:
+            headers[key] = unquote(value)
+    return headers
+
+
+class EventSocket:
+    """ A FreeSWITCH event socket client connection. """
+
+    def __init__(self, host, port, password, timeout):
+        """ Connect, authenticate and subscribe to events. """
+        self.buffer = b''
+        self.sock = socket.create_connection((host, port), timeout)
+        try:
+            headers, _ = self.read_message()
+            if headers.get('Content-Type') != 'auth/request':
+                raise ConnectionError('no auth request')
+            self.command('auth %s' % password)
+            self.command('event plain %s' % EVENTS)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """ Close the connection. """
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def pop_message(self):
+        """ Return a buffered (headers, body) message or None. """
+        end = self.buffer.find(b'\n\n')
+        if end < 0:
+            return None
+        headers = parse_headers(self.buffer[:end])
+        start = end + 2
+        end = start + int(headers.get('Content-Length', 0))
+        if len(self.buffer) < end:
+            return None
+        body = self.buffer[start:end]
+        self.buffer = self.buffer[end:]
+        return headers, body
+
+    def receive(self):
+        """ Read from the socket and return a list of complete (headers,
+        body) messages. Raise socket.timeout when nothing arrives. """
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError('event socket closed')
+        self.buffer += data
+        messages = []
+        message = self.pop_message()
+        while message:
+            messages.append(message)
+            message = self.pop_message()
+        return messages
+
+    def read_message(self):
+        """ Return the next (headers, body) message. """
+        message = self.pop_message()
+        while message is None:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError('event socket closed')
+            self.buffer += data
+            message = self.pop_message()
+        return message
+
+    def command(self, command):
+        """ Send the command and raise ConnectionError unless it's
+        accepted. """
+        self.sock.sendall(command.encode() + b'\n\n')
+        headers, _ = self.read_message()
+        while headers.get('Content-Type') != 'command/reply':
+            headers, _ = self.read_message()
+        reply = headers.get('Reply-Text', '')
+        if not reply.startswith('+OK'):
+            raise ConnectionError('%s: %s' % (command.split()[0], reply))
+
+
+def get_setup_time(event):
+    """ Return the channel's setup seconds, or None if it never set up. """
+    created = int(event.get('Caller-Channel-Created-Time') or 0)
+    times = [int(event.get(key) or 0) for key in SETUP_TIMES]
+    times = [value for value in times if value]
+    if not created or not times:
+        return None
+    return max(min(times) - created, 0) / 1000000
+
+
+def handle_event(event):
+    """ Feed the event to the gateway health tracker. """
+    name = event.get('Event-Name')
+    if name == 'CUSTOM':
+        if event.get('Event-Subclass') == 'sofia::gateway_state':
+            health.gateway_state(
+                event.get('Gateway'), event.get('State'),
+                event.get('Ping-Status')
+            )
+    elif name == 'CHANNEL_HANGUP_COMPLETE':
+        domain = event.get('variable_sip_gateway_name')
+        if not domain or event.get('Call-Direction') != 'outbound':
+            return
+        seconds = get_setup_time(event)
+        if seconds is not None:
+            health.call_setup(domain, seconds)
+        elif event.get('Hangup-Cause') in SETUP_FAILURES:
+            health.call_failed(domain)
+
+
+def listen(stop):
+    """ Connect and handle events until stopped or the connection
+    fails. """
+    with EventSocket(
+            'localhost', settings.PORTS.get('event_socket', 8021),
+            settings.EVENT_SOCKET_PASSWORD, settings.EVENT_SOCKET_TIMEOUT
+    ) as event_socket:
+        logging.getLogger('django.server').info('gateway events connected')
+        while not stop.is_set():
+            try:
+                messages = event_socket.receive()
+            except socket.timeout:
+                messages = []
+            for headers, body in messages:
+                if headers.get('Content-Type') == 'text/event-plain':
+                    handle_event(parse_headers(body))
+                elif headers.get('Content-Type') == 'text/disconnect-notice':
+                    raise ConnectionError('event socket disconnected')
+            health.check()
+
+
+def _run(stop):
+    """ Listen until stopped, reconnecting after errors. """
+    logger = logging.getLogger('django.server')
+    while not stop.is_set():
+        try:
+            listen(stop)
+        except (ConnectionError, OSError, ValueError) as err:
+            logger.warning('gateway events failed: %s', err)
+        stop.wait(settings.EVENT_SOCKET_RETRY)
+
+
+def start():
+    """ Start listening in a daemon thread and return the thread. """
+    global _thread  # pylint: disable=global-statement,invalid-name
+    _stop.clear()
+    _thread = threading.Thread(
+        target=_run, args=(_stop,), name='gateway-events', daemon=True
+    )
+    _thread.start()
+    return _thread
+
+
+def stop():
+    """ Stop listening and wait for the thread. """
+    global _thread  # pylint: disable=global-statement,invalid-name
+    _stop.set()
+    if _thread is not None:
+        _thread.join()
+        _thread = None
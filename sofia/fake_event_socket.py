@@ -0,0 +1,183 @@
+""" Fake event socket module.
+
+A local stand-in for FreeSWITCH's event socket, for tests and for trying
+gateway health ordering without FreeSWITCH. It authenticates clients,
+accepts event subscriptions and sends them the events it's given. """
+import socketserver
+import threading
+import time
+from urllib.parse import quote
+
+
+def format_event(headers):
+    """ Return the event headers as a text/event-plain message. """
+    body = ''.join(
+        '%s: %s\n' % (key, quote(str(value), safe=''))
+        for key, value in headers.items()
+    ).encode() + b'\n'
+    return (
+        b'Content-Length: %d\nContent-Type: text/event-plain\n\n' % len(body)
+    ) + body
+
+
+def get_state_event(gateway, state, ping=None):
+    """ Return a sofia::gateway_state event's headers. """
+    headers = {
+        'Event-Name': 'CUSTOM',
+        'Event-Subclass': 'sofia::gateway_state',
+        'Gateway': gateway,
+        'State': state,
+    }
+    if ping:
+        headers['Ping-Status'] = ping
+    return headers
+
+
+def get_hangup_event(gateway, seconds=None, cause='NORMAL_CLEARING'):
+    """ Return an outbound gateway channel's hangup event headers, with
+    the seconds that it took to answer or None if it never did. """
+    created = int(time.time() * 1000000)
+    answered = 0
+    if seconds is not None:
+        answered = created + int(seconds * 1000000)
+    return {
+        'Event-Name': 'CHANNEL_HANGUP_COMPLETE',
+        'Call-Direction': 'outbound',
+        'Caller-Channel-Created-Time': created,
+        'Caller-Channel-Answered-Time': answered,
+        'Hangup-Cause': cause,
+        'variable_sip_gateway_name': gateway,
+    }
+
+
+class FakeEventSocketRequestHandler(socketserver.StreamRequestHandler):
+    """ Serve an event socket client connection. """
+
+    def setup(self):
+        """ Add a lock for the connection's writes. """
+        super().setup()
+        self.lock = threading.Lock()
+
+    def reply(self, text):
+        """ Send a command reply. """
+        with self.lock:
+            self.wfile.write(
+                b'Content-Type: command/reply\nReply-Text: %s\n\n'
+                % text.encode()
+            )
+
+    def read_command(self):
+        """ Return the next command or None when the client's gone. """
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                if lines:
+                    return ' '.join(lines)
+                continue
+            lines.append(line.decode())
+
+    def handle(self):
+        """ Authenticate, then accept event subscriptions until the client
+        exits. """
+        self.wfile.write(b'Content-Type: auth/request\n\n')
+        command = self.read_command()
+        if command != 'auth %s' % self.server.password:
+            self.reply('-ERR invalid')
+            return
+        self.reply('+OK accepted')
+        while True:
+            command = self.read_command()
+            if command is None or command == 'exit':
+                break
+            if command.startswith('event plain '):
+                self.server.add_client(self)
+                self.reply('+OK event listener enabled plain')
+            else:
+                self.reply('-ERR command not found')
+        self.server.remove_client(self)
+
+    def send(self, message):
+        """ Send an event message. """
+        with self.lock:
+            self.wfile.write(message)
+
+
+class FakeEventSocketServer(socketserver.ThreadingTCPServer):
+    """ A threaded server that tracks subscribed clients. """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, password):
+        """ Bind the server. """
+        super().__init__(address, FakeEventSocketRequestHandler)
+        self.password = password
+        self.lock = threading.Lock()
+        self.clients = []
+        self.subscribed = threading.Event()
+
+    def add_client(self, client):
+        """ Send events to the client. """
+        with self.lock:
+            self.clients.append(client)
+        self.subscribed.set()
+
+    def remove_client(self, client):
+        """ Stop sending events to the client. """
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+
+class FakeEventSocket:
+    """ Run a fake event socket in a daemon thread. Port 0 binds a free
+    port. """
+
+    def __init__(self, port=0, password='ClueCon'):
+        """ Bind the server. """
+        self.server = FakeEventSocketServer(('localhost', port), password)
+        self.thread = None
+
+    @property
+    def port(self):
+        """ Return the bound port. """
+        return self.server.server_address[1]
+
+    def wait(self, timeout=5.0):
+        """ Wait for a client to subscribe and return True if one did. """
+        return self.server.subscribed.wait(timeout)
+
+    def send(self, headers):
+        """ Send the event headers to every subscribed client. """
+        message = format_event(headers)
+        with self.server.lock:
+            clients = list(self.server.clients)
+        for client in clients:
+            try:
+                client.send(message)
+            except OSError:
+                self.server.remove_client(client)
+
+    def start(self):
+        """ Serve in a daemon thread. """
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """ Stop serving and close the socket. """
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,17 @@
+""" Sofia app firewall rules registration module. """
+from common.firewall import register_rule_provider
+from sofia.models import AclAddress, Gateway
+
+
+def get_acl_rules():
+    """ Return a rule for each Gateway ACL address, from one joined
+    query. """
+    return [
+        ('tcp', port, port, address)
+        for port, address in AclAddress.objects.values_list(
+            'gateway__port', 'address'
+        )
+    ]
+
+
+register_rule_provider('sofia', get_acl_rules, (Gateway, AclAddress))
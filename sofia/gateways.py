@@ -0,0 +1,101 @@
+""" Sofia app gateway registry module.
+
+The registry maps Gateway domains to Gateways, with their AclAddresses
+prefetched, and holds the priority-ordered failover chain of every
+Gateway. It's rebuilt on Gateway and AclAddress changes and
+swapped in with a single assignment, so readers never see a partial
+rebuild and never query.
+
+get_chain orders the chain by gateway health (see sofia.health), and
+caches the order until the registry or the health ratings change. """
+import logging
+from collections import namedtuple
+from types import MappingProxyType
+from prometheus_client import Gauge
+from sofia import health
+
+
+chain_position = Gauge(
+    'pbx_gateway_chain_position',
+    'Gateway position in the failover chain, -1 when skipped.',
+    ['gateway']
+)
+
+Registry = namedtuple('Registry', ('gateways', 'chain'))
+
+_registry = Registry(MappingProxyType({}), ())
+
+# The registry and ratings that the ordered chain was made from, and the
+# ordered chain.
+_ordered = (None, None, ())
+
+
+def make_registry(gateways):
+    """ Return a Registry of the Gateways, in pk order. """
+    return Registry(
+        MappingProxyType({gateway.domain: gateway for gateway in gateways}),
+        tuple(sorted(
+            gateways, key=lambda gateway: (gateway.priority, gateway.pk)
+        )),
+    )
+
+
+def build():
+    """ Return a new Registry. """
+    # pylint: disable=import-outside-toplevel
+    from sofia.models import Gateway
+
+    return make_registry(list(
+        Gateway.objects.prefetch_related('acladdress_set').order_by('pk')
+    ))
+
+
+def refresh():
+    """ Build a new Registry and swap it in. """
+    global _registry  # pylint: disable=global-statement,invalid-name
+    registry = build()
+    _registry = registry
+    logging.getLogger('django.server').info(
+        'gateways %s', [gateway.domain for gateway in registry.chain]
+    )
+
+
+def get_gateway(domain):
+    """ Return the Gateway with the domain or None. """
+    return _registry.gateways.get(domain)
+
+
+def get_gateways():
+    """ Return a domain/Gateway mapping, in pk order. """
+    return _registry.gateways
+
+
+def get_chain():
+    """ Return the Gateways in health-aware failover order. """
+    global _ordered  # pylint: disable=global-statement,invalid-name
+    registry, ratings = _registry, health.get_ratings()
+    if _ordered[0] is registry and _ordered[1] is ratings:
+        return _ordered[2]
+    chain = health.order(registry.chain, ratings)
+    if chain != _ordered[2]:
+        for gateway in registry.chain:
+            chain_position.labels(gateway=gateway.domain).set(
+                chain.index(gateway) if gateway in chain else -1
+            )
+        if ratings:
+            logging.getLogger('django.server').info(
+                'gateway chain %s', [gateway.domain for gateway in chain]
+            )
+    _ordered = (registry, ratings, chain)
+    return chain
+
+
+def dump_state():
+    """ Return the Gateways as warm state. """
+    return list(_registry.gateways.values())
+
+
+def load_state(gateways):
+    """ Swap in a Registry of warm state Gateways. """
+    global _registry  # pylint: disable=global-statement,invalid-name
+    _registry = make_registry(gateways)
@@ -0,0 +1,241 @@
+""" Sofia app gateway health module.
+
+The tracker keeps each Gateway's last registration state and ping status
+and its recent outbound call setup latencies and failures, fed by
+FreeSWITCH events (see sofia.events), and rates each Gateway UP, SLOW or
+DOWN. The failover chain puts SLOW Gateways after UP ones and skips DOWN
+ones, unless every Gateway is DOWN.
+
+Ratings have hysteresis. Demotions are immediate, but promotions wait
+until a Gateway's rating has held for GATEWAY_HEALTH_HOLD_SECONDS, and a
+SLOW Gateway's median setup latency must drop below
+GATEWAY_HEALTH_FAST_SECONDS, not just GATEWAY_HEALTH_SLOW_SECONDS, to be
+UP again. Failures stop counting after the hold, so that a Gateway DOWN
+on failures alone is retried, and is DOWN again on its next failure.
+
+Without events, every Gateway is UP and the chain is in priority order.
+Each worker process tracks health from its own event socket connection. """
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+from django.conf import settings
+from django.dispatch import Signal
+from prometheus_client import Counter, Gauge, Histogram
+
+
+health_gauge = Gauge(
+    'pbx_gateway_health',
+    'Gateway health rating, 0 up, 1 slow, 2 down.',
+    ['gateway']
+)
+
+registered_gauge = Gauge(
+    'pbx_gateway_registered',
+    'Gateway registration state, 1 up, 0 down.',
+    ['gateway']
+)
+
+setup_time = Histogram(
+    'pbx_gateway_setup_seconds',
+    'Outbound call setup time through the gateway.',
+    ['gateway']
+)
+
+setup_failures = Counter(
+    'pbx_gateway_setup_failures',
+    'Outbound calls that failed to set up through the gateway.',
+    ['gateway']
+)
+
+health_changes = Counter(
+    'pbx_gateway_health_changes',
+    'Gateway health rating changes, labeled with the new rating.',
+    ['gateway', 'health']
+)
+
+UP, SLOW, DOWN = 0, 1, 2
+
+NAMES = ('up', 'slow', 'down')
+
+UP_STATES = frozenset(('REGED', 'NOREG', 'UP'))
+
+DOWN_STATES = frozenset(('FAILED', 'FAIL_WAIT', 'EXPIRED', 'TIMEOUT', 'DOWN'))
+
+# Sent with no args after ratings change.
+ratings_changed = Signal()
+
+_lock = threading.Lock()
+
+_health = {}
+
+_ratings = MappingProxyType({})
+
+
+class GatewayHealth:
+    """ A Gateway's recent registration state, setup latencies and
+    failures, and its rating. """
+
+    def __init__(self, domain, now):
+        """ Start UP with no history. """
+        self.domain = domain
+        self.state = None
+        self.ping = None
+        self.latencies = deque(maxlen=settings.GATEWAY_HEALTH_WINDOW)
+        self.failures = 0
+        self.failed = 0.0
+        self.rating = UP
+        self.changed = now
+
+    def get_latency(self):
+        """ Return the median recent setup latency or None. """
+        if not self.latencies:
+            return None
+        return statistics.median(self.latencies)
+
+    def get_target(self, now):
+        """ Return the rating that the Gateway's history calls for. """
+        if self.state in DOWN_STATES or self.ping == 'DOWN':
+            return DOWN
+        if (self.failures >= settings.GATEWAY_HEALTH_FAILURES
+                and now - self.failed < settings.GATEWAY_HEALTH_HOLD_SECONDS):
+            return DOWN
+        latency = self.get_latency()
+        if latency is not None:
+            if latency >= settings.GATEWAY_HEALTH_SLOW_SECONDS:
+                return SLOW
+            if (self.rating != UP
+                    and latency >= settings.GATEWAY_HEALTH_FAST_SECONDS):
+                return SLOW
+        return UP
+
+    def evaluate(self, now):
+        """ Update the rating and return True if it changed. """
+        target = self.get_target(now)
+        if target == self.rating:
+            return False
+        if (target < self.rating
+                and now - self.changed < settings.GATEWAY_HEALTH_HOLD_SECONDS):
+            return False
+        self.rating = target
+        self.changed = now
+        health_gauge.labels(gateway=self.domain).set(target)
+        health_changes.labels(
+            gateway=self.domain, health=NAMES[target]
+        ).inc()
+        logging.getLogger('django.server').info(
+            'gateway %s %s', self.domain, NAMES[target]
+        )
+        return True
+
+
+def _swap():
+    """ Swap in the current ratings. Call with the lock held. """
+    global _ratings  # pylint: disable=global-statement,invalid-name
+    _ratings = MappingProxyType({
+        domain: health.rating for domain, health in _health.items()
+    })
+
+
+def _update(domain, now, func):
+    """ Call func with the domain's GatewayHealth and the time, re-rate the
+    Gateway and swap in new ratings if its rating changed. """
+    if now is None:
+        now = time.monotonic()
+    with _lock:
+        health = _health.get(domain)
+        if health is None:
+            health = _health[domain] = GatewayHealth(domain, now)
+        func(health, now)
+        changed = health.evaluate(now)
+        if changed:
+            _swap()
+    if changed:
+        ratings_changed.send(sender=GatewayHealth)
+
+
+def gateway_state(domain, state, ping=None, now=None):
+    """ Record a gateway state event's registration state and ping
+    status. """
+
+    def update(health, now):
+        # pylint: disable=unused-argument
+        health.state = state
+        if ping:
+            health.ping = ping
+        if state in UP_STATES:
+            health.failures = 0
+            registered_gauge.labels(gateway=domain).set(1)
+        elif state in DOWN_STATES:
+            registered_gauge.labels(gateway=domain).set(0)
+
+    _update(domain, now, update)
+
+
+def call_setup(domain, seconds, now=None):
+    """ Record an outbound call that set up in seconds. """
+    setup_time.labels(gateway=domain).observe(seconds)
+
+    def update(health, now):
+        # pylint: disable=unused-argument
+        health.latencies.append(seconds)
+        health.failures = 0
+
+    _update(domain, now, update)
+
+
+def call_failed(domain, now=None):
+    """ Record an outbound call that failed to set up. """
+    setup_failures.labels(gateway=domain).inc()
+
+    def update(health, now):
+        health.failures += 1
+        health.failed = now
+
+    _update(domain, now, update)
+
+
+def check(now=None):
+    """ Re-rate every Gateway, for promotions that were waiting on the
+    hold, and swap in new ratings if any changed. """
+    if now is None:
+        now = time.monotonic()
+    with _lock:
+        changed = [health.evaluate(now) for health in _health.values()]
+        if any(changed):
+            _swap()
+    if any(changed):
+        ratings_changed.send(sender=GatewayHealth)
+
+
+def get_ratings():
+    """ Return a domain/rating mapping of Gateways with history. """
+    return _ratings
+
+
+def get_health(domain):
+    """ Return the domain's GatewayHealth or None. """
+    return _health.get(domain)
+
+
+def order(chain, ratings):
+    """ Return the chain with SLOW Gateways after UP ones and DOWN ones
+    skipped, unless every Gateway is DOWN. """
+    ordered = sorted(
+        chain, key=lambda gateway: ratings.get(gateway.domain, UP)
+    )
+    live = tuple(
+        gateway for gateway in ordered
+        if ratings.get(gateway.domain, UP) != DOWN
+    )
+    return live or tuple(chain)
+
+
+def reset():
+    """ Forget every Gateway's history. """
+    with _lock:
+        _health.clear()
+        _swap()
+    ratings_changed.send(sender=GatewayHealth)
@@ -0,0 +1,61 @@
+""" Management utility to run a fake FreeSWITCH event socket. """
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sofia.fake_event_socket import (
+    FakeEventSocket, get_hangup_event, get_state_event
+)
+
+
+class Command(BaseCommand):
+    """ A command to run a fake event socket that sends gateway events
+    typed on stdin, one per line:
+
+        <gateway> <state> [<ping status>]
+        <gateway> setup <seconds>
+        <gateway> fail [<hangup cause>] """
+
+    help = 'Used to send fake gateway events to workers.'
+
+    def add_arguments(self, parser):
+        """ Add fake event socket args. """
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=settings.PORTS.get('event_socket', 8021),
+            help='Specifies the port to listen on.',
+        )
+
+    @staticmethod
+    def get_event(words):
+        """ Return the event headers for the line's words or None. """
+        if len(words) == 3 and words[1] == 'setup':
+            return get_hangup_event(words[0], float(words[2]))
+        if len(words) in (2, 3) and words[1] == 'fail':
+            return get_hangup_event(
+                words[0], cause=(words[2:] or ['RECOVERY_ON_TIMER_EXPIRE'])[0]
+            )
+        if len(words) in (2, 3):
+            return get_state_event(*words)
+        return None
+
+    def handle(self, *args, **options):
+        """ Send events until stdin closes or interrupted. """
+        event_socket = FakeEventSocket(
+            options['port'], settings.EVENT_SOCKET_PASSWORD
+        ).start()
+        self.stdout.write('Fake event socket on port %s' % event_socket.port)
+        try:
+            for line in sys.stdin:
+                try:
+                    event = self.get_event(line.split())
+                except ValueError:
+                    event = None
+                if event is None:
+                    self.stderr.write('Unknown event: %s' % line.strip())
+                    continue
+                event_socket.send(event)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            event_socket.stop()
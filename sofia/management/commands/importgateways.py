@@ -1,6 +1,7 @@
 """ Management utility to manage Gateways. """
 import ast
 import os
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from sofia.models import Gateway, AclAddress
@@ -37,8 +38,7 @@ class Command(BaseCommand):
                 objects = gateway.delete()
                 print('Deleted gateway', objects, '- reload mod_sofia')
                 objects = AclAddress.objects.filter(gateway=gateway).delete()
-                print('Deleted ACL address', objects,
-                      '- restart netfilter-persistent pbx-web')
+                print('Deleted ACL address', objects)
 
         # Update gateway profiles.
         for domain, data in gateways.items():
@@ -63,15 +63,13 @@ class Command(BaseCommand):
                     address=address, gateway=gateway
                 )
                 if created:
-                    print('Created ACL address', acl,
-                          '- restart netfilter-persistent pbx-web')
+                    print('Created ACL address', acl)
 
             # Delete ACL addresses.
             for addr in AclAddress.objects.filter(gateway=gateway):
                 if addr.address not in data['allow_list']:
                     objects = addr.delete()
-                    print('Deleted ACL address', objects,
-                          '- restart netfilter-persistent pbx-web')
+                    print('Deleted ACL address', objects)
 
     def handle(self, *args, **options):
         """ Manage sofia profiles. """
@@ -80,3 +78,4 @@ class Command(BaseCommand):
             config = ast.literal_eval(sofia_fd.read())
         if config.get('GATEWAYS'):
             self.manage_gateways(config['GATEWAYS'])
+            call_command('syncfirewall', stdout=self.stdout)
@@ -0,0 +1,51 @@
+""" Sofia app signal receivers module. """
+from django.db.models.signals import post_delete, post_save
+from intercom.models import Intercom
+from sofia import gateways
+from sofia.configuration import invalidate_documents
+from sofia.models import AclAddress, Gateway
+
+
+def refresh_gateways(sender, **kwargs):
+    """ Rebuild the gateway registry on Gateway/AclAddress changes. """
+    # pylint: disable=unused-argument
+    gateways.refresh()
+
+
+def invalidate_configuration(sender, **kwargs):
+    """ Drop rendered sofia config on profile changes. """
+    # pylint: disable=unused-argument
+    invalidate_documents()
+
+
+def get_senders():
+    """ Return the models that the gateway registry and sofia config
+    depend on. """
+    return (Intercom, Gateway, AclAddress)
+
+
+def connect():
+    """ Connect registry and config receivers to model signals. The
+    registry refreshes first, so that later receivers see it. """
+    for sender in (Gateway, AclAddress):
+        post_save.connect(
+            refresh_gateways,
+            sender=sender,
+            dispatch_uid='gateways-save-%s' % sender._meta.label_lower,
+        )
+        post_delete.connect(
+            refresh_gateways,
+            sender=sender,
+            dispatch_uid='gateways-delete-%s' % sender._meta.label_lower,
+        )
+    for sender in get_senders():
+        post_save.connect(
+            invalidate_configuration,
+            sender=sender,
+            dispatch_uid='sofia-save-%s' % sender._meta.label_lower,
+        )
+        post_delete.connect(
+            invalidate_configuration,
+            sender=sender,
+            dispatch_uid='sofia-delete-%s' % sender._meta.label_lower,
+        )
@@ -0,0 +1,87 @@
+""" Sofia configuration test module. """
+from unittest import mock
+from django.test import RequestFactory
+from common.tests.base import BaseTestCase
+from intercom.models import Intercom
+from sofia import configuration
+from sofia.configuration import SofiaConfigHandler
+from sofia.models import AclAddress, Gateway
+
+
+class SofiaConfigTestCase(BaseTestCase):
+    """ Verify precomputed sofia configuration documents. """
+
+    def setUp(self):
+        """ Create profiles. """
+        super().setUp()
+        self.factory = RequestFactory()
+        self.handler = SofiaConfigHandler()
+        Intercom.objects.create(domain='intercom', port=5061)
+        self.gateway = Gateway.objects.create(
+            domain='gateway', port=5071, username='gwuser',
+            password='gwpass', proxy='sip.example.com',
+            realm='sip.example.com', priority=1
+        )
+
+    def get_config(self, **data):
+        """ Return the config document for the POST data. """
+        return self.handler.get_config(self.factory.post('/fsapi', data))
+
+    def test_cached(self):
+        """ Assert documents are rendered once. """
+        document = self.get_config()
+        self.assertIn(b'<profile name="intercom">', document)
+        self.assertIn(b'<profile name="gateway">', document)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_config(), document)
+            self.assertIn(
+                b'<param name="username" value="gwuser"/>',
+                self.get_config(profile='gateway')
+            )
+            self.assertIn(
+                b'<param name="tls-sip-port" value="5061"/>',
+                self.get_config(profile='intercom')
+            )
+
+    def test_invalidated(self):
+        """ Assert profile changes invalidate documents. """
+        self.get_config()
+        self.gateway.username = 'changed'
+        self.gateway.save()
+        self.assertIn(
+            b'<param name="username" value="changed"/>',
+            self.get_config(profile='gateway')
+        )
+        AclAddress.objects.create(address='10.0.0.1', gateway=self.gateway)
+        with self.assertNumQueries(1):
+            self.get_config()
+
+    def test_invalidated_during_build(self):
+        """ Assert documents built across an invalidation aren't kept. """
+        build_documents = configuration.build_documents
+
+        def build_and_change(use_templates):
+            """ Build, then change the Gateway. """
+            documents = build_documents(use_templates)
+            self.gateway.username = 'changed'
+            self.gateway.save()
+            return documents
+
+        configuration.invalidate_documents()
+        with mock.patch.object(
+                configuration, 'build_documents', build_and_change):
+            self.assertIn(b'value="gwuser"', self.get_config())
+        self.assertIn(b'value="changed"', self.get_config())
+
+    def test_use_templates(self):
+        """ Assert builder and template documents are cached apart. """
+        built = self.get_config(profile='gateway')
+        self.handler.use_templates = True
+        with self.assertNumQueries(1):
+            rendered = self.get_config(profile='gateway')
+        self.assertIn(b'value="gwuser"', rendered)
+        self.assertIsNot(rendered, built)
+        with self.assertNumQueries(0):
+            self.assertIs(self.get_config(profile='gateway'), rendered)
+        self.handler.use_templates = False
+        self.assertIs(self.get_config(profile='gateway'), built)
@@ -0,0 +1,51 @@
+""" Sofia document builder test module. """
+from django.template.loader import render_to_string
+from common.tests.base import BaseTestCase
+from fsapi.xml import build_document
+from intercom.models import Intercom
+from sofia.models import Gateway
+
+
+class SofiaDocumentTestCase(BaseTestCase):
+    """ Verify sofia builders produce their templates' documents. """
+
+    def assert_parity(self, template, context):
+        """ Assert the built and rendered documents are identical. """
+        self.assertEqual(
+            build_document(template, context),
+            render_to_string(template, context).encode()
+        )
+
+    def test_empty(self):
+        """ Assert sofia.conf matches without profiles. """
+        self.assert_parity('sofia/sofia.conf.xml', {
+            'intercoms': [], 'gateways': []
+        })
+
+    def test_profiles(self):
+        """ Assert profile documents match. """
+        intercoms = [
+            Intercom.objects.create(
+                domain='intercom%s' % index, port=5061 + index
+            ) for index in range(2)
+        ]
+        gateways = [
+            Gateway.objects.create(
+                domain='gateway%s' % index, port=5071 + index,
+                username='gwuser', password='gw<&>pass',
+                proxy='sip.example.com', realm='sip.example.com',
+                priority=index
+            ) for index in range(2)
+        ]
+        self.assert_parity('sofia/sofia.conf.xml', {
+            'intercoms': intercoms, 'gateways': gateways
+        })
+        self.assert_parity('sofia/sofia.conf.xml', {
+            'intercoms': intercoms, 'gateways': []
+        })
+        self.assert_parity('sofia/intercom.conf.xml', {
+            'intercom': intercoms[0]
+        })
+        self.assert_parity('sofia/gateway.conf.xml', {
+            'gateway': gateways[0]
+        })
@@ -0,0 +1,79 @@
+""" Sofia gateway registry test module. """
+from common.tests.base import BaseTestCase
+from sofia import gateways
+from sofia.models import AclAddress, Gateway
+
+
+class GatewayRegistryTestCase(BaseTestCase):
+    """ Verify the live gateway registry. """
+
+    def setUp(self):
+        """ Create gateways. """
+        super().setUp()
+        self.gateways = [
+            Gateway.objects.create(
+                domain='gateway%s' % index, port=5071 + index,
+                username='gwuser', password='gwpass',
+                proxy='sip.example.com', realm='sip.example.com',
+                priority=priority
+            ) for index, priority in enumerate((2, 1, 1))
+        ]
+        self.acl_address = AclAddress.objects.create(
+            address='192.0.2.1', gateway=self.gateways[0]
+        )
+
+    def test_lookup(self):
+        """ Assert lookups don't query. """
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                gateways.get_gateway('gateway1'), self.gateways[1]
+            )
+            self.assertIsNone(gateways.get_gateway('missing'))
+            self.assertEqual(
+                list(gateways.get_gateways()),
+                ['gateway0', 'gateway1', 'gateway2']
+            )
+            self.assertEqual(
+                [acl.address for acl in gateways.get_gateway(
+                    'gateway0'
+                ).acladdress_set.all()],
+                ['192.0.2.1']
+            )
+
+    def get_addresses(self, domain):
+        """ Return the registry Gateway's ACL addresses. """
+        # pylint: disable=no-self-use
+        return [
+            acl.address
+            for acl in gateways.get_gateway(domain).acladdress_set.all()
+        ]
+
+    def test_chain(self):
+        """ Assert the chain follows priority, then pk. """
+        self.assertEqual(gateways.get_chain(), (
+            self.gateways[1], self.gateways[2], self.gateways[0]
+        ))
+        self.gateways[0].priority = 0
+        self.gateways[0].save()
+        self.assertEqual(gateways.get_chain()[0], self.gateways[0])
+        self.gateways[1].delete()
+        self.assertIsNone(gateways.get_gateway('gateway1'))
+        self.assertEqual(len(gateways.get_chain()), 2)
+
+    def test_acl_signals(self):
+        """ Assert AclAddress changes refresh the registry. """
+        acl_address = AclAddress.objects.create(
+            address='192.0.2.2', gateway=self.gateways[2]
+        )
+        self.assertEqual(self.get_addresses('gateway2'), ['192.0.2.2'])
+        acl_address.delete()
+        self.assertEqual(self.get_addresses('gateway2'), [])
+
+    def test_state(self):
+        """ Assert warm state round trips. """
+        state = gateways.dump_state()
+        gateways.load_state([])
+        self.assertEqual(gateways.get_chain(), ())
+        gateways.load_state(state)
+        self.assertEqual(gateways.get_chain()[0], self.gateways[1])
+        self.assertEqual(self.get_addresses('gateway0'), ['192.0.2.1'])
@@ -0,0 +1,121 @@
+""" Sofia gateway health test module. """
+import time
+from django.test import override_settings
+from common.tests.base import BaseTestCase
+from sofia import events, gateways, health
+from sofia.fake_event_socket import (
+    FakeEventSocket, get_hangup_event, get_state_event
+)
+from sofia.models import Gateway
+
+
+@override_settings(
+    GATEWAY_HEALTH_WINDOW=3, GATEWAY_HEALTH_SLOW_SECONDS=3.0,
+    GATEWAY_HEALTH_FAST_SECONDS=1.5, GATEWAY_HEALTH_FAILURES=2,
+    GATEWAY_HEALTH_HOLD_SECONDS=30.0,
+)
+class GatewayHealthTestCase(BaseTestCase):
+    """ Verify health-aware failover chains. """
+
+    def setUp(self):
+        """ Create gateways in priority order. """
+        super().setUp()
+        health.reset()
+        self.addCleanup(health.reset)
+        self.gateways = [
+            Gateway.objects.create(
+                domain='gateway%s' % index, port=5071 + index,
+                username='gwuser', password='gwpass',
+                proxy='sip.example.com', realm='sip.example.com',
+                priority=index
+            ) for index in range(3)
+        ]
+
+    def get_domains(self):
+        """ Return the chain's domains. """
+        return [gateway.domain for gateway in gateways.get_chain()]
+
+    def test_order(self):
+        """ Assert slow gateways go last and down gateways are skipped. """
+        self.assertEqual(
+            self.get_domains(), ['gateway0', 'gateway1', 'gateway2']
+        )
+        health.call_setup('gateway0', 4.0, now=1)
+        self.assertEqual(
+            self.get_domains(), ['gateway1', 'gateway2', 'gateway0']
+        )
+        health.gateway_state('gateway1', 'FAIL_WAIT', now=1)
+        self.assertEqual(self.get_domains(), ['gateway2', 'gateway0'])
+        health.gateway_state('gateway2', 'UP', 'DOWN', now=1)
+        health.gateway_state('gateway0', 'DOWN', now=1)
+        self.assertEqual(
+            self.get_domains(), ['gateway0', 'gateway1', 'gateway2']
+        )
+        with self.assertNumQueries(0):
+            self.assertIs(gateways.get_chain(), gateways.get_chain())
+
+    def test_hysteresis(self):
+        """ Assert promotions wait for the hold and the fast latency. """
+        health.gateway_state('gateway0', 'FAILED', now=0)
+        health.gateway_state('gateway0', 'REGED', now=10)
+        self.assertEqual(health.get_ratings()['gateway0'], health.DOWN)
+        health.check(now=29)
+        self.assertEqual(health.get_ratings()['gateway0'], health.DOWN)
+        health.check(now=30)
+        self.assertEqual(health.get_ratings()['gateway0'], health.UP)
+        for now in (31, 32):
+            health.call_setup('gateway0', 3.5, now=now)
+        self.assertEqual(health.get_ratings()['gateway0'], health.SLOW)
+        for now in (70, 71):
+            health.call_setup('gateway0', 2.0, now=now)
+        self.assertEqual(health.get_ratings()['gateway0'], health.SLOW)
+        for now in (72, 73):
+            health.call_setup('gateway0', 1.0, now=now)
+        self.assertEqual(health.get_ratings()['gateway0'], health.UP)
+
+    def test_failures(self):
+        """ Assert setup failures skip a gateway, and that it's retried
+        after the hold. """
+        health.call_failed('gateway0', now=0)
+        self.assertEqual(health.get_health('gateway0').rating, health.UP)
+        health.call_failed('gateway0', now=1)
+        self.assertEqual(self.get_domains(), ['gateway1', 'gateway2'])
+        health.check(now=31)
+        self.assertEqual(
+            self.get_domains(), ['gateway0', 'gateway1', 'gateway2']
+        )
+        health.call_failed('gateway0', now=32)
+        self.assertEqual(health.get_ratings()['gateway0'], health.DOWN)
+        health.gateway_state('gateway0', 'REGED', now=62)
+        self.assertEqual(health.get_ratings()['gateway0'], health.UP)
+
+    def test_events(self):
+        """ Assert event socket events feed the tracker. """
+        with FakeEventSocket() as event_socket:
+            with override_settings(
+                    PORTS={'event_socket': event_socket.port},
+                    EVENT_SOCKET_PASSWORD='ClueCon',
+                    EVENT_SOCKET_TIMEOUT=0.05, EVENT_SOCKET_RETRY=0.05):
+                events.start()
+                self.addCleanup(events.stop)
+                self.assertTrue(event_socket.wait())
+                event_socket.send(get_hangup_event('gateway0', 4.0))
+                event_socket.send(get_state_event('gateway1', 'FAIL_WAIT'))
+                event_socket.send(get_hangup_event(
+                    'gateway2', cause='RECOVERY_ON_TIMER_EXPIRE'
+                ))
+                event_socket.send(get_hangup_event(
+                    'gateway2', cause='USER_BUSY'
+                ))
+                event_socket.send(get_state_event('gateway2', 'TRYING'))
+                deadline = time.monotonic() + 5
+                while (getattr(health.get_health('gateway2'), 'state', None)
+                       != 'TRYING'
+                       and time.monotonic() < deadline):
+                    time.sleep(0.01)
+                events.stop()
+        self.assertEqual(self.get_domains(), ['gateway2', 'gateway0'])
+        self.assertEqual(
+            list(health.get_health('gateway0').latencies), [4.0]
+        )
+        self.assertEqual(health.get_health('gateway2').failures, 1)